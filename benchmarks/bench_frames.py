@@ -0,0 +1,361 @@
+"""Frame benchmark: fps and allocations of the per-frame hot paths.
+
+Drives the functions every frame goes through:
+  detect   - Detector.process_frame on the detection stream, drawn on the frame
+  record   - VideoRecorder.add_frame with clips starting and stopping
+  resize   - resize_frame to the preview width
+  tkimage  - frame_to_tkimage of the preview (skipped without a display)
+
+Frames come from a synthetic scene (textured background, moving blobs,
+pasted faces, sensor noise) at each requested resolution, and from any
+recorded clips or image folders given with --clip, replayed through
+Camera. Each stage is timed per call, then run again under tracemalloc
+for the allocation figures: the peak bytes a call allocates above what
+it started with, and the blocks still held after it.
+
+Compare against an earlier run with --baseline to catch regressions; the
+exit status is 1 if any stage got slower than --tolerance allows.
+
+Usage:
+    python benchmarks/bench_frames.py [--resolutions 480p,720p,1080p,4k]
+        [--clip recording.avi] [--frames 120] [--output FILE]
+        [--baseline FILE [--tolerance 0.15]]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchtower.core.camera import Camera  # noqa: E402
+from watchtower.core.detection import Detector  # noqa: E402
+from watchtower.core.replay import PACING_FAST  # noqa: E402
+from watchtower.core.recording import VideoRecorder  # noqa: E402
+from watchtower.utils.video import frame_to_tkimage, resize_frame  # noqa: E402
+
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4k': (3840, 2160),
+}
+
+STAGES = ('detect', 'record', 'resize', 'tkimage')
+
+class SyntheticScene:
+    """
+    Endless frames of a static scene with moving blobs and faces.
+
+    The background is a fixed gradient with furniture-like rectangles;
+    blobs bounce around it, face patches (images from ``faces`` or a drawn
+    face) drift across it, and a rotating set of noise fields stands in
+    for sensor noise. Everything is seeded, so runs are comparable.
+    """
+
+    def __init__(self, width: int, height: int, blobs: int = 3,
+                 faces: int = 1, noise: int = 6, seed: int = 0,
+                 face_images: Optional[List[np.ndarray]] = None):
+        self.width = width
+        self.height = height
+        rng = np.random.default_rng(seed)
+
+        ramp = np.linspace(60, 160, width, dtype=np.float32)
+        self.background = np.repeat(ramp[None, :, None], height, 0).repeat(3, 2)
+        self.background = self.background.astype(np.uint8)
+        for _ in range(12):
+            x, y = rng.integers(0, width), rng.integers(0, height)
+            w, h = rng.integers(width // 20, width // 5, size=2)
+            color = tuple(int(c) for c in rng.integers(20, 230, size=3))
+            cv2.rectangle(self.background, (int(x), int(y)),
+                          (int(x + w), int(y + h)), color, -1)
+
+        scale = height / 480
+        self.blobs = [
+            [rng.uniform(0, width), rng.uniform(0, height),
+             rng.uniform(-6, 6) * scale, rng.uniform(-4, 4) * scale,
+             int(rng.integers(20, 60) * scale),
+             tuple(int(c) for c in rng.integers(0, 255, size=3))]
+            for _ in range(blobs)
+        ]
+
+        face_size = max(int(90 * scale), 24)
+        images = face_images or [_drawn_face(face_size)]
+        self.faces = []
+        for i in range(faces):
+            image = images[i % len(images)]
+            image = cv2.resize(image, (face_size, face_size * image.shape[0]
+                                       // image.shape[1]))
+            self.faces.append([rng.uniform(0, width - image.shape[1]),
+                               rng.uniform(0, height - image.shape[0]),
+                               rng.uniform(1, 3) * scale, image])
+
+        self.noise = [rng.integers(-noise, noise + 1, size=(height, width, 3),
+                                   dtype=np.int16) for _ in range(4)] if noise else []
+
+    def frames(self) -> Iterator[np.ndarray]:
+        index = 0
+        while True:
+            frame = self.background.copy()
+            for blob in self.blobs:
+                x, y, dx, dy, radius, color = blob
+                cv2.circle(frame, (int(x), int(y)), radius, color, -1)
+                blob[0] = x + dx
+                blob[1] = y + dy
+                if not 0 <= blob[0] < self.width:
+                    blob[2] = -dx
+                if not 0 <= blob[1] < self.height:
+                    blob[3] = -dy
+            for face in self.faces:
+                x, y, dx, image = face
+                h, w = image.shape[:2]
+                frame[int(y):int(y) + h, int(x):int(x) + w] = image
+                face[0] = (x + dx) % (self.width - w)
+            if self.noise:
+                noisy = frame.astype(np.int16) + self.noise[index % len(self.noise)]
+                frame = np.clip(noisy, 0, 255).astype(np.uint8)
+            index += 1
+            yield frame
+
+def _drawn_face(size: int) -> np.ndarray:
+    """A simple frontal face: skin oval, eyes, brows, nose and mouth."""
+    face = np.full((size, size, 3), 200, np.uint8)
+    c, s = size // 2, size / 100
+    cv2.ellipse(face, (c, c), (int(38 * s), int(48 * s)), 0, 0, 360,
+                (150, 180, 225), -1)
+    for ex in (c - int(16 * s), c + int(16 * s)):
+        cv2.ellipse(face, (ex, c - int(10 * s)), (int(8 * s), int(5 * s)),
+                    0, 0, 360, (40, 40, 40), -1)
+        cv2.line(face, (ex - int(10 * s), c - int(22 * s)),
+                 (ex + int(10 * s), c - int(22 * s)), (50, 60, 80), max(int(3 * s), 1))
+    cv2.line(face, (c, c - int(4 * s)), (c, c + int(12 * s)), (110, 130, 170), 2)
+    cv2.ellipse(face, (c, c + int(24 * s)), (int(16 * s), int(6 * s)),
+                0, 0, 180, (60, 60, 140), max(int(3 * s), 1))
+    return face
+
+def _load_faces(folder: Optional[str]) -> List[np.ndarray]:
+    if not folder:
+        return []
+    images = [cv2.imread(str(p)) for p in sorted(Path(folder).iterdir())]
+    return [image for image in images if image is not None]
+
+def _clip_frames(path: str, limit: int) -> Tuple[List[np.ndarray], float]:
+    """Read up to limit frames of a clip or image folder through Camera."""
+    camera = Camera(path, pacing=PACING_FAST)
+    if not camera.open():
+        raise RuntimeError(f'cannot open {path}')
+    fps = camera.fps
+    frames = []
+    while len(frames) < limit:
+        ret, frame = camera.read_frame()
+        if not ret:
+            break
+        frames.append(frame)
+    camera.release()
+    if not frames:
+        raise RuntimeError(f'no frames in {path}')
+    return frames, fps
+
+def _time_calls(func: Callable[[np.ndarray, int], object],
+                frames: List[np.ndarray]) -> Dict[str, float]:
+    """Per-call wall time over frames."""
+    samples = []
+    for i, frame in enumerate(frames):
+        start = time.perf_counter_ns()
+        func(frame, i)
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        'fps': round(1000.0 / mean, 1) if mean > 0 else None,
+        'median_ms': round(statistics.median(samples), 3),
+        'p90_ms': round(samples[max(int(len(samples) * 0.9) - 1, 0)], 3),
+    }
+
+def _allocations(func: Callable[[np.ndarray, int], object],
+                 frames: List[np.ndarray], offset: int) -> Dict[str, float]:
+    """Peak bytes allocated per call and blocks retained over the run."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peaks = []
+    for i, frame in enumerate(frames):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func(frame, offset + i)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+              tracemalloc.Filter(False, __file__)]
+    before, after = before.filter_traces(ignore), after.filter_traces(ignore)
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return {
+        'alloc_peak_kb': round(statistics.median(peaks) / 1024, 1),
+        'alloc_blocks_retained': retained,
+    }
+
+def _tk_root():
+    """A hidden Tk root for PhotoImage, or the reason there is none."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root, None
+    except Exception as e:
+        return None, str(e).splitlines()[0]
+
+def bench_source(label: str, frames: List[np.ndarray], fps: float,
+                 args, tk_root, tk_error: Optional[str]) -> Dict[str, object]:
+    """Run every stage over one source's frames."""
+    height, width = frames[0].shape[:2]
+    det_size = None
+    if args.detection_width and args.detection_width < width:
+        det_size = (args.detection_width,
+                    int(round(height * args.detection_width / width / 2)) * 2)
+    detector = Detector(min_motion_area=args.min_motion_area)
+    preview_width = min(args.preview_width, width)
+
+    def detect(frame, i):
+        small = cv2.resize(frame, det_size, interpolation=cv2.INTER_AREA) if det_size else None
+        detector.process_frame(frame, detection_frame=small)
+
+    tmp = tempfile.TemporaryDirectory()
+    recorder = VideoRecorder(tmp.name, width, height, fps,
+                             pre_buffer_seconds=args.prebuffer_seconds,
+                             post_buffer_seconds=1)
+
+    def record(frame, i):
+        # Bursts of activity: a clip opens, runs out its post-buffer, closes
+        recorder.add_frame(frame, detection=(i % 90) < 20, capture_time=i / fps)
+
+    def resize(frame, i):
+        resize_frame(frame, width=preview_width)
+
+    previews = [resize_frame(frame, width=preview_width) for frame in frames]
+
+    def tkimage(frame, i):
+        frame_to_tkimage(previews[i % len(previews)])
+
+    stages = {'detect': detect, 'record': record, 'resize': resize,
+              'tkimage': tkimage}
+    results = {}
+    for name in args.stages:
+        if name == 'tkimage' and tk_root is None:
+            results[name] = {'skipped': tk_error or 'no display'}
+            continue
+        func = stages[name]
+        for i, frame in enumerate(frames[:args.warmup]):
+            func(frame, i)  # background model warm-up, encoder start, caches
+        timed = frames[args.warmup:] or frames
+        results[name] = _time_calls(func, timed)
+        results[name].update(_allocations(func, timed[:args.alloc_frames],
+                                          len(frames)))
+    recorder.release()
+    tmp.cleanup()
+    return {'source': label, 'size': [width, height],
+            'detection_size': list(det_size) if det_size else None,
+            'frames': len(frames), 'stages': results}
+
+def compare(results: Dict[str, object], baseline: Dict[str, object],
+            tolerance: float) -> List[str]:
+    """Stages whose median time grew by more than tolerance."""
+    old = {(s['source'], name): stats
+           for s in baseline.get('sources', [])
+           for name, stats in s['stages'].items()}
+    regressions = []
+    for source in results['sources']:
+        for name, stats in source['stages'].items():
+            before = old.get((source['source'], name))
+            if not before or 'median_ms' not in before or 'median_ms' not in stats:
+                continue
+            change = stats['median_ms'] / before['median_ms'] - 1 if before['median_ms'] else 0
+            stats['change_pct'] = round(100.0 * change, 1)
+            if change > tolerance:
+                regressions.append(f"{source['source']} {name}: "
+                                   f"{before['median_ms']} -> {stats['median_ms']} ms")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resolutions', default='480p,720p,1080p,4k',
+                        help=f'synthetic sizes: {",".join(RESOLUTIONS)} or WxH; '
+                             'empty for none')
+    parser.add_argument('--clip', action='append', default=[],
+                        help='recorded clip to replay (repeatable)')
+    parser.add_argument('--faces', help='folder of face images to paste')
+    parser.add_argument('--frames', type=int, default=120,
+                        help='frames per source (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=20,
+                        help='untimed frames before each stage')
+    parser.add_argument('--alloc-frames', type=int, default=30,
+                        help='frames traced for allocations')
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--detection-width', type=int, default=640,
+                        help='detection stream width, 0 for full frames')
+    parser.add_argument('--preview-width', type=int, default=640)
+    parser.add_argument('--min-motion-area', type=int, default=2000)
+    parser.add_argument('--prebuffer-seconds', type=int, default=1)
+    parser.add_argument('--output', help='write JSON results to this file')
+    parser.add_argument('--baseline', help='earlier JSON results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed slowdown before a stage counts as a regression')
+    args = parser.parse_args(argv)
+    args.stages = [s for s in args.stages.split(',') if s]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(sorted(unknown))}')
+
+    tk_root, tk_error = _tk_root() if 'tkimage' in args.stages else (None, None)
+    face_images = _load_faces(args.faces)
+    count = args.frames + args.warmup
+
+    sources = []
+    for name in filter(None, args.resolutions.split(',')):
+        if name.lower() in RESOLUTIONS:
+            width, height = RESOLUTIONS[name.lower()]
+        else:
+            width, height = (int(v) for v in name.lower().split('x'))
+        scene = SyntheticScene(width, height, face_images=face_images)
+        generator = scene.frames()
+        frames = [next(generator) for _ in range(count)]
+        sources.append(bench_source(f'synthetic {name}', frames, 30.0, args,
+                                    tk_root, tk_error))
+        del frames
+    for path in args.clip:
+        frames, fps = _clip_frames(path, count)
+        sources.append(bench_source(Path(path).name, frames, fps, args,
+                                    tk_root, tk_error))
+        del frames
+
+    results = {
+        'benchmark': 'frames',
+        'python': sys.version.split()[0],
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'threads': cv2.getNumThreads(),
+        'sources': sources,
+    }
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        results['regressions'] = regressions
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    print(text)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
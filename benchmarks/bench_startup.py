@@ -0,0 +1,146 @@
+"""Startup benchmark: import cost and time to first frame.
+
+Runs a fresh interpreter for every measurement so nothing is cached in
+sys.modules. Import cost is taken from ``python -X importtime``; time to
+first frame is measured from process spawn to the first processed frame.
+
+Usage:
+    python benchmarks/bench_startup.py [--camera INDEX] [--runs N] [--output FILE]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules whose presence at window-import time means startup is not lazy
+HEAVY_MODULES = ('cv2', 'numpy', 'PIL', 'PIL.ImageTk')
+
+FIRST_FRAME_SCRIPT = """
+import json, sys, time
+marks = {}
+import watchtower.gui.main_window
+marks['window_module'] = time.time()
+marks['heavy_at_window'] = sorted(
+    m for m in %(heavy)r if m in sys.modules)
+from watchtower.core import models
+models.preload()
+marks['pipeline_ready'] = time.time()
+from watchtower.core.camera import Camera
+from watchtower.core.detection import Detector
+frame = None
+source = 'synthetic'
+if %(camera)r is not None:
+    camera = Camera(%(camera)r)
+    if camera.open():
+        marks['camera_open'] = time.time()
+        ret, frame = camera.read_frame()
+        source = 'camera' if ret else 'synthetic'
+    camera.release()
+if frame is None:
+    import numpy as np
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+Detector().process_frame(frame)
+marks['first_frame'] = time.time()
+marks['first_frame_source'] = source
+print(json.dumps(marks))
+"""
+
+def _env() -> Dict[str, str]:
+    """Environment for child interpreters with the repo on the path."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        p for p in (str(REPO_ROOT), env.get('PYTHONPATH')) if p)
+    return env
+
+def measure_importtime(module: str = 'watchtower.gui.main_window',
+                       top: int = 10) -> Dict[str, object]:
+    """Run ``-X importtime`` for a module and summarize the result."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=_env(), cwd=str(REPO_ROOT))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    total = next((cum for name, _, cum in rows if name == module), None)
+    imported = {name for name, _, _ in rows}
+    slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+    return {
+        'module': module,
+        'cumulative_us': total,
+        'heavy_modules_imported': [m for m in HEAVY_MODULES if m in imported],
+        'slowest_self_us': [
+            {'module': name, 'self_us': self_us}
+            for name, self_us, _ in slowest
+        ],
+    }
+
+def measure_first_frame(camera: Optional[int]) -> Dict[str, object]:
+    """Spawn a cold interpreter and time its startup milestones."""
+    script = FIRST_FRAME_SCRIPT % {'heavy': HEAVY_MODULES, 'camera': camera}
+    spawn = time.time()
+    proc = subprocess.run([sys.executable, '-c', script],
+                          capture_output=True, text=True, env=_env(),
+                          cwd=str(REPO_ROOT))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    marks = json.loads(proc.stdout.strip().splitlines()[-1])
+    result = {
+        key: round((value - spawn) * 1000.0, 1)
+        for key, value in marks.items()
+        if isinstance(value, float)
+    }
+    result['heavy_at_window'] = marks['heavy_at_window']
+    result['first_frame_source'] = marks['first_frame_source']
+    return result
+
+def _summarize(runs: List[Dict[str, object]]) -> Dict[str, object]:
+    """Median of each millisecond milestone across runs."""
+    keys = [k for k, v in runs[0].items() if isinstance(v, float)]
+    summary = {f'{k}_ms': statistics.median(r[k] for r in runs if k in r)
+               for k in keys}
+    summary['heavy_at_window'] = runs[0]['heavy_at_window']
+    summary['first_frame_source'] = runs[0]['first_frame_source']
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--camera', type=int, default=None,
+                        help='camera index to open (default: synthetic frame)')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='number of cold starts to measure')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    runs = [measure_first_frame(args.camera) for _ in range(args.runs)]
+    results = {
+        'benchmark': 'startup',
+        'python': sys.version.split()[0],
+        'importtime': measure_importtime(),
+        'time_to_first_frame': _summarize(runs),
+        'runs': runs,
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    print(text)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Thread policy benchmark: aggregate fps of N camera pipelines per setting.
+
+Runs one process per simulated camera. Each process detects on a synthetic
+720p scene (moving blob over sensor noise) and encodes every frame to XVID,
+like a camera with a master recording. It is run once per thread setting:
+  default        - OpenCV and BLAS defaults, nothing pinned
+  single_camera  - the single_camera preset in every process
+  multi_camera   - the multi_camera preset (one OpenCV thread, pinned CPUs)
+
+Usage:
+    python benchmarks/bench_threads.py [--cameras 4] [--seconds 10]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchtower.utils import threads  # noqa: E402
+
+SETTINGS = ('default',) + threads.PRESETS
+
+def _pipeline(setting: str, slot: int, cameras: int, seconds: float,
+              width: int, height: int, start, results) -> None:
+    """One camera pipeline; NumPy and OpenCV are imported after the policy."""
+    policy = None
+    if setting != 'default':
+        policy = threads.preset_policy(setting, slot, cameras)
+        threads.apply_blas_env(policy)
+
+    import cv2
+    import numpy as np
+    from watchtower.core.detection import Detector
+
+    if policy is not None:
+        threads.apply_policy(policy)
+    detector = Detector(min_motion_area=2000)
+    rng = np.random.default_rng(slot)
+    noise = [rng.integers(0, 24, size=(height, width, 3), dtype=np.uint8)
+             for _ in range(8)]
+    det_size = (640, int(round(height * 640 / width)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with threads.pinned(policy.encoder_cpus if policy else []):
+            writer = cv2.VideoWriter(os.path.join(tmp, 'bench.avi'),
+                                     cv2.VideoWriter_fourcc(*'XVID'),
+                                     30.0, (width, height))
+        start.wait()
+        frames = 0
+        begin = time.perf_counter()
+        while time.perf_counter() - begin < seconds:
+            frame = noise[frames % len(noise)].copy()
+            x = (frames * 7) % (width - 120)
+            cv2.circle(frame, (x + 60, height // 2), 60, (200, 200, 200), -1)
+            small = cv2.resize(frame, det_size, interpolation=cv2.INTER_AREA)
+            detector.detect(small, frame.shape)
+            writer.write(frame)
+            frames += 1
+        elapsed = time.perf_counter() - begin
+        writer.release()
+    results.put(frames / elapsed)
+
+def run_setting(setting: str, cameras: int, seconds: float,
+                width: int, height: int) -> Dict[str, object]:
+    ctx = multiprocessing.get_context('spawn')
+    start = ctx.Event()
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_pipeline,
+                    args=(setting, slot, cameras, seconds, width, height,
+                          start, results))
+        for slot in range(cameras)
+    ]
+    for proc in procs:
+        proc.start()
+    # Give every process time to import and build its pipeline
+    time.sleep(2.0 + 0.2 * cameras)
+    start.set()
+    per_camera = [results.get(timeout=seconds + 60) for _ in procs]
+    for proc in procs:
+        proc.join()
+    return {
+        'aggregate_fps': round(sum(per_camera), 1),
+        'per_camera_fps': [round(fps, 1) for fps in per_camera],
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--settings', nargs='+', default=list(SETTINGS),
+                        choices=SETTINGS)
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    results = {
+        'benchmark': 'threads',
+        'cameras': args.cameras,
+        'cpus': len(threads.available_cpus()),
+        'source': f'{args.width}x{args.height} synthetic, XVID encode',
+        'settings': {
+            setting: run_setting(setting, args.cameras, args.seconds,
+                                 args.width, args.height)
+            for setting in args.settings
+        },
+    }
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    print(text)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
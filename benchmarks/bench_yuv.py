@@ -0,0 +1,105 @@
+"""YUV benchmark: per-frame cost of the BGR and luma-plane detection paths.
+
+Simulates a raw YUYV frame as a camera would deliver it and compares:
+  bgr  - driver converts to BGR, detection downscales BGR and converts to gray
+  yuv  - detection downscales the luma plane; no colour conversion at all
+  yuv+color - the yuv path plus a deferred BGR conversion for a frame that
+              is recorded or displayed
+
+Usage:
+    python benchmarks/bench_yuv.py [--width 1920 --height 1080] [--repeat 200]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from watchtower.core.frames import YUVFrame  # noqa: E402
+
+def _time_ms(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Median and p90 wall time of func in milliseconds."""
+    func()  # warm up caches and OpenCV's thread pool
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    samples.sort()
+    return {
+        'median_ms': round(statistics.median(samples), 3),
+        'p90_ms': round(samples[int(len(samples) * 0.9) - 1], 3),
+    }
+
+def run(width: int, height: int, detection_width: int,
+        repeat: int) -> Dict[str, object]:
+    rng = np.random.default_rng(0)
+    raw = rng.integers(0, 256, size=(height, width, 2), dtype=np.uint8)
+    det_size = (detection_width, int(round(height * detection_width / width)))
+
+    def bgr_path():
+        bgr = cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV)
+        small = cv2.resize(bgr, det_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def yuv_path():
+        frame = YUVFrame(raw, width, height, 'YUYV')
+        return cv2.resize(frame.gray, det_size, interpolation=cv2.INTER_AREA)
+
+    def yuv_color_path():
+        frame = YUVFrame(raw, width, height, 'YUYV')
+        cv2.resize(frame.gray, det_size, interpolation=cv2.INTER_AREA)
+        return frame.bgr()
+
+    # Background subtraction on the detection stream, colour vs luma
+    small_bgr = cv2.resize(cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV), det_size)
+    small_gray = cv2.cvtColor(small_bgr, cv2.COLOR_BGR2GRAY)
+    mog_bgr = cv2.createBackgroundSubtractorMOG2(500, 50, True)
+    mog_gray = cv2.createBackgroundSubtractorMOG2(500, 50, True)
+
+    results = {
+        'bgr': _time_ms(bgr_path, repeat),
+        'yuv': _time_ms(yuv_path, repeat),
+        'yuv+color': _time_ms(yuv_color_path, repeat),
+        'mog2_bgr': _time_ms(lambda: mog_bgr.apply(small_bgr), repeat),
+        'mog2_luma': _time_ms(lambda: mog_gray.apply(small_gray), repeat),
+    }
+    bgr_total = results['bgr']['median_ms'] + results['mog2_bgr']['median_ms']
+    yuv_total = results['yuv']['median_ms'] + results['mog2_luma']['median_ms']
+    return {
+        'benchmark': 'yuv',
+        'source': f'{width}x{height} YUYV',
+        'detection_size': list(det_size),
+        'opencv': cv2.__version__,
+        'threads': cv2.getNumThreads(),
+        'stages': results,
+        'saving_per_frame_ms': round(bgr_total - yuv_total, 3),
+        'saving_per_frame_pct': round(100.0 * (bgr_total - yuv_total) / bgr_total, 1),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--detection-width', type=int, default=640)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(args.width, args.height, args.detection_width, args.repeat)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    print(text)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
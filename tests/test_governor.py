@@ -0,0 +1,43 @@
+"""Tests for the quality governor's degrade and restore decisions."""
+
+from types import SimpleNamespace
+
+from watchtower.core.governor import QualityGovernor
+
+class FakeDetector:
+    detection_scale = 1.0
+    face_interval = 1
+
+    def set_shadow_detection(self, enabled):
+        self.shadows = enabled
+
+def make_governor(camera_fps=30.0):
+    preview = SimpleNamespace(max_fps=30.0, set_max_fps=lambda fps: None)
+    governor = QualityGovernor(SimpleNamespace(effective_fps=camera_fps),
+                               FakeDetector(), preview)
+    governor.reset_window(now=0.0)
+    return governor
+
+def run(governor, fps, busy_ratio, seconds, start=0.0):
+    """Feed frames at fps, each keeping the loop busy for busy_ratio of it."""
+    frames = int(seconds * fps)
+    for i in range(1, frames + 1):
+        governor.frame_done(busy_ratio / fps, now=start + i / fps)
+    return start + frames / fps
+
+def test_slow_idle_camera_keeps_full_quality():
+    # Advertised at 30 fps, delivers 15, the loop is mostly waiting
+    governor = make_governor()
+    run(governor, fps=15.0, busy_ratio=0.08, seconds=20)
+    assert governor.level == 0
+
+def test_overloaded_loop_degrades_then_restores():
+    governor = make_governor()
+    now = run(governor, fps=15.0, busy_ratio=0.95, seconds=5)
+    assert governor.level >= 1
+    assert governor.reason == "falling_behind"
+
+    # Still a slow camera, but the loop now has headroom
+    run(governor, fps=15.0, busy_ratio=0.2, seconds=20, start=now)
+    assert governor.level == 0
+    assert governor.reason == "headroom"
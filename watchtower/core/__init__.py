@@ -1,7 +1,21 @@
 """Core package for Webcam Monitor."""
 
-from .camera import Camera
-from .detection import Detector
-from .recording import VideoRecorder
+import importlib
 
-__all__ = ['Camera', 'Detector', 'VideoRecorder'] 
\ No newline at end of file
+# The submodules pull in OpenCV and NumPy, so they are imported on first use
+_LAZY_ATTRS = {
+    'Camera': '.camera',
+    'Detector': '.detection',
+    'VideoRecorder': '.recording',
+}
+
+__all__ = ['Camera', 'Detector', 'VideoRecorder']
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,95 @@
+"""Activity-adaptive capture: lower rate and resolution while a scene is idle."""
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .camera import Camera
+from .detection import DetectionResult
+
+# Transition names returned by ActivityController.update()
+ACTIVITY_IDLE = "activity_idle"
+ACTIVITY_ACTIVE = "activity_active"
+
+class ActivityController:
+    """
+    Drops a camera to a cheaper mode when nothing has moved for a while.
+
+    After ``idle_seconds`` without motion or faces, the camera decodes only
+    every ``idle_frame_skip + 1``th frame and detection runs at
+    ``idle_detection_width``. The first detection switches straight back to
+    the full mode. The two thresholds differ on purpose (hysteresis): waking
+    takes one frame, but going idle again takes another full idle period,
+    so a scene with occasional movement does not flap between modes.
+    """
+
+    def __init__(self, camera: Camera, idle_seconds: float = 60.0,
+                 idle_frame_skip: int = 3, idle_detection_width: int = 320):
+        self.camera = camera
+        self.idle_seconds = idle_seconds
+        self.idle_frame_skip = idle_frame_skip
+        self.idle_detection_width = idle_detection_width
+
+        # Full-quality settings to return to
+        self.active_frame_skip = camera.frame_skip
+        self.active_detection_width = camera.detection_width
+
+        self.idle = False
+        self.last_activity = time.monotonic()
+        self.transitions = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Check if the controller ever goes idle."""
+        return self.idle_seconds > 0
+
+    def update(self, result: DetectionResult,
+               now: Optional[float] = None) -> Optional[str]:
+        """
+        Feed the detection result for the latest frame.
+        Returns ACTIVITY_IDLE or ACTIVITY_ACTIVE when the mode changes.
+        """
+        if now is None:
+            now = time.monotonic()
+        if result.motion_detected or result.faces_detected:
+            self.last_activity = now
+            if self.idle:
+                self._set_idle(False)
+                return ACTIVITY_ACTIVE
+        elif (self.enabled and not self.idle and
+                now - self.last_activity >= self.idle_seconds):
+            self._set_idle(True)
+            return ACTIVITY_IDLE
+        return None
+
+    def reset(self) -> None:
+        """Return to the full mode, e.g. after the camera reconnects."""
+        self.last_activity = time.monotonic()
+        if self.idle:
+            self._set_idle(False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current mode, for status display."""
+        return {
+            "idle": self.idle,
+            "fps": self.camera.effective_fps,
+            "detection_size": self.detection_size,
+            "transitions": self.transitions
+        }
+
+    @property
+    def detection_size(self) -> Tuple[int, int]:
+        """Size detection currently runs at."""
+        return self.camera.detection_size or (self.camera.frame_width,
+                                              self.camera.frame_height)
+
+    def _set_idle(self, idle: bool) -> None:
+        """Apply the idle or the full mode to the camera."""
+        self.idle = idle
+        self.transitions += 1
+        if idle:
+            self.camera.set_frame_skip(self.idle_frame_skip)
+            width = self.active_detection_width or self.camera.frame_width
+            self.camera.set_detection_width(min(width, self.idle_detection_width))
+        else:
+            self.camera.set_frame_skip(self.active_frame_skip)
+            self.camera.set_detection_width(self.active_detection_width)
@@ -1,45 +1,231 @@
 """Camera handling module for webcam access and frame capture."""
 
+import time
 import cv2
 import numpy as np
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Union
+
+from .discovery import CameraDiscovery, backend_candidates, backend_id
+from .frames import Frame, YUVFrame, as_bgr
+from .replay import PACING_REALTIME, ReplaySource, is_replay_source
+
+# Formats the driver hands over compressed, which cannot be read as YUV
+COMPRESSED_FORMATS = ('MJPG', 'H264', 'HEVC')
 
 class Camera:
-    def __init__(self, camera_index: int = 0):
+    def __init__(self, camera_index: Union[int, str] = 0, backend: Optional[str] = None,
+                 width: Optional[int] = None, height: Optional[int] = None,
+                 fps: Optional[float] = None, fourcc: Optional[str] = None,
+                 detection_width: Optional[int] = None,
+                 convert_rgb: bool = True, pacing: str = PACING_REALTIME,
+                 loop: bool = False):
+        # A device index, or a video file or image folder to replay
         self.camera_index = camera_index
+        self.backend = backend
         self.cap = None
         self.frame_width = 0
         self.frame_height = 0
         self.fps = 30.0
+        self.fourcc = ""
+        
+        # Requested capture mode (None keeps the driver default)
+        self.requested_width = width
+        self.requested_height = height
+        self.requested_fps = fps
+        self.requested_fourcc = fourcc.upper() if fourcc else None
+        
+        # Low-resolution detection stream
+        self.detection_width = detection_width
+        self.detection_size: Optional[Tuple[int, int]] = None
+        
+        # With convert_rgb off, frames stay in the driver's YUV format
+        self.convert_rgb = convert_rgb
+        self.yuv_mode = False
+        
+        # Frames grabbed but not decoded between reads (reduced capture rate)
+        self.frame_skip = 0
+        
+        # Replay pacing (PACING_REALTIME or PACING_FAST) and looping
+        self.pacing = pacing
+        self.loop = loop
+
+    @property
+    def is_replay(self) -> bool:
+        """True when playing a file or image folder instead of a device."""
+        return is_replay_source(self.camera_index)
+
+    @property
+    def finished(self) -> bool:
+        """True once a replay has played its last frame."""
+        return isinstance(self.cap, ReplaySource) and self.cap.finished
 
     def open(self) -> bool:
-        """Open the camera with DirectShow backend first, fallback to default."""
+        """Open the camera, trying the cached backend before the others."""
+        if self.is_replay:
+            return self._open_replay()
         try:
-            # Try DirectShow backend first (better for Windows)
-            self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
-            if not self.cap.isOpened():
-                # Fallback to default backend
-                self.cap = cv2.VideoCapture(self.camera_index)
+            discovery = CameraDiscovery()
+            cached = discovery.get(self.camera_index)
+            backends = self._backend_order(cached)
+            
+            for name in backends:
+                self.cap = cv2.VideoCapture(self.camera_index, backend_id(name))
+                if self.cap.isOpened():
+                    self.backend = name
+                    break
+                self.cap.release()
+                self.cap = None
                 
-            if not self.cap.isOpened():
+            if self.cap is None:
+                if cached is not None:
+                    # The device went away since it was probed
+                    discovery.invalidate(self.camera_index)
                 return False
 
-            # Get camera properties
+            self._negotiate_mode()
+            
+            # Get the mode the driver actually agreed to
             self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             fps_from_cam = self.cap.get(cv2.CAP_PROP_FPS)
             self.fps = fps_from_cam if fps_from_cam > 0 else 30.0
+            self.fourcc = _decode_fourcc(self.cap.get(cv2.CAP_PROP_FOURCC))
+            self.detection_size = self._detection_size()
+            self.yuv_mode = not self.convert_rgb and self._disable_rgb_conversion()
             
             return True
         except Exception:
             return False
 
+    def _open_replay(self) -> bool:
+        """Open a file or image folder; capture_fps sets an image folder's rate."""
+        source = ReplaySource(str(self.camera_index), self.pacing,
+                              self.requested_fps, self.loop)
+        if not source.open():
+            print(f"Error opening replay source: {self.camera_index}")
+            return False
+        self.cap = source
+        self.backend = "replay"
+        self.frame_width = source.frame_width
+        self.frame_height = source.frame_height
+        self.fps = source.fps
+        self.fourcc = _decode_fourcc(source.get(cv2.CAP_PROP_FOURCC))
+        self.detection_size = self._detection_size()
+        self.yuv_mode = False
+        return True
+
+    def _negotiate_mode(self) -> None:
+        """Request the configured pixel format, resolution and frame rate."""
+        # The format must be set first: many drivers only offer high
+        # resolutions at full frame rate over USB2 with MJPG
+        if self.requested_fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC,
+                         cv2.VideoWriter_fourcc(*self.requested_fourcc[:4].ljust(4)))
+        if self.requested_width and self.requested_height:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.requested_width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.requested_height)
+        if self.requested_fps:
+            self.cap.set(cv2.CAP_PROP_FPS, self.requested_fps)
+
+    def _disable_rgb_conversion(self) -> bool:
+        """Ask the driver for raw YUV frames. Returns True if it agreed."""
+        if self.fourcc in COMPRESSED_FORMATS:
+            print(f"YUV capture skipped: the camera delivers {self.fourcc}; "
+                  f"set capture_fourcc to YUYV for raw frames")
+            return False
+        return bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+
+    def _fallback_to_bgr(self) -> None:
+        """Go back to driver-side BGR conversion."""
+        self.yuv_mode = False
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+
+    def _detection_size(self) -> Optional[Tuple[int, int]]:
+        """Size of the detection stream, or None to detect on full frames."""
+        if not self.detection_width or self.detection_width >= self.frame_width:
+            return None
+        scale = self.detection_width / self.frame_width
+        # Keep dimensions even so downstream resizes stay exact
+        height = max(2, int(round(self.frame_height * scale / 2)) * 2)
+        return (self.detection_width, height)
+
+    def _backend_order(self, cached: Optional[dict]) -> List[str]:
+        """Backends to try: explicit or cached first, then platform defaults."""
+        preferred = self.backend or (cached or {}).get("backend")
+        candidates = backend_candidates()
+        if preferred is None:
+            return candidates
+        return [preferred] + [name for name in candidates if name != preferred]
+
     def read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
-        """Read a frame from the camera."""
+        """Read a frame from the camera, skipping frame_skip frames first."""
         if not self.cap or not self.cap.isOpened():
             return False, None
+        # grab() keeps the driver queue drained without decoding the frame
+        for _ in range(self.frame_skip):
+            if not self.cap.grab():
+                return False, None
         return self.cap.read()
 
+    def set_frame_skip(self, skip: int) -> None:
+        """Only decode every (skip + 1)th frame; 0 reads every frame."""
+        self.frame_skip = max(0, int(skip))
+
+    def set_detection_width(self, width: Optional[int]) -> None:
+        """Change the detection stream width (None for full frames)."""
+        self.detection_width = width
+        if self.frame_width:
+            self.detection_size = self._detection_size()
+
+    @property
+    def effective_fps(self) -> float:
+        """Rate at which frames are delivered with the current frame_skip."""
+        return self.fps / (self.frame_skip + 1)
+
+    def read_streams(self) -> Tuple[bool, Optional[Frame], Optional[np.ndarray]]:
+        """
+        Read a frame and its low-resolution detection copy.
+        Returns: (success, full_frame, detection_frame). The detection frame
+        is the full frame itself when no detection stream is configured.
+        In YUV mode the full frame is a YUVFrame and the detection frame is
+        taken from its luma plane.
+        """
+        ret, frame = self.read_frame()
+        if not ret or frame is None:
+            return False, None, None
+        if not self.yuv_mode:
+            return True, frame, self.make_detection_frame(frame)
+            
+        layout = YUVFrame.layout(frame, self.frame_width, self.frame_height,
+                                 self.fourcc)
+        if layout is None:
+            # The backend ignored CONVERT_RGB or sent something unexpected
+            self._fallback_to_bgr()
+            return self.read_streams()
+        yuv = YUVFrame(frame, self.frame_width, self.frame_height, layout)
+        return True, yuv, self.make_detection_frame(yuv.gray)
+
+    def publish(self, bus, detection_bus=None) -> bool:
+        """
+        Read a frame and publish it as BGR to a FrameBus, and optionally its
+        detection copy to a second bus. Returns False if no frame was read
+        or the bus dropped it.
+        """
+        ret, frame, detection_frame = self.read_streams()
+        if not ret:
+            return False
+        timestamp = time.time()
+        if detection_bus is not None:
+            detection_bus.publish(detection_frame, timestamp)
+        return bus.publish(as_bgr(frame), timestamp)
+
+    def make_detection_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Downscale a full frame (BGR or grayscale) for the detection stream."""
+        if self.detection_size is None:
+            return frame
+        return cv2.resize(frame, self.detection_size,
+                          interpolation=cv2.INTER_AREA)
+
     def release(self):
         """Release the camera resources."""
         if self.cap:
@@ -47,17 +233,9 @@ class Camera:
             self.cap = None
 
     @staticmethod
-    def list_cameras(max_cameras: int = 5) -> List[int]:
-        """List available cameras."""
-        available_cameras = []
-        for i in range(max_cameras):
-            cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-            if cap.isOpened():
-                ret, _ = cap.read()
-                if ret:
-                    available_cameras.append(i)
-                cap.release()
-        return available_cameras
+    def list_cameras(max_cameras: int = 5, refresh: bool = False) -> List[int]:
+        """List available cameras, using the discovery cache when valid."""
+        return CameraDiscovery(max_cameras=max_cameras).list_cameras(refresh)
 
     def get_properties(self) -> dict:
         """Get camera properties."""
@@ -65,9 +243,27 @@ class Camera:
             'frame_width': self.frame_width,
             'frame_height': self.frame_height,
             'fps': self.fps,
-            'backend': 'DirectShow' if self.cap and self.cap.get(cv2.CAP_PROP_BACKEND) == cv2.CAP_DSHOW else 'Default'
+            'fourcc': self.fourcc,
+            'yuv_mode': self.yuv_mode,
+            'frame_skip': self.frame_skip,
+            'backend': self.backend if self.cap else None,
+            'pacing': self.pacing if self.is_replay else None,
+            'requested': {
+                'frame_width': self.requested_width,
+                'frame_height': self.requested_height,
+                'fps': self.requested_fps,
+                'fourcc': self.requested_fourcc
+            },
+            'detection_size': self.detection_size
         }
 
     def is_opened(self) -> bool:
         """Check if camera is opened."""
-        return self.cap is not None and self.cap.isOpened() 
\ No newline at end of file
+        return self.cap is not None and self.cap.isOpened()
+
+def _decode_fourcc(value: float) -> str:
+    """Turn a CAP_PROP_FOURCC value into its four-character code."""
+    code = int(value)
+    if code <= 0:
+        return ""
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
@@ -1,38 +1,263 @@
 """Detection module for motion and face detection."""
 
+import os
+
 import cv2
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Optional
+
+from . import models
+from .frames import Frame, YUVFrame, as_bgr, as_gray
+from .scene import SceneMonitor, SCENE_LIGHTING
+from .tracking import Track, Tracker
+from ..utils.perf import PerfMonitor
+
+Region = Tuple[int, int, int, int]
+# Polygon as [(x, y), ...] in fractions of the frame width and height
+Polygon = Sequence[Sequence[float]]
+
+# Frames the MOG2 background model learns from
+BACKGROUND_HISTORY = 500
+
+class DetectionResult(NamedTuple):
+    """Detections for one frame, in full-frame coordinates."""
+    motion_detected: bool
+    motion_regions: List[Region]
+    faces_detected: bool
+    face_regions: List[Region]
+    # A confirmed object is in view: what should start or extend a clip
+    triggered: bool = False
+    tracks: Tuple[Track, ...] = ()
+    # SCENE_LIGHTING, SCENE_TAMPERED or SCENE_RESTORED instead of motion
+    scene_event: Optional[str] = None
 
 class Detector:
-    def __init__(self, min_motion_area: int = 5000):
+    def __init__(self, min_motion_area: int = 5000, confirm_frames: int = 1):
         self.min_motion_area = min_motion_area
         self.backSub = cv2.createBackgroundSubtractorMOG2(
-            history=500,
+            history=BACKGROUND_HISTORY,
             varThreshold=50,
             detectShadows=True
         )
         
-        # Load face detection model
+        # Frame size (h, w) the background model was built for
+        self.model_size: Optional[Tuple[int, int]] = None
+        
+        # Detection zones, and their masks per detection frame size:
+        # (x, y, w, h) crop of the ROI and the mask over that crop
+        self.roi_polygons: List[Polygon] = []
+        self.exclusion_polygons: List[Polygon] = []
+        self._zone_masks: Dict[Tuple[int, int], Tuple[Region, Optional[np.ndarray]]] = {}
+        
+        # Warm start: the model is primed from a saved background (or the
+        # first frame), then the first frames only train it at a fast
+        # learning rate and report no motion, so starting is never a clip
+        self.saved_background: Optional[np.ndarray] = None
+        self.warmup_frames = 15
+        self.warmup_learning_rate = 0.2
+        self.frames_to_warm = self.warmup_frames
+        
+        # Whole-scene changes relearn the background instead of triggering:
+        # a brightness jump or tampering seen by the scene monitor, or most
+        # of the watched area turning foreground at once
+        self.scene = SceneMonitor()
+        self.global_foreground_ratio = 0.6
+        self.foreground_ratio = 0.0
+        
+        # Areas of the last frame's foreground blobs in detection pixels,
+        # kept for tuning min_motion_area offline
+        self.contour_areas: List[float] = []
+        
+        # Cost knobs: extra downscale of the detection frame, and running
+        # the face cascade only every face_interval frames
+        self.detection_scale = 1.0
+        self.face_interval = 1
+        self.frames_since_faces = 0
+        
+        # Motion and faces are tracked in full-frame coordinates. Only a
+        # track seen on confirm_frames detector runs triggers recording,
+        # and a tracked face lets the cascade run less often.
+        self.motion_tracker = Tracker(confirm_hits=confirm_frames)
+        self.face_tracker = Tracker(confirm_hits=confirm_frames, max_misses=2)
+        self.tracked_face_interval = 5
+        
+        # Stage timings; the pipeline shares its monitor and enables it
+        self.perf = PerfMonitor()
+        
+        # Face detection model, loaded once per process
+        self.face_cascade = models.get_cascade(models.FACE_CASCADE)
+
+    def _resize_background(self, frame: np.ndarray) -> None:
+        """
+        Rebuild the background model for a new frame size, seeded with the
+        old background scaled to fit, so a change of detection resolution
+        does not look like motion while the model relearns.
+        """
+        background = self.backSub.getBackgroundImage()
+        shadows = self.backSub.getDetectShadows()
+        self.backSub = cv2.createBackgroundSubtractorMOG2(
+            history=BACKGROUND_HISTORY,
+            varThreshold=50,
+            detectShadows=shadows
+        )
+        if background is None:
+            return
+        self.backSub.apply(_fit_background(background, frame), learningRate=1.0)
+
+    def load_background(self, path: str) -> bool:
+        """
+        Prime the next start from a background saved by save_background().
+        Returns False if there is none.
+        """
+        if not os.path.exists(path):
+            return False
+        background = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if background is None:
+            print(f"Error loading background model: {path}")
+            return False
+        self.saved_background = background
+        return True
+
+    def save_background(self, path: str) -> bool:
+        """Save the current background image for a warm restart."""
+        if self.model_size is None or self.frames_to_warm > 0:
+            return False  # Nothing learned yet
+        background = self.backSub.getBackgroundImage()
+        if background is None:
+            return False
         try:
-            self.face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            if self.face_cascade.empty():
-                self.face_cascade = None
-        except Exception:
-            self.face_cascade = None
+            # Write a temporary file first so a crash never leaves half an image
+            root, ext = os.path.splitext(path)
+            tmp_path = f"{root}.tmp{ext}"
+            if not cv2.imwrite(tmp_path, background):
+                raise OSError("could not write image")
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"Error saving background model: {e}")
+            return False
+
+    def set_zones(self, roi_polygons: Sequence[Polygon] = (),
+                  exclusion_polygons: Sequence[Polygon] = ()) -> None:
+        """
+        Limit detection to the ROI polygons (the whole frame if none) minus
+        the exclusion polygons. Coordinates are fractions of the frame size.
+        """
+        self.roi_polygons = [p for p in roi_polygons if len(p) >= 3]
+        self.exclusion_polygons = [p for p in exclusion_polygons if len(p) >= 3]
+        self._zone_masks = {}
 
-    def detect_motion(self, frame: np.ndarray) -> Tuple[bool, List[Tuple[int, int, int, int]]]:
+    def zone_mask(self, size: Tuple[int, int]) -> Tuple[Region, Optional[np.ndarray]]:
+        """
+        The ROI crop (x, y, w, h) for a (height, width) detection frame and
+        the mask to apply inside it, or None if every pixel counts.
+        Rasterized once per size.
+        """
+        cached = self._zone_masks.get(size)
+        if cached is not None:
+            return cached
+        height, width = size
+        scale = np.array([width, height], np.float32)
+        
+        def scaled(polygons):
+            return [np.rint(np.asarray(p, np.float32) * scale).astype(np.int32)
+                    for p in polygons]
+            
+        mask = np.zeros(size, np.uint8)
+        if self.roi_polygons:
+            roi = scaled(self.roi_polygons)
+            cv2.fillPoly(mask, roi, 255)
+        else:
+            mask[:] = 255
+        if self.exclusion_polygons:
+            cv2.fillPoly(mask, scaled(self.exclusion_polygons), 0)
+            
+        x, y, w, h = cv2.boundingRect(mask)
+        if w == 0 or h == 0:
+            # Everything excluded: keep a single pixel that never moves
+            x, y, w, h = 0, 0, 1, 1
+        crop = mask[y:y + h, x:x + w]
+        cached = ((x, y, w, h), None if crop.all() else np.ascontiguousarray(crop))
+        self._zone_masks[size] = cached
+        return cached
+
+    def warm_up(self) -> None:
+        """Relearn the scene quickly without triggering, e.g. after a gap."""
+        self.frames_to_warm = self.warmup_frames
+
+    def _relearn(self) -> None:
+        """Adapt the background to a changed scene without triggering."""
+        self.warm_up()
+        self.motion_tracker.reset()
+
+    def reset_tracks(self) -> None:
+        """Forget tracked objects, e.g. after the camera was away."""
+        self.motion_tracker.reset()
+        self.face_tracker.reset()
+        self.frames_since_faces = self.face_interval
+
+    def _faces_in_zones(self, faces: List[Region],
+                        size: Tuple[int, int]) -> List[Region]:
+        """Keep the faces whose centre lies in a detection zone."""
+        if not faces or not (self.roi_polygons or self.exclusion_polygons):
+            return faces
+        (crop_x, crop_y, crop_w, crop_h), mask = self.zone_mask(size)
+        kept = []
+        for x, y, w, h in faces:
+            cx = x + w // 2 - crop_x
+            cy = y + h // 2 - crop_y
+            if (0 <= cx < crop_w and 0 <= cy < crop_h and
+                    (mask is None or mask[cy, cx])):
+                kept.append((x, y, w, h))
+        return kept
+
+    def set_shadow_detection(self, enabled: bool) -> None:
+        """Turn MOG2 shadow detection on or off (off is cheaper)."""
+        self.backSub.setDetectShadows(enabled)
+
+    def detect_motion(self, frame: np.ndarray,
+                      min_area: Optional[float] = None) -> Tuple[bool, List[Tuple[int, int, int, int]]]:
         """
         Detect motion in frame.
+        min_area overrides min_motion_area, e.g. for a downscaled frame.
         Returns: (motion_detected, list of motion regions as (x, y, w, h))
         """
         motion_regions = []
+        if min_area is None:
+            min_area = self.min_motion_area
+        
+        # Pixels outside the ROI's bounding box are never looked at
+        (crop_x, crop_y, crop_w, crop_h), mask = self.zone_mask(frame.shape[:2])
+        if (crop_w, crop_h) != (frame.shape[1], frame.shape[0]):
+            frame = frame[crop_y:crop_y + crop_h, crop_x:crop_x + crop_w]
+        
+        # A new detection size needs a background model of that size
+        if self.model_size is None:
+            seed = self.saved_background
+            self.backSub.apply(_fit_background(seed if seed is not None else frame,
+                                               frame), learningRate=1.0)
+            self.saved_background = None
+        elif frame.shape[:2] != self.model_size:
+            self._resize_background(frame)
+        self.model_size = frame.shape[:2]
+        
+        # Warming up: adapt quickly to the live scene without triggering
+        if self.frames_to_warm > 0:
+            self.frames_to_warm -= 1
+            self.backSub.apply(frame, learningRate=self.warmup_learning_rate)
+            self.foreground_ratio = 0.0
+            self.contour_areas = []
+            return False, []
         
         # Apply background subtraction
         fgMask = self.backSub.apply(frame)
         
+        # Drop foreground in excluded areas
+        if mask is not None:
+            cv2.bitwise_and(fgMask, mask, dst=fgMask)
+        watched = cv2.countNonZero(mask) if mask is not None else fgMask.size
+        self.foreground_ratio = cv2.countNonZero(fgMask) / max(watched, 1)
+        
         # Clean up the mask
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
         fgMask = cv2.morphologyEx(fgMask, cv2.MORPH_OPEN, kernel, iterations=2)
@@ -46,11 +271,12 @@ class Detector:
         
         # Process contours
         motion_detected = False
-        for cnt in contours:
-            if cv2.contourArea(cnt) > self.min_motion_area:
+        self.contour_areas = [cv2.contourArea(cnt) for cnt in contours]
+        for cnt, area in zip(contours, self.contour_areas):
+            if area > min_area:
                 motion_detected = True
                 x, y, w, h = cv2.boundingRect(cnt)
-                motion_regions.append((x, y, w, h))
+                motion_regions.append((x + crop_x, y + crop_y, w, h))
                 
         return motion_detected, motion_regions
 
@@ -62,8 +288,8 @@ class Detector:
         if self.face_cascade is None:
             return False, []
             
-        # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Convert to grayscale (a no-op for luma frames)
+        gray = as_gray(frame)
         
         # Detect faces
         faces = self.face_cascade.detectMultiScale(
@@ -74,25 +300,99 @@ class Detector:
         
         return len(faces) > 0, list(faces)
 
-    def process_frame(self, frame: np.ndarray, debug: bool = False) -> Tuple[np.ndarray, bool, bool]:
+    def detect(self, detection_frame: np.ndarray,
+               frame_shape: Optional[Tuple[int, ...]] = None) -> DetectionResult:
         """
-        Process a frame for both motion and face detection.
-        Returns: (processed_frame, motion_detected, faces_detected)
+        Run motion and face detection without drawing anything.
+        detection_frame may be a downscaled (BGR or grayscale) copy of a
+        frame of frame_shape; regions are returned in frame_shape coordinates.
         """
-        frame_out = frame.copy()
+        if frame_shape is None:
+            frame_shape = detection_frame.shape
+            
+        # Optional extra downscale, e.g. when the machine is overloaded
+        if self.detection_scale < 1.0:
+            detection_frame = cv2.resize(
+                detection_frame, None, fx=self.detection_scale,
+                fy=self.detection_scale, interpolation=cv2.INTER_AREA)
+            
+        # Scale between detection and output coordinates
+        scale_x = frame_shape[1] / detection_frame.shape[1]
+        scale_y = frame_shape[0] / detection_frame.shape[0]
         
-        # Detect motion
-        motion_detected, motion_regions = self.detect_motion(frame)
+        # Lighting changes and tampering are checked on a thumbnail first
+        perf = self.perf
+        t = perf.start()
+        scene_event = self.scene.check(detection_frame)
+        if scene_event is not None:
+            self._relearn()
+        t = perf.lap("scene", t)
+            
+        # Detect motion, keeping min_motion_area in full-frame pixels
+        motion_detected, motion_regions = self.detect_motion(
+            detection_frame, self.min_motion_area / (scale_x * scale_y))
+        t = perf.lap("motion", t)
+        if motion_detected and self.foreground_ratio > self.global_foreground_ratio:
+            # Too much of the frame at once to be an object
+            scene_event = scene_event or SCENE_LIGHTING
+            motion_detected, motion_regions = False, []
+            self._relearn()
         
-        # Detect faces
-        faces_detected, face_regions = self.detect_faces(frame)
+        if scale_x != 1.0 or scale_y != 1.0:
+            motion_regions = _scale_regions(motion_regions, scale_x, scale_y)
+        motion_tracks = self.motion_tracker.update(motion_regions)
+        t = perf.lap("tracking", t)
+        
+        # Detect faces every face_interval frames, or less often while a
+        # confirmed face is tracked; in between, faces are carried forward
+        interval = self.face_interval
+        if self.face_tracker.has_confirmed:
+            interval = max(interval, self.tracked_face_interval)
+        self.frames_since_faces += 1
+        if self.frames_since_faces >= interval:
+            self.frames_since_faces = 0
+            _, face_regions = self.detect_faces(detection_frame)
+            face_regions = self._faces_in_zones(face_regions,
+                                                detection_frame.shape[:2])
+            if scale_x != 1.0 or scale_y != 1.0:
+                face_regions = _scale_regions(face_regions, scale_x, scale_y)
+            face_tracks = self.face_tracker.update(face_regions)
+            perf.lap("faces", t)
+        else:
+            face_tracks = self.face_tracker.predict()
+        face_regions = [track.region for track in face_tracks]
+        
+        triggered = (any(t.confirmed and not t.misses for t in motion_tracks)
+                     or any(t.confirmed for t in face_tracks))
+        return DetectionResult(motion_detected, motion_regions,
+                               bool(face_regions), face_regions, triggered,
+                               tuple(motion_tracks + face_tracks), scene_event)
+
+    def detect_next(self, subscriber, frame_shape: Optional[Tuple[int, ...]] = None,
+                    timeout: Optional[float] = 1.0
+                    ) -> Optional[Tuple[float, DetectionResult]]:
+        """
+        Detect on the next frame of a FrameBus subscriber, reading the
+        shared slot in place. Returns (capture time, result), or None if no
+        frame arrived within timeout or the bus closed.
+        """
+        slot = subscriber.get(timeout)
+        if slot is None:
+            return None
+        with slot:
+            return slot.timestamp, self.detect(slot.frame, frame_shape)
+
+    def draw(self, frame: np.ndarray, result: DetectionResult,
+             debug: bool = False) -> np.ndarray:
+        """Draw detection overlays on a copy of a BGR frame."""
+        frame_out = frame.copy()
         
         # Draw motion regions
-        for x, y, w, h in motion_regions:
+        for x, y, w, h in result.motion_regions:
             cv2.rectangle(frame_out, (x, y), (x + w, y + h), (0, 255, 0), 2)
             
         # Draw face regions
-        for x, y, w, h in face_regions:
+        for x, y, w, h in result.face_regions:
             cv2.rectangle(frame_out, (x, y), (x + w, y + h), (255, 0, 0), 2)
             # Label the face
             label_y = y - 10 if y - 10 > 10 else y + h + 20
@@ -100,18 +400,56 @@ class Detector:
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
             
         # Add detection status
-        if motion_detected or faces_detected:
+        if result.motion_detected or result.faces_detected:
             cv2.putText(frame_out, "Motion/Human Detected",
                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             
         # Add debug info if requested
         if debug:
             height = frame_out.shape[0]
-            cv2.putText(frame_out, f"Motion: {motion_detected}",
+            cv2.putText(frame_out, f"Motion: {result.motion_detected}",
                        (10, height - 50), cv2.FONT_HERSHEY_SIMPLEX,
                        0.6, (255, 255, 0), 2)
-            cv2.putText(frame_out, f"Faces: {faces_detected}",
+            cv2.putText(frame_out, f"Faces: {result.faces_detected}",
                        (10, height - 30), cv2.FONT_HERSHEY_SIMPLEX,
                        0.6, (255, 255, 0), 2)
+            for track in result.tracks:
+                x, y = track.region[:2]
+                label = f"#{track.id}" if track.confirmed else f"#{track.id}?"
+                cv2.putText(frame_out, label, (x + 4, y + 18),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
             
-        return frame_out, motion_detected, faces_detected 
\ No newline at end of file
+        return frame_out
+
+    def process_frame(self, frame: Frame, debug: bool = False,
+                      detection_frame: Optional[np.ndarray] = None) -> Tuple[np.ndarray, bool, bool]:
+        """
+        Process a frame for both motion and face detection.
+        If detection_frame is given (a downscaled copy of frame), detection
+        runs on it and the regions are drawn scaled back onto frame.
+        Returns: (processed_frame, motion_detected, faces_detected)
+        """
+        if detection_frame is None:
+            detection_frame = frame.gray if isinstance(frame, YUVFrame) else frame
+        result = self.detect(detection_frame, frame.shape)
+        frame_out = self.draw(as_bgr(frame), result, debug)
+        return frame_out, result.motion_detected, result.faces_detected
+
+def _fit_background(background: np.ndarray, frame: np.ndarray) -> np.ndarray:
+    """Scale and convert a background image to match a frame."""
+    if background.shape[:2] != frame.shape[:2]:
+        background = cv2.resize(background, (frame.shape[1], frame.shape[0]),
+                                interpolation=cv2.INTER_AREA)
+    if background.ndim != frame.ndim:
+        background = (cv2.cvtColor(background, cv2.COLOR_BGR2GRAY)
+                      if frame.ndim == 2 else
+                      cv2.cvtColor(background, cv2.COLOR_GRAY2BGR))
+    return background
+
+def _scale_regions(regions: List[Tuple[int, int, int, int]],
+                   scale_x: float, scale_y: float) -> List[Tuple[int, int, int, int]]:
+    """Map (x, y, w, h) regions from detection to full-frame coordinates."""
+    return [
+        (int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y))
+        for x, y, w, h in regions
+    ]
@@ -0,0 +1,217 @@
+"""Camera discovery with parallel probing and an on-disk capability cache."""
+
+import json
+import platform
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CACHE_VERSION = 1
+
+# Modes tried on each device after it opens; only those read back are kept
+PROBE_RESOLUTIONS: List[Tuple[int, int]] = [(640, 480), (1280, 720), (1920, 1080)]
+
+def backend_candidates() -> List[str]:
+    """Capture backends to try for this platform, in order of preference."""
+    system = platform.system()
+    if system == "Windows":
+        return ["DSHOW", "MSMF", "ANY"]
+    if system == "Darwin":
+        return ["AVFOUNDATION", "ANY"]
+    return ["V4L2", "ANY"]
+
+def backend_id(name: str) -> int:
+    """Map a backend name such as 'DSHOW' to its cv2.CAP_* constant."""
+    import cv2
+    return getattr(cv2, f"CAP_{name}", cv2.CAP_ANY)
+
+def device_signature() -> Optional[List[str]]:
+    """
+    Describe the set of attached video devices.
+    Returns None where devices cannot be listed cheaply, in which case the
+    cache falls back to expiring by age.
+    """
+    if platform.system() != "Linux":
+        return None
+    signature = []
+    for node in sorted(Path("/dev").glob("video*")):
+        try:
+            # Device nodes are recreated on hotplug, so ctime changes too
+            signature.append(f"{node.name}:{int(node.stat().st_ctime)}")
+        except OSError:
+            continue
+    return signature
+
+def probe_device(index: int, backends: Optional[List[str]] = None,
+                 resolutions: Optional[List[Tuple[int, int]]] = None
+                 ) -> Optional[Dict[str, Any]]:
+    """
+    Open a device and record what it supports.
+    Returns None if no backend can read a frame from it.
+    """
+    import cv2
+
+    for name in backends or backend_candidates():
+        cap = cv2.VideoCapture(index, backend_id(name))
+        try:
+            if not cap.isOpened():
+                continue
+            ret, _ = cap.read()
+            if not ret:
+                continue
+
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            info: Dict[str, Any] = {
+                "backend": name,
+                "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                "fps": fps if fps > 0 else 30.0,
+                "resolutions": [],
+            }
+
+            # Keep the modes the driver actually accepts
+            for width, height in resolutions or PROBE_RESOLUTIONS:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                if (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == width and
+                        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == height):
+                    info["resolutions"].append([width, height])
+            default_mode = [info["width"], info["height"]]
+            if default_mode not in info["resolutions"]:
+                info["resolutions"].append(default_mode)
+            return info
+        finally:
+            cap.release()
+    return None
+
+class CameraDiscovery:
+    """
+    Finds cameras by probing device indices concurrently.
+
+    Results are cached in a small JSON file so the next lookup is instant.
+    The cache is dropped when the attached devices change (hotplug), when it
+    is older than ``max_age`` seconds, or when a cached device fails to open.
+    """
+
+    def __init__(self, cache_file: str = "~/.watchtower_cameras.json",
+                 max_cameras: int = 5, timeout: float = 3.0,
+                 max_age: float = 24 * 3600):
+        self.cache_file = Path(cache_file).expanduser()
+        self.max_cameras = max_cameras
+        self.timeout = timeout
+        self.max_age = max_age
+
+    def cached(self) -> Optional[Dict[int, Dict[str, Any]]]:
+        """Get cached device capabilities, or None if the cache is stale."""
+        data = self._read_cache()
+        if data is None:
+            return None
+        if data.get("signature") != device_signature():
+            return None
+        if time.time() - data.get("updated", 0) > self.max_age:
+            return None
+        return {int(k): v for k, v in data.get("devices", {}).items()}
+
+    def get(self, index: int) -> Optional[Dict[str, Any]]:
+        """Get cached capabilities for one device."""
+        devices = self.cached()
+        if devices is None:
+            return None
+        return devices.get(index)
+
+    def probe(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Probe all device indices in parallel and refresh the cache.
+        Devices that do not answer within the timeout are left out.
+        """
+        results: Dict[int, Optional[Dict[str, Any]]] = {}
+
+        def _probe(index: int) -> None:
+            try:
+                results[index] = probe_device(index)
+            except Exception:
+                results[index] = None
+
+        # Daemon threads so a hung driver cannot block interpreter exit
+        threads = [
+            threading.Thread(target=_probe, args=(i,),
+                             name=f"watchtower-probe-{i}", daemon=True)
+            for i in range(self.max_cameras)
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + self.timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        devices = {
+            index: info for index, info in sorted(results.items())
+            if info is not None
+        }
+        self._write_cache(devices)
+        return devices
+
+    def probe_async(self, callback: Callable[[Dict[int, Dict[str, Any]]], None]
+                    ) -> threading.Thread:
+        """
+        Probe on a background thread and pass the result to callback.
+        The callback runs on that thread, so GUI code must hand it over to
+        the Tk thread itself.
+        """
+        thread = threading.Thread(target=lambda: callback(self.probe()),
+                                  name="watchtower-discovery", daemon=True)
+        thread.start()
+        return thread
+
+    def list_cameras(self, refresh: bool = False) -> List[int]:
+        """List available camera indices, probing only if the cache is stale."""
+        devices = None if refresh else self.cached()
+        if devices is None:
+            devices = self.probe()
+        return sorted(devices)
+
+    def invalidate(self, index: Optional[int] = None) -> None:
+        """Forget one device, or the whole cache if index is None."""
+        if index is None:
+            try:
+                self.cache_file.unlink()
+            except OSError:
+                pass
+            return
+
+        data = self._read_cache()
+        if data is not None and str(index) in data.get("devices", {}):
+            del data["devices"][str(index)]
+            self._write_json(data)
+
+    def _read_cache(self) -> Optional[Dict[str, Any]]:
+        """Read the cache file, ignoring missing or malformed files."""
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return None
+        return data
+
+    def _write_cache(self, devices: Dict[int, Dict[str, Any]]) -> None:
+        """Replace the cache with freshly probed devices."""
+        self._write_json({
+            "version": CACHE_VERSION,
+            "signature": device_signature(),
+            "updated": time.time(),
+            "devices": {str(k): v for k, v in devices.items()},
+        })
+
+    def _write_json(self, data: Dict[str, Any]) -> None:
+        """Write the cache atomically so readers never see a partial file."""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(data, f, indent=4)
+            tmp_file.replace(self.cache_file)
+        except OSError as e:
+            print(f"Error saving camera cache: {e}")
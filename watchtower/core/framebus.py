@@ -0,0 +1,347 @@
+"""Shared-memory frame bus: one camera publishing to consumers in other processes.
+
+A bus is a ring of fixed-size frame slots in one shared memory block.
+The camera process publishes frames; the detector, recorder and GUI
+subscribe, possibly from other processes, and get NumPy views straight
+into the slot, so a 6 MB frame is never pickled or copied::
+
+    bus = FrameBus.create("cam0", (1080, 1920, 3),
+                          consumers={"recorder": BLOCK, "gui": LATEST_ONLY})
+    small = FrameBus.create("cam0-det", (360, 640, 3),
+                            consumers={"detector": LATEST_ONLY})
+    camera.publish(bus, small)                # capture process
+
+    reader = FrameBus.attach("cam0-det").subscribe("detector")
+    detector.detect_next(reader, (1080, 1920, 3))   # detection process
+
+    reader = FrameBus.attach("cam0").subscribe("recorder")
+    recorder.record_next(reader, triggered)   # encoding process
+
+Within one process, Pipeline hands the same arrays to the detector and
+recorder directly; a bus would only add a copy there. The supervisor's
+workers publish their preview to a bus for the GUI.
+
+There is one writer per bus. Cross-process coordination is lock-free: the
+writer never reuses a slot a consumer holds, and a BLOCK consumer also
+holds back every slot it has not consumed yet. Waiting is done by polling,
+since shared memory offers no cross-process condition variable.
+"""
+
+import json
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Backpressure policies
+BLOCK = "block"              # every frame, in order; the writer waits for it
+DROP_OLDEST = "drop_oldest"  # in order, skipping frames the ring overwrote
+LATEST_ONLY = "latest_only"  # always the newest frame
+
+POLICIES = (BLOCK, DROP_OLDEST, LATEST_ONLY)
+
+_META_SIZE = 4096
+_ALIGN = 64
+_POLL_INTERVAL = 0.0005
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    """
+    Open an existing block without letting this process's resource tracker
+    delete it on exit; only the creator unlinks it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with the tracker. Child
+        # processes share the creator's tracker, which must keep it; a
+        # tracker of our own would unlink the block when we exit.
+        from multiprocessing import resource_tracker
+        shared = getattr(resource_tracker._resource_tracker, "_fd", None) is not None
+        shm = shared_memory.SharedMemory(name=name)
+        if not shared:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class FrameBus:
+    """
+    A ring of ``slots`` frames of one shape and dtype.
+
+    Layout of the shared block: JSON metadata (shape, dtype, slots and the
+    consumers with their policies), an int64 control area, the slot
+    timestamps, then the frames. Control area: published sequence number,
+    closed flag, the sequence number in each slot (0 while being written),
+    and per consumer the sequence it holds and the last one it released
+    (-1 while no process has subscribed as that consumer).
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        raw_meta = bytes(shm.buf[:_META_SIZE]).rstrip(b"\0")
+        meta = json.loads(raw_meta.decode("utf-8"))
+        self.name: str = meta["name"]
+        self.shape: Tuple[int, ...] = tuple(meta["shape"])
+        self.dtype = np.dtype(meta["dtype"])
+        self.slots: int = meta["slots"]
+        self.consumers: Dict[str, str] = meta["consumers"]
+        self.consumer_ids = {name: i for i, name in enumerate(self.consumers)}
+        self._map_views()
+
+    @classmethod
+    def create(cls, name: str, shape: Tuple[int, ...], dtype: Any = np.uint8,
+               slots: int = 8, consumers: Optional[Dict[str, str]] = None
+               ) -> "FrameBus":
+        """Create a bus; the consumers and their policies are fixed here."""
+        consumers = consumers or {}
+        for consumer, policy in consumers.items():
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown policy for {consumer!r}: {policy!r}")
+        # Every consumer may hold one slot, and the writer needs a free one
+        slots = max(slots, len(consumers) + 2)
+        meta = json.dumps({
+            "name": name,
+            "shape": list(shape),
+            "dtype": np.dtype(dtype).str,
+            "slots": slots,
+            "consumers": consumers,
+        }).encode("utf-8")
+        if len(meta) > _META_SIZE:
+            raise ValueError("Too many consumers for the bus header")
+
+        frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        size = (_META_SIZE + cls._control_bytes(slots, len(consumers))
+                + _aligned(8 * slots) + slots * _aligned(frame_bytes))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:len(meta)] = meta
+        bus = cls(shm, owner=True)
+        # No consumer is attached yet, so none can hold the writer back
+        bus.released[:] = -1
+        return bus
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameBus":
+        """Open a bus created by another process."""
+        return cls(_attach_shm(name), owner=False)
+
+    @staticmethod
+    def unlink(name: str) -> None:
+        """Remove a bus whose writer exited without closing it."""
+        try:
+            shm = _attach_shm(name)
+        except FileNotFoundError:
+            return
+        # Mark it closed so readers still attached stop waiting
+        np.ndarray((2,), np.int64, shm.buf, _META_SIZE)[1] = 1
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _control_bytes(slots: int, consumers: int) -> int:
+        return _aligned(8 * (2 + slots + 2 * consumers))
+
+    def _map_views(self) -> None:
+        """Create NumPy views on the control area, timestamps and frames."""
+        n_consumers = len(self.consumers)
+        buf = self.shm.buf
+        offset = _META_SIZE
+        control = np.ndarray((2 + self.slots + 2 * n_consumers,), np.int64,
+                             buf, offset)
+        self._control = control
+        self.slot_seq = control[2:2 + self.slots]
+        consumer_area = control[2 + self.slots:].reshape(n_consumers, 2)
+        self.held = consumer_area[:, 0]
+        self.released = consumer_area[:, 1]
+        offset += self._control_bytes(self.slots, n_consumers)
+
+        self.slot_time = np.ndarray((self.slots,), np.float64, buf, offset)
+        offset += _aligned(8 * self.slots)
+
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        stride = _aligned(frame_bytes)
+        self.frames = [
+            np.ndarray(self.shape, self.dtype, buf, offset + i * stride)
+            for i in range(self.slots)
+        ]
+
+    @property
+    def write_seq(self) -> int:
+        """Sequence number of the newest frame (0 before the first)."""
+        return int(self._control[0])
+
+    @property
+    def closed(self) -> bool:
+        """Check if the writer has closed the bus."""
+        return bool(self._control[1])
+
+    def publish(self, frame: np.ndarray, timestamp: Optional[float] = None,
+                timeout: float = 1.0) -> bool:
+        """
+        Copy a frame into the ring. Waits up to timeout for a BLOCK consumer
+        to free a slot; returns False if the frame had to be dropped.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        seq = self.write_seq + 1
+        deadline = time.monotonic() + timeout
+        while True:
+            index = self._claim_slot()
+            if index is not None:
+                break
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(_POLL_INTERVAL)
+
+        np.copyto(self.frames[index], frame.reshape(self.shape), casting="no")
+        self.slot_time[index] = timestamp
+        self.slot_seq[index] = seq
+        self._control[0] = seq
+        return True
+
+    def _claim_slot(self) -> Optional[int]:
+        """
+        Pick the oldest slot nobody needs and mark it as being written.
+        The writer marks the slot (seq 0) and then re-checks the holds,
+        while a consumer sets its hold and then re-checks the slot, so one
+        of the two always sees the other.
+        """
+        block = [self.consumer_ids[name] for name, policy in self.consumers.items()
+                 if policy == BLOCK]
+        for index in np.argsort(self.slot_seq, kind="stable"):
+            seq = int(self.slot_seq[index])
+            if seq and any(0 <= self.released[c] < seq for c in block):
+                continue
+            if seq and (self.held == seq).any():
+                continue
+            self.slot_seq[index] = 0
+            if seq and (self.held == seq).any():
+                self.slot_seq[index] = seq
+                continue
+            return int(index)
+        return None
+
+    def subscribe(self, consumer: str) -> "Subscriber":
+        """Get the reader for one of the consumers named at creation."""
+        if consumer not in self.consumer_ids:
+            raise KeyError(f"Bus {self.name!r} has no consumer {consumer!r}")
+        return Subscriber(self, consumer)
+
+    def close(self) -> None:
+        """Detach; the creator also marks the bus closed and unlinks it."""
+        if self.owner:
+            self._control[1] = 1
+        # Views must go before the block can be closed
+        self.frames = []
+        self.slot_seq = self.held = self.released = self.slot_time = None
+        self._control = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+class FrameSlot:
+    """A frame held by a subscriber until release() (or the with block ends)."""
+
+    def __init__(self, subscriber: "Subscriber", seq: int, index: int):
+        self.subscriber = subscriber
+        self.seq = seq
+        self.frame: Optional[np.ndarray] = subscriber.bus.frames[index]
+        self.timestamp = float(subscriber.bus.slot_time[index])
+
+    def release(self) -> None:
+        """Give the slot back to the writer; the frame view becomes invalid."""
+        if self.frame is not None:
+            self.frame = None
+            self.subscriber._release(self.seq)
+
+    def __enter__(self) -> "FrameSlot":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+class Subscriber:
+    """One consumer's reader, applying its backpressure policy."""
+
+    def __init__(self, bus: FrameBus, consumer: str):
+        self.bus = bus
+        self.consumer = consumer
+        self.policy = bus.consumers[consumer]
+        self.id = bus.consumer_ids[consumer]
+        self.received = 0
+        self.dropped = 0
+        
+        # Pick up where this consumer left off, or start from now
+        if bus.released[self.id] < 0:
+            bus.released[self.id] = bus.write_seq
+        self.last_seq = int(bus.released[self.id])
+
+    def get(self, timeout: Optional[float] = None) -> Optional[FrameSlot]:
+        """
+        Wait for the next frame under this consumer's policy and hold it.
+        Returns None on timeout or once the bus is closed and drained.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            slot = self._try_get()
+            if slot is not None:
+                return slot
+            if self.bus.closed or (deadline is not None and
+                                   time.monotonic() >= deadline):
+                return None
+            time.sleep(_POLL_INTERVAL)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Frames received and dropped, and how far behind the writer we are."""
+        return {
+            "policy": self.policy,
+            "received": self.received,
+            "dropped": self.dropped,
+            "lag": self.bus.write_seq - self.last_seq
+        }
+
+    def close(self) -> None:
+        """Unsubscribe, so the writer stops waiting for this consumer."""
+        self.bus.held[self.id] = 0
+        self.bus.released[self.id] = -1
+
+    def _try_get(self) -> Optional[FrameSlot]:
+        bus = self.bus
+        newest = bus.write_seq
+        if newest <= self.last_seq:
+            return None
+        target = newest if self.policy == LATEST_ONLY else self.last_seq + 1
+
+        for _ in range(bus.slots):
+            matches = np.flatnonzero(bus.slot_seq == target)
+            if len(matches):
+                index = int(matches[0])
+                bus.held[self.id] = target
+                if bus.slot_seq[index] == target:
+                    break
+                bus.held[self.id] = 0
+                continue
+            # Overwritten before we got to it: move to the oldest frame left
+            available = bus.slot_seq[bus.slot_seq > target]
+            if not len(available):
+                return None
+            target = int(available.min())
+        else:
+            return None
+
+        self.dropped += target - self.last_seq - 1
+        self.received += 1
+        self.last_seq = target
+        return FrameSlot(self, target, index)
+
+    def _release(self, seq: int) -> None:
+        self.bus.released[self.id] = max(int(self.bus.released[self.id]), seq)
+        self.bus.held[self.id] = 0
@@ -0,0 +1,100 @@
+"""Frame containers for the capture pipeline."""
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple, Union
+
+# Packed 4:2:2 layouts: (BGR conversion code, channel holding Y)
+_PACKED_422 = {
+    'YUYV': (cv2.COLOR_YUV2BGR_YUYV, 0),
+    'YUY2': (cv2.COLOR_YUV2BGR_YUY2, 0),
+    'UYVY': (cv2.COLOR_YUV2BGR_UYVY, 1),
+}
+# Planar 4:2:0 layouts, with Y in the first `height` rows
+_PLANAR_420 = {
+    'NV12': cv2.COLOR_YUV2BGR_NV12,
+    'NV21': cv2.COLOR_YUV2BGR_NV21,
+    'I420': cv2.COLOR_YUV2BGR_I420,
+    'YU12': cv2.COLOR_YUV2BGR_I420,
+    'YV12': cv2.COLOR_YUV2BGR_YV12,
+}
+
+class YUVFrame:
+    """
+    A raw YUV frame straight from the driver.
+
+    ``gray`` is a view of the luma plane, so detection needs no colour
+    conversion. The BGR image is only produced when ``bgr()`` is called,
+    and then cached.
+    """
+
+    def __init__(self, raw: np.ndarray, width: int, height: int, fourcc: str):
+        self.width = width
+        self.height = height
+        self.fourcc = fourcc
+        self._bgr: Optional[np.ndarray] = None
+
+        if fourcc in _PACKED_422:
+            self._code, y_index = _PACKED_422[fourcc]
+            self.raw = raw.reshape(height, width, 2)
+            self.gray = self.raw[:, :, y_index]
+        elif fourcc in _PLANAR_420:
+            self._code = _PLANAR_420[fourcc]
+            self.raw = raw.reshape(height * 3 // 2, width)
+            self.gray = self.raw[:height]
+        elif fourcc in ('GREY', 'Y800'):
+            self._code = cv2.COLOR_GRAY2BGR
+            self.raw = raw.reshape(height, width)
+            self.gray = self.raw
+        else:
+            raise ValueError(f"Unsupported raw format: {fourcc!r}")
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Shape of the equivalent BGR frame."""
+        return (self.height, self.width, 3)
+
+    def bgr(self) -> np.ndarray:
+        """Convert to BGR on first use."""
+        if self._bgr is None:
+            self._bgr = cv2.cvtColor(self.raw, self._code)
+        return self._bgr
+
+    def copy(self) -> 'YUVFrame':
+        """Copy the raw data (the cached BGR image is not kept)."""
+        return YUVFrame(self.raw.copy(), self.width, self.height, self.fourcc)
+
+    @staticmethod
+    def layout(raw: np.ndarray, width: int, height: int,
+               fourcc: str) -> Optional[str]:
+        """
+        Work out the raw layout from the buffer size and negotiated FOURCC.
+        Returns the layout name, or None if the buffer is not raw YUV.
+        """
+        if raw is None or raw.dtype != np.uint8:
+            return None
+        size = raw.size
+        pixels = width * height
+        if size == pixels * 2:
+            return fourcc if fourcc in _PACKED_422 else 'YUYV'
+        if size == pixels * 3 // 2:
+            return fourcc if fourcc in _PLANAR_420 else 'NV12'
+        if size == pixels:
+            return 'GREY'
+        return None
+
+Frame = Union[np.ndarray, YUVFrame]
+
+def as_bgr(frame: Frame) -> np.ndarray:
+    """Get a BGR image from either a BGR array or a YUVFrame."""
+    if isinstance(frame, YUVFrame):
+        return frame.bgr()
+    return frame
+
+def as_gray(frame: Frame) -> np.ndarray:
+    """Get a single-channel image, using the luma plane when available."""
+    if isinstance(frame, YUVFrame):
+        return frame.gray
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
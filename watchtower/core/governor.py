@@ -0,0 +1,123 @@
+"""Quality governor: trade detection quality for frame rate under CPU load."""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .camera import Camera
+from .detection import Detector
+
+# Degradation steps, in the order they are applied
+STEPS = ("detection_resolution", "face_cadence", "shadow_detection", "preview_rate")
+
+class QualityGovernor:
+    """
+    Keeps the processing loop at the camera's frame rate on a busy machine.
+
+    Every ``window`` seconds the achieved loop rate is compared with the
+    camera rate. Below ``degrade_ratio`` of it, while the loop was busy for
+    at least ``degrade_load`` of the time, the next step in STEPS is
+    applied: a smaller detection frame, the face cascade on every
+    ``face_interval``th frame only, no shadow detection, then a slower
+    preview. A camera that delivers fewer frames than it advertises (many
+    webcams in low light) leaves the loop idle, so it never degrades
+    anything. A step is undone whenever the loop is busy for less than
+    ``restore_load`` of the time, i.e. there is headroom to spare.
+    After every change a full window passes before the next one.
+
+    Recording is not touched: every frame still reaches the recorder, and
+    the recorder pads its files to stay real time if the loop falls behind.
+    """
+
+    def __init__(self, camera: Camera, detector: Detector, preview: Any,
+                 window: float = 2.0, degrade_ratio: float = 0.9,
+                 degrade_load: float = 0.8, restore_load: float = 0.6, detection_scale: float = 0.5,
+                 face_interval: int = 5, preview_fps: float = 5.0):
+        self.camera = camera
+        self.detector = detector
+        self.preview = preview
+        self.window = window
+        self.degrade_ratio = degrade_ratio
+        self.degrade_load = degrade_load
+        self.restore_load = restore_load
+        self.detection_scale = detection_scale
+        self.face_interval = face_interval
+        self.preview_fps = preview_fps
+
+        # Settings to restore
+        self.full_preview_fps = preview.max_fps
+
+        self.level = 0
+        self.reason: Optional[str] = None  # Why the level last changed
+        self.fps = 0.0
+        self.load = 0.0
+        self.transitions: Deque[Tuple[float, int, str]] = deque(maxlen=50)
+        self.reset_window()
+
+    @property
+    def step(self) -> str:
+        """Name of the last step applied, or 'full' at full quality."""
+        return STEPS[self.level - 1] if self.level else "full"
+
+    def reset_window(self, now: Optional[float] = None) -> None:
+        """Start a new measuring window, e.g. after a gap in the frames."""
+        self.window_start = time.monotonic() if now is None else now
+        self.window_frames = 0
+        self.window_busy = 0.0
+
+    def frame_done(self, busy_seconds: float,
+                   now: Optional[float] = None) -> Optional[str]:
+        """
+        Count a processed frame that kept the loop busy for busy_seconds.
+        Returns a description of the change when the level moves.
+        """
+        if now is None:
+            now = time.monotonic()
+        self.window_frames += 1
+        self.window_busy += busy_seconds
+        elapsed = now - self.window_start
+        if elapsed < self.window:
+            return None
+
+        self.fps = self.window_frames / elapsed
+        self.load = self.window_busy / elapsed
+        target = self.camera.effective_fps
+        self.reset_window(now)
+
+        if self.fps < target * self.degrade_ratio and self.load >= self.degrade_load:
+            if self.level < len(STEPS):
+                return self._set_level(self.level + 1, target, now)
+        elif self.load < self.restore_load and self.level > 0:
+            return self._set_level(self.level - 1, target, now)
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current level and the last window's measurements."""
+        return {
+            "level": self.level,
+            "step": self.step,
+            "reason": self.reason,
+            "fps": self.fps,
+            "target_fps": self.camera.effective_fps,
+            "load": self.load
+        }
+
+    def _set_level(self, level: int, target: float, now: float) -> str:
+        """Apply a new level and remember the transition."""
+        degraded = level > self.level
+        self.reason = "falling_behind" if degraded else "headroom"
+        self.level = level
+        self._apply()
+        message = (f"{'Degraded' if degraded else 'Restored'} quality to level "
+                   f"{level} ({self.step}): {self.fps:.1f} of {target:.1f} fps, "
+                   f"{self.load:.0%} busy")
+        self.transitions.append((now, level, message))
+        return message
+
+    def _apply(self) -> None:
+        """Set every knob for the current level."""
+        level = self.level
+        self.detector.detection_scale = self.detection_scale if level >= 1 else 1.0
+        self.detector.face_interval = self.face_interval if level >= 2 else 1
+        self.detector.set_shadow_detection(level < 3)
+        self.preview.max_fps = self.preview_fps if level >= 4 else self.full_preview_fps
@@ -0,0 +1,59 @@
+"""Process-wide cache for detection models."""
+
+import threading
+from typing import Any, Dict, Optional
+
+FACE_CASCADE = 'haarcascade_frontalface_default.xml'
+
+_lock = threading.Lock()
+_cascades: Dict[str, Optional[Any]] = {}
+
+def get_cascade(name: str = FACE_CASCADE) -> Optional[Any]:
+    """
+    Get a Haar cascade, loading it from disk on first use.
+    Returns None if the cascade could not be loaded.
+
+    The classifier is shared by every Detector in the process, so it must
+    only be used from one thread at a time (the frame loop).
+    """
+    with _lock:
+        if name not in _cascades:
+            _cascades[name] = _load_cascade(name)
+        return _cascades[name]
+
+def _load_cascade(name: str) -> Optional[Any]:
+    """Load a cascade bundled with OpenCV."""
+    try:
+        import cv2
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + name)
+        if cascade.empty():
+            return None
+        return cascade
+    except Exception:
+        return None
+
+def preload() -> None:
+    """Import the detection stack and load the default models."""
+    # Importing these modules pulls in cv2 and NumPy, which dominate startup
+    from . import camera, detection, recording, pipeline  # noqa: F401
+    from ..utils import video  # noqa: F401
+    get_cascade(FACE_CASCADE)
+
+def preload_async() -> threading.Thread:
+    """Run preload() on a background thread and return the thread."""
+    thread = threading.Thread(target=_preload_quietly,
+                              name="watchtower-preload", daemon=True)
+    thread.start()
+    return thread
+
+def _preload_quietly() -> None:
+    """Preload, leaving any import error to surface when the camera starts."""
+    try:
+        preload()
+    except Exception:
+        pass
+
+def clear() -> None:
+    """Drop all cached models."""
+    with _lock:
+        _cascades.clear()
@@ -0,0 +1,403 @@
+"""Capture pipeline: one camera with its detector and recorder, without a GUI."""
+
+import datetime
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .adaptive import ActivityController
+from .camera import Camera
+from .detection import Detector, DetectionResult
+from .frames import Frame, as_bgr
+from .governor import QualityGovernor
+from .recording import VideoRecorder
+from .watchdog import (
+    CameraWatchdog, CAMERA_LOST, CAMERA_RESTORED, CAMERA_STALLED,
+    CAMERA_FROZEN, CAMERA_UNFROZEN, CAMERA_ENDED
+)
+from ..utils.config import Config
+from ..utils import profiler
+from ..utils.perf import PerfMonitor, draw_hud
+from ..utils.threads import ThreadPolicy
+from ..utils.video import DisplayRateLimiter
+
+# Event names reported by Pipeline.pop_events(), next to the watchdog's
+# camera events and the activity controller's transitions
+CLIP_STARTED = "clip_started"
+CLIP_EXTENDED = "clip_extended"
+QUALITY_CHANGED = "quality_changed"
+
+class FrameOutput(NamedTuple):
+    """What the pipeline did with one frame."""
+    frame: Frame
+    processed_frame: Frame
+    result: DetectionResult
+    shown: bool
+
+class Pipeline:
+    """
+    Runs capture → detection → recording for one camera.
+
+    process() handles one frame and never blocks for long, so it can be
+    driven from the Tk event loop (MainWindow) or a plain loop in a worker
+    process (the supervisor). Frames due for display are handed to the
+    ``display`` callback; without one nothing is drawn for display.
+    """
+
+    def __init__(self, config: Config, name: str = "camera",
+                 display: Optional[Callable[[np.ndarray], None]] = None,
+                 thread_policy: Optional[ThreadPolicy] = None):
+        self.config = config
+        self.name = name
+        self.display = display
+        self.thread_policy = thread_policy
+
+        self.camera: Optional[Camera] = None
+        self.watchdog: Optional[CameraWatchdog] = None
+        self.activity: Optional[ActivityController] = None
+        self.detector: Optional[Detector] = None
+        self.governor: Optional[QualityGovernor] = None
+        self.recorder: Optional[VideoRecorder] = None
+        self.preview_limiter = DisplayRateLimiter()
+        
+        # Stage timings, taken only while the debug HUD is on or exported
+        self.perf = PerfMonitor()
+        self.export_stages = bool(config.metrics_port or config.metrics_textfile)
+        self.dropped_frames = 0
+        self._last_read: Optional[float] = None
+        self._last_result: Optional[DetectionResult] = None
+        self.profiler: Optional[profiler.SamplingProfiler] = None
+
+        self.frames = 0
+        self.clips = 0
+        self.next_background_save = 0.0
+        self._frame_times: Deque[float] = deque(maxlen=60)
+        self._events: List[Tuple[str, Dict[str, Any]]] = []
+
+    def open(self) -> bool:
+        """Open the camera and build the pipeline. Returns False if it fails."""
+        config = self.config
+        self.camera = Camera(
+            config.camera_source or config.camera_index,
+            width=config.capture_width or None,
+            height=config.capture_height or None,
+            fps=config.capture_fps or None,
+            fourcc=config.capture_fourcc or None,
+            detection_width=config.detection_width or None,
+            convert_rgb=not config.capture_yuv,
+            pacing=config.replay_pacing,
+            loop=config.replay_loop
+        )
+        if not self.camera.open():
+            self.camera = None
+            return False
+
+        # Reconnect the camera instead of stopping if it fails
+        self.watchdog = CameraWatchdog(self.camera)
+
+        # Capture at a reduced rate and resolution while the scene is idle
+        self.activity = ActivityController(
+            self.camera,
+            config.idle_seconds,
+            config.idle_frame_skip,
+            config.idle_detection_width
+        )
+
+        self.detector = Detector(config.min_motion_area, config.confirm_frames)
+        self.detector.perf = self.perf
+        self.detector.set_zones(config.roi_polygons, config.exclusion_polygons)
+        if config.background_save_seconds > 0:
+            # Start from the background the last run saved
+            self.detector.load_background(self.background_file)
+            self.next_background_save = (time.monotonic()
+                                         + config.background_save_seconds)
+
+        # Degrade detection and preview, never recording, under CPU load
+        if config.quality_governor:
+            self.governor = QualityGovernor(
+                self.camera, self.detector, self.preview_limiter)
+
+        self.recorder = VideoRecorder(
+            config.output_folder,
+            self.camera.frame_width,
+            self.camera.frame_height,
+            self.camera.fps,
+            config.pre_buffer_seconds,
+            config.post_buffer_seconds,
+            config.master_idle_fps,
+            self.thread_policy.encoder_cpus if self.thread_policy else None,
+            config.coalesce_seconds,
+            config.min_clip_seconds
+        )
+        if config.always_record:
+            self.recorder.start_master_recording()
+        if profiler.enabled_from_env():
+            self.start_profiling()
+        return True
+
+    def start_profiling(self) -> None:
+        """
+        Sample the thread running this pipeline; reports go to a
+        "profiles" folder in the output folder.
+        """
+        if self.profiler is None:
+            self.profiler = profiler.SamplingProfiler(
+                os.path.join(self.config.output_folder, "profiles"),
+                name=self.name, thread_ids=[threading.get_ident()]).start()
+
+    def stop_profiling(self) -> List[str]:
+        """Stop profiling and return the report files."""
+        if self.profiler is None:
+            return []
+        reports, self.profiler = self.profiler.stop(), None
+        return reports
+
+    def process(self) -> Optional[FrameOutput]:
+        """
+        Read and handle one frame.
+        Returns None when no frame was available (camera reconnecting,
+        frozen or between frames); the caller should retry shortly, unless
+        ``ended`` is set because a replay played its last frame.
+        """
+        if self.watchdog is None:
+            return None
+
+        # Read the full frame and its low-resolution detection copy
+        perf = self.perf
+        perf.enabled = self.config.debug_mode or self.export_stages
+        t = perf.start()
+        ret, frame, detection_frame = self.watchdog.read_streams()
+        t = perf.lap("capture", t)
+        start_time = time.perf_counter()
+        self._handle_camera_events()
+        if not ret:
+            # Keep the detector and recorder alive while the camera recovers
+            if self.governor is not None:
+                self.governor.reset_window()
+            self._last_read = None
+            return None
+        self._count_dropped()
+
+        # A reconnected camera may come back in a different mode
+        recorder = self.recorder
+        if frame.shape[:2] != (recorder.frame_height, recorder.frame_width):
+            frame = cv2.resize(as_bgr(frame),
+                               (recorder.frame_width, recorder.frame_height))
+            detection_frame = self.camera.make_detection_frame(frame)
+
+        if self.watchdog.duplicate:
+            # A repeat of the last frame has nothing new to detect, but it
+            # is still recorded so masters keep their real frame count (the
+            # watchdog stops returning repeats once it reports a freeze)
+            result = self._repeat_result()
+            t = perf.start()
+        else:
+            # Detect on the low-resolution (or luma) stream; the detector
+            # times its own stages
+            result = self.detector.detect(detection_frame, frame.shape)
+            self._last_result = result
+            t = perf.start()
+            transition = self.activity.update(result)
+            if transition is not None:
+                self._events.append((transition, self.activity.get_stats()))
+            if result.scene_event is not None:
+                self._events.append((result.scene_event, self.detector.scene.get_stats()))
+            self._save_background()
+        detected = result.triggered
+
+        # Only produce a colour frame with overlays if someone will see it;
+        # otherwise the recorder buffers the frame as captured
+        show = (self.display is not None and not self.config.background_mode
+                and self.preview_limiter.ready())
+        if self._needs_color(detected, show):
+            processed_frame = self.detector.draw(
+                as_bgr(frame), result, self.config.debug_mode)
+        else:
+            processed_frame = frame
+        t = perf.lap("overlay", t)
+
+        # Handle recording
+        was_open = recorder.is_clip_open
+        triggers = len(recorder.clip_triggers)
+        recorder.add_frame(processed_frame, detected, timestamp=True)
+        if recorder.is_clip_open and (not was_open or
+                                      len(recorder.clip_triggers) > triggers):
+            # A new clip, or a burst merged into the open one
+            if not was_open:
+                self.clips += 1
+            self._events.append((CLIP_EXTENDED if was_open else CLIP_STARTED, {
+                "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "file": recorder.current_recording_file,
+                "triggers": len(recorder.clip_triggers)
+            }))
+        t = perf.lap("encode", t)
+
+        if show:
+            preview = as_bgr(processed_frame)
+            if self.config.debug_mode:
+                # The HUD goes on the preview only, never into recordings
+                preview = draw_hud(preview.copy(), self.hud_lines())
+            self.display(preview)
+            perf.lap("display", t)
+
+        # Trade detection quality for frame rate if the loop falls behind
+        if self.governor is not None:
+            message = self.governor.frame_done(time.perf_counter() - start_time)
+            if message is not None:
+                info = dict(self.governor.get_stats(), message=message)
+                recorder.mark_quality_change(**info)
+                self._events.append((QUALITY_CHANGED, info))
+
+        self.frames += 1
+        self._frame_times.append(time.monotonic())
+        return FrameOutput(frame, processed_frame, result, show)
+
+    def hud_lines(self) -> List[str]:
+        """Debug HUD text: real rates, drops, queues and stage latencies."""
+        camera = self.camera
+        capture = self.watchdog.get_stats()
+        lines = [
+            f"{self.fps:.1f} fps (camera {camera.effective_fps:.0f})  "
+            f"dropped {self.dropped_frames}",
+            f"duplicates {capture['duplicate_rate']:.0%}  "
+            f"pre-buffer {len(self.recorder.frame_buffer)}/"
+            f"{self.recorder.frame_buffer.maxlen}"
+        ]
+        for stage, (p50, p99) in self.perf.percentiles((50, 99)).items():
+            lines.append(f"{stage:<9} p50 {p50:6.2f}  p99 {p99:6.2f} ms")
+        return lines
+
+    def pop_events(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return and clear the (name, info) events since the last call."""
+        events, self._events = self._events, []
+        return events
+
+    @property
+    def background_file(self) -> str:
+        """Where this camera's background model is saved between runs."""
+        return os.path.join(self.config.output_folder,
+                            f".background-{self.name}-{self.config.camera_index}.png")
+
+    @property
+    def reconnecting(self) -> bool:
+        """Check if the camera is currently being reconnected."""
+        return self.watchdog is not None and self.watchdog.reconnecting
+
+    @property
+    def ended(self) -> bool:
+        """Check if a replayed source has run out of frames."""
+        return self.watchdog is not None and self.watchdog.ended
+
+    @property
+    def fps(self) -> float:
+        """Frames processed per second over the last few frames."""
+        times = self._frame_times
+        if len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for status display and the supervisor."""
+        stats: Dict[str, Any] = {
+            "name": self.name,
+            "frames": self.frames,
+            "fps": self.fps,
+            "clips": self.clips,
+            "dropped_frames": self.dropped_frames,
+            "recording": bool(self.recorder and self.recorder.is_recording)
+        }
+        if self.recorder is not None:
+            stats["bytes_written"] = self.recorder.bytes_written()
+            stats["prebuffer_frames"] = len(self.recorder.frame_buffer)
+        if self.perf.enabled:
+            stats["stages"] = self.perf.get_stats()
+        if self.camera is not None:
+            stats["camera"] = self.camera.get_properties()
+        if self.watchdog is not None:
+            stats["capture"] = self.watchdog.get_stats()
+        if self.activity is not None:
+            stats["activity"] = self.activity.get_stats()
+        if self.governor is not None:
+            stats["quality"] = self.governor.get_stats()
+        return stats
+
+    def close(self) -> None:
+        """Release the camera and finish the recordings."""
+        self.stop_profiling()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            self.watchdog = None
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+        if self.recorder is not None:
+            self.recorder.release()
+            self.recorder = None
+        if self.detector is not None and self.config.background_save_seconds > 0:
+            self.detector.save_background(self.background_file)
+        self.activity = None
+        self.governor = None
+        self.detector = None
+
+    def _handle_camera_events(self) -> None:
+        """Turn watchdog events into gap markers and pass them on."""
+        for event, info in self.watchdog.pop_events():
+            if event == CAMERA_LOST:
+                self.recorder.mark_gap_start("camera_lost", **info)
+            elif event == CAMERA_RESTORED:
+                self.recorder.mark_gap_end(**info)
+                self.activity.reset()
+                self.detector.reset_tracks()
+                self.detector.scene.reset()
+                self.detector.warm_up()
+            elif event == CAMERA_STALLED:
+                self.recorder.mark_gap_start("camera_stalled", **info)
+                self.recorder.mark_gap_end()
+            elif event == CAMERA_FROZEN:
+                # The watchdog drops repeats from here on, so the freeze is
+                # a gap in the recordings until CAMERA_UNFROZEN or lost
+                self.recorder.mark_gap_start("camera_frozen", **info)
+            elif event == CAMERA_UNFROZEN:
+                self.recorder.mark_gap_end(**info)
+            elif event == CAMERA_ENDED:
+                # Close the clip now rather than waiting out the post-buffer
+                self.recorder.release()
+            self._events.append((event, info))
+
+    def _repeat_result(self) -> DetectionResult:
+        """The last detections for a repeated frame, without a new trigger."""
+        if self._last_result is None:
+            return DetectionResult(False, [], False, [])
+        return self._last_result._replace(triggered=False, scene_event=None)
+
+    def _count_dropped(self) -> None:
+        """
+        Estimate frames the camera delivered that were never read, from the
+        time between reads and the rate frames should arrive at.
+        """
+        now = time.monotonic()
+        last, self._last_read = self._last_read, now
+        fps = self.camera.effective_fps
+        if last is None or fps <= 0:
+            return
+        missed = int((now - last) * fps + 0.5) - 1
+        if 0 < missed < fps:  # Longer holes are camera gaps, not drops
+            self.dropped_frames += missed
+
+    def _save_background(self) -> None:
+        """Save the background model every background_save_seconds."""
+        interval = self.config.background_save_seconds
+        if interval <= 0 or time.monotonic() < self.next_background_save:
+            return
+        self.next_background_save = time.monotonic() + interval
+        self.detector.save_background(self.background_file)
+
+    def _needs_color(self, detected: bool, show: bool) -> bool:
+        """Check whether this frame must be converted to BGR and drawn on."""
+        return (detected or show or
+                self.recorder.is_recording or self.recorder.is_master_recording)
@@ -2,103 +2,268 @@
 
 import cv2
 import datetime
+import json
+import time
 from pathlib import Path
 from collections import deque
 import numpy as np
-from typing import Optional, Deque
+from typing import Any, Callable, IO, List, Optional, Deque, Tuple
+
+from .frames import Frame, as_bgr
+from ..utils.threads import pinned
 
 class VideoRecorder:
     def __init__(self, output_dir: str, frame_width: int, frame_height: int,
                  fps: float, pre_buffer_seconds: int = 10,
-                 post_buffer_seconds: int = 10):
+                 post_buffer_seconds: int = 10,
+                 master_idle_fps: float = 0,
+                 encoder_cpus: Optional[List[int]] = None,
+                 coalesce_seconds: float = 0, min_clip_seconds: float = 0):
         self.output_dir = Path(output_dir)
         self.frame_width = frame_width
         self.frame_height = frame_height
         self.fps = fps
         
+        # CPUs the encoders' threads are started on (empty: no pinning)
+        self.encoder_cpus = encoder_cpus or []
+        
         # Calculate buffer sizes
         self.pre_buffer_frames = int(pre_buffer_seconds * fps)
         self.post_buffer_frames = int(post_buffer_seconds * fps)
         
-        # Initialize buffers and state
-        self.frame_buffer: Deque[np.ndarray] = deque(maxlen=self.pre_buffer_frames)
+        # Initialize buffers and state; buffered frames keep their capture time
+        self.frame_buffer: Deque[Tuple[float, Frame]] = deque(maxlen=self.pre_buffer_frames)
         self.frames_since_last_detection = 0
         self.recording = False
         self.writer = None
         self.current_recording_file: Optional[str] = None
         
+        # Coalescing: once the post-buffer runs out the clip pauses with
+        # its file open for coalesce_seconds, and a trigger in that window
+        # resumes it instead of starting a new clip. A clip also keeps
+        # recording until it is min_clip_seconds long. clip_triggers holds
+        # the capture time of every burst merged into the current clip.
+        self.coalesce_seconds = coalesce_seconds
+        self.min_clip_seconds = min_clip_seconds
+        self.clip_paused = False
+        self.clip_start_time = 0.0
+        self.clip_pause_time = 0.0
+        self.clip_last_time = float("-inf")
+        self.clip_triggers: List[float] = []
+        
+        # Keep constant-rate files in real time when frames arrive less often
+        self.clip_clock = _FrameClock(fps)
+        self.master_clock = _FrameClock(fps)
+        
         # Master recording (continuous)
         self.master_recording = False
         self.master_writer = None
         self.current_master_file: Optional[str] = None
         
+        # Variable frame rate master: drop to master_idle_fps while no clip
+        # is recording and log every written frame's time to a sidecar
+        self.master_idle_fps = master_idle_fps
+        self.master_idle = True
+        self.master_start_time: Optional[float] = None
+        self.master_last_time = float("-inf")
+        self.master_timestamps: Optional[IO[str]] = None
+        self.current_timestamps_file: Optional[str] = None
+        
+        # Size of finished files; open ones are measured on demand
+        self.bytes_finished = 0
+        
+        # Manifest of recordings and capture gaps, one JSON object per line
+        self.manifest_file = self.output_dir / "manifest.jsonl"
+        self.in_gap = False
+        
         # Ensure output directory exists
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-    def add_frame(self, frame: np.ndarray, detection: bool = False,
-                 timestamp: bool = True) -> None:
-        """Add a frame to the buffer and handle recording state."""
-        # Store raw frame in buffer
-        self.frame_buffer.append(frame.copy())
-        
-        if detection and not self.recording:
-            self._start_recording()
-        elif self.recording and not detection:
+    def add_frame(self, frame: Frame, detection: bool = False,
+                 timestamp: bool = True,
+                 capture_time: Optional[float] = None) -> None:
+        """
+        Add a frame to the buffer and handle recording state.
+        YUV frames are kept raw in the pre-buffer and only converted to BGR
+        when they are written.
+        """
+        if capture_time is None:
+            capture_time = time.time()
+            
+        if detection:
+            if self.clip_paused:
+                self._resume_recording(capture_time)
+            elif not self.recording:
+                self._start_recording(capture_time)
+            elif self.frames_since_last_detection > self.post_buffer_frames:
+                # Held open only by the minimum length: a new burst
+                self.clip_triggers.append(capture_time)
+                self._log_trigger(capture_time)
+            self.frames_since_last_detection = 0
+        elif self.recording:
             self.frames_since_last_detection += 1
-            if self.frames_since_last_detection > self.post_buffer_frames:
-                self._stop_recording()
+            if (self.frames_since_last_detection > self.post_buffer_frames and
+                    capture_time - self.clip_start_time >= self.min_clip_seconds):
+                if self.coalesce_seconds > 0:
+                    self._pause_recording(capture_time)
+                else:
+                    self._stop_recording()
+        elif self.clip_paused and capture_time - self.clip_pause_time > self.coalesce_seconds:
+            self._stop_recording()
                 
         # Write frame if recording
         if self.recording and self.writer is not None:
-            self.writer.write(frame)
+            self._write_clip_frame(frame, capture_time)
             
         # Handle master recording
         if self.master_recording and self.master_writer is not None:
-            if timestamp:
-                frame_with_time = frame.copy()
-                time_str = datetime.datetime.now().strftime("%H:%M:%S")
-                cv2.putText(frame_with_time, time_str,
-                          (10, self.frame_height - 10),
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                self.master_writer.write(frame_with_time)
-            else:
-                self.master_writer.write(frame)
-
-    def _start_recording(self) -> None:
+            self._add_master_frame(frame, capture_time, timestamp)
+            
+        # Store raw frame in buffer for the next clip's pre-roll
+        self.frame_buffer.append((capture_time, frame.copy()))
+
+    def record_next(self, subscriber,
+                    triggered: Optional[Callable[[float], bool]] = None,
+                    timestamp: bool = True,
+                    timeout: Optional[float] = 1.0) -> Optional[float]:
+        """
+        Add the next frame of a FrameBus subscriber, straight from the
+        shared slot. triggered(capture_time) tells whether the detector
+        flagged that frame. Returns the capture time, or None if no frame
+        arrived within timeout or the bus closed.
+        """
+        slot = subscriber.get(timeout)
+        if slot is None:
+            return None
+        with slot:
+            capture_time = slot.timestamp
+            detection = triggered is not None and triggered(capture_time)
+            self.add_frame(slot.frame, detection, timestamp, capture_time)
+        return capture_time
+
+    def _add_master_frame(self, frame: Frame, capture_time: float,
+                          timestamp: bool) -> None:
+        """Write a master frame, thinning to the idle rate between clips."""
+        if self.master_idle_fps > 0:
+            if not self.recording:
+                self.master_idle = True
+                if capture_time - self.master_last_time < 1.0 / self.master_idle_fps:
+                    return
+            elif self.master_idle:
+                # Back to full rate: fill in the pre-roll skipped while idle
+                self.master_idle = False
+                for buffered_time, buffered in self.frame_buffer:
+                    if buffered_time > self.master_last_time:
+                        self._write_master_frame(buffered, buffered_time, timestamp)
+                        
+        self._write_master_frame(frame, capture_time, timestamp)
+
+    def _write_master_frame(self, frame: Frame, capture_time: float,
+                            timestamp: bool) -> None:
+        """Write one frame to the master file and log its time."""
+        if timestamp:
+            frame_with_time = as_bgr(frame).copy()
+            time_str = datetime.datetime.fromtimestamp(capture_time).strftime("%H:%M:%S")
+            cv2.putText(frame_with_time, time_str,
+                      (10, self.frame_height - 10),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        else:
+            frame_with_time = as_bgr(frame)
+            
+        if self.master_start_time is None:
+            self.master_start_time = capture_time
+        self.master_last_time = capture_time
+        if self.master_timestamps is not None:
+            # Variable rate: one frame per capture, timed by the sidecar
+            self.master_writer.write(frame_with_time)
+            elapsed_ms = (capture_time - self.master_start_time) * 1000.0
+            self.master_timestamps.write(f"{elapsed_ms:.3f}\n")
+            return
+            
+        for _ in range(self.master_clock.repeats(capture_time)):
+            self.master_writer.write(frame_with_time)
+
+    def _write_clip_frame(self, frame: Frame, capture_time: float) -> None:
+        """Write one frame to the current clip."""
+        bgr = as_bgr(frame)
+        for _ in range(self.clip_clock.repeats(capture_time)):
+            self.writer.write(bgr)
+        self.clip_last_time = capture_time
+
+    def _start_recording(self, capture_time: Optional[float] = None) -> None:
         """Start a new recording."""
         if self.recording:
             return
+        if capture_time is None:
+            capture_time = time.time()
             
         # Generate filename with timestamp
-        filename = datetime.datetime.now().strftime("recording_%Y%m%d_%H%M%S.avi")
-        filepath = self.output_dir / filename
+        filename = datetime.datetime.now().strftime("recording_%Y%m%d_%H%M%S")
+        filepath = self.output_dir / f"{filename}.avi"
+        suffix = 1
+        while filepath.exists():
+            # Two clips within one second
+            filepath = self.output_dir / f"{filename}_{suffix}.avi"
+            suffix += 1
         self.current_recording_file = str(filepath)
         
         # Create video writer
         fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        self.writer = cv2.VideoWriter(
-            self.current_recording_file,
-            fourcc,
-            self.fps,
-            (self.frame_width, self.frame_height)
-        )
+        with pinned(self.encoder_cpus):
+            self.writer = cv2.VideoWriter(
+                self.current_recording_file,
+                fourcc,
+                self.fps,
+                (self.frame_width, self.frame_height)
+            )
         
         # Write pre-buffer frames
-        for frame in self.frame_buffer:
-            self.writer.write(frame)
+        self.clip_clock.reset()
+        for buffered_time, frame in self.frame_buffer:
+            self._write_clip_frame(frame, buffered_time)
             
         self.recording = True
         self.frames_since_last_detection = 0
+        self.clip_start_time = capture_time
+        self.clip_triggers = [capture_time]
+        self._log_event("clip_start", file=self.current_recording_file)
+
+    def _pause_recording(self, capture_time: float) -> None:
+        """Stop writing, but keep the clip open for the coalescing window."""
+        self.recording = False
+        self.clip_paused = True
+        self.clip_pause_time = capture_time
+
+    def _resume_recording(self, capture_time: float) -> None:
+        """Continue a paused clip for a new burst, with its pre-roll."""
+        self.clip_paused = False
+        self.recording = True
+        # Only the pre-buffer frames the clip does not have yet
+        for buffered_time, frame in self.frame_buffer:
+            if buffered_time > self.clip_last_time:
+                self._write_clip_frame(frame, buffered_time)
+        self.clip_triggers.append(capture_time)
+        self._log_trigger(capture_time)
+
+    def _log_trigger(self, capture_time: float) -> None:
+        """Record a burst merged into the current clip."""
+        self._log_event("clip_extend", file=self.current_recording_file,
+                        trigger=_isoformat(capture_time),
+                        triggers=len(self.clip_triggers))
 
     def _stop_recording(self) -> None:
         """Stop the current recording."""
-        if not self.recording:
+        if not self.recording and not self.clip_paused:
             return
             
         self.recording = False
+        self.clip_paused = False
         if self.writer is not None:
             self.writer.release()
             self.writer = None
+        self.bytes_finished += _file_size(self.current_recording_file)
+        self._log_event("clip_stop", file=self.current_recording_file,
+                        triggers=[_isoformat(t) for t in self.clip_triggers])
         self.current_recording_file = None
         self.frames_since_last_detection = 0
 
@@ -114,14 +279,28 @@ class VideoRecorder:
         
         # Create video writer
         fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        self.master_writer = cv2.VideoWriter(
-            self.current_master_file,
-            fourcc,
-            self.fps,
-            (self.frame_width, self.frame_height)
-        )
+        with pinned(self.encoder_cpus):
+            self.master_writer = cv2.VideoWriter(
+                self.current_master_file,
+                fourcc,
+                self.fps,
+                (self.frame_width, self.frame_height)
+            )
+        
+        # Per-frame times in mkvmerge "timecode format v2" (ms per line), so
+        # a thinned master can be remuxed with correct timing
+        if self.master_idle_fps > 0:
+            self.current_timestamps_file = str(filepath.with_suffix(".timestamps.txt"))
+            self.master_timestamps = open(self.current_timestamps_file, "w")
+            self.master_timestamps.write("# timecode format v2\n")
+        self.master_idle = True
+        self.master_start_time = None
+        self.master_last_time = float("-inf")
+        self.master_clock.reset()
         
         self.master_recording = True
+        self._log_event("master_start", file=self.current_master_file,
+                        timestamps_file=self.current_timestamps_file)
 
     def stop_master_recording(self) -> None:
         """Stop master recording."""
@@ -132,10 +311,50 @@ class VideoRecorder:
         if self.master_writer is not None:
             self.master_writer.release()
             self.master_writer = None
+        if self.master_timestamps is not None:
+            self.master_timestamps.close()
+            self.master_timestamps = None
+        self.bytes_finished += _file_size(self.current_master_file)
+        self._log_event("master_stop", file=self.current_master_file)
         self.current_master_file = None
+        self.current_timestamps_file = None
+
+    def mark_gap_start(self, reason: str = "camera_lost", **info: Any) -> None:
+        """Record that frames stopped arriving; writers stay open."""
+        if self.in_gap:
+            return
+        self.in_gap = True
+        self._log_event("gap_start", reason=reason,
+                        master_file=self.current_master_file,
+                        clip_file=self.current_recording_file, **info)
+
+    def mark_gap_end(self, **info: Any) -> None:
+        """Record that frames are arriving again."""
+        if not self.in_gap:
+            return
+        self.in_gap = False
+        self._log_event("gap_end", master_file=self.current_master_file,
+                        clip_file=self.current_recording_file, **info)
+
+    def mark_quality_change(self, **info: Any) -> None:
+        """Record that detection quality was lowered or restored."""
+        self._log_event("quality_change", master_file=self.current_master_file,
+                        clip_file=self.current_recording_file, **info)
+
+    def _log_event(self, event: str, **fields: Any) -> None:
+        """Append an event to the recording manifest."""
+        entry = {"time": datetime.datetime.now().isoformat(timespec="milliseconds"),
+                 "event": event}
+        entry.update(fields)
+        try:
+            with open(self.manifest_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Error writing manifest: {e}")
 
     def release(self) -> None:
         """Release all resources."""
+        self.mark_gap_end()
         self._stop_recording()
         self.stop_master_recording()
         self.frame_buffer.clear()
@@ -145,7 +364,62 @@ class VideoRecorder:
         """Check if currently recording."""
         return self.recording
 
+    def bytes_written(self) -> int:
+        """Bytes written to clips and master files so far."""
+        return (self.bytes_finished + _file_size(self.current_recording_file)
+                + _file_size(self.current_master_file))
+
+    @property
+    def is_clip_open(self) -> bool:
+        """Check if a clip file is open, writing or waiting to be extended."""
+        return self.recording or self.clip_paused
+
     @property
     def is_master_recording(self) -> bool:
         """Check if master recording is active."""
-        return self.master_recording 
\ No newline at end of file
+        return self.master_recording
+
+def _file_size(path: Optional[str]) -> int:
+    """Size of a recording file, 0 if there is none (yet)."""
+    if not path:
+        return 0
+    try:
+        return Path(path).stat().st_size
+    except OSError:
+        return 0
+
+def _isoformat(capture_time: float) -> str:
+    """Format a capture time for the manifest."""
+    return datetime.datetime.fromtimestamp(capture_time).isoformat(timespec="milliseconds")
+
+class _FrameClock:
+    """
+    Paces a constant-rate file against capture time.
+    A frame is written as many times as frame slots have passed since the
+    previous one, so a file stays real time while the camera is read at a
+    reduced rate or the loop falls behind. Holes longer than a second are
+    camera gaps: they are not filled, the clock restarts instead.
+    """
+
+    def __init__(self, fps: float):
+        self.fps = fps
+        self.max_repeats = max(int(fps), 1)
+        self.reset()
+
+    def reset(self) -> None:
+        """Start counting for a new file."""
+        self.start_time: Optional[float] = None
+        self.frames = 0
+
+    def repeats(self, capture_time: float) -> int:
+        """Count a frame captured at capture_time; returns how often to write it."""
+        if self.start_time is None:
+            self.start_time = capture_time
+        due = int(round((capture_time - self.start_time) * self.fps)) + 1
+        count = due - self.frames
+        if count > self.max_repeats:
+            self.start_time = capture_time - self.frames / self.fps
+            count = 1
+        count = max(count, 1)
+        self.frames += count
+        return count 
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Replay sources: video files and image folders played back as a camera."""
+
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# How a replay is paced
+PACING_REALTIME = "realtime"  # Frames arrive on the source's clock, late ones are dropped
+PACING_FAST = "fast"  # Every frame, as fast as they are read
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+
+def is_replay_source(source: Union[int, str, None]) -> bool:
+    """True for a file or folder path, False for a camera index."""
+    if source is None or isinstance(source, int):
+        return False
+    source = str(source).strip()
+    return bool(source) and not source.isdigit()
+
+class ReplaySource:
+    """
+    Plays a video file or a folder of images through the subset of the
+    cv2.VideoCapture interface Camera uses (read, grab, get, set).
+
+    With PACING_REALTIME, read() waits until the next frame is due on the
+    source's own clock and skips frames the caller was too slow for, like
+    a live camera that only ever hands over its latest frame. With
+    PACING_FAST every frame is returned at once, for throughput tests.
+    Image folders play in file name order at ``fps``. Once the last frame
+    has been read (and ``loop`` is off) ``finished`` is set, so callers can
+    tell the end of the replay from a failed read.
+    """
+
+    def __init__(self, path: str, pacing: str = PACING_REALTIME,
+                 fps: Optional[float] = None, loop: bool = False):
+        self.path = Path(path).expanduser()
+        self.pacing = pacing
+        self.loop = loop
+        self.fps = fps or 0.0
+        self.frame_width = 0
+        self.frame_height = 0
+        self.frame_count = 0
+        self.position = 0  # Index of the next frame
+        self.skipped = 0
+        self.finished = False
+
+        self._video: Optional[cv2.VideoCapture] = None
+        self._images: List[Path] = []
+        self._start = 0.0
+        self._opened = False
+
+    def open(self) -> bool:
+        """Open the file or folder. Returns False if there is nothing to play."""
+        if self.path.is_dir():
+            self._images = sorted(p for p in self.path.iterdir()
+                                  if p.suffix.lower() in IMAGE_EXTENSIONS)
+            first = cv2.imread(str(self._images[0])) if self._images else None
+            if first is None:
+                return False
+            self.frame_height, self.frame_width = first.shape[:2]
+            self.frame_count = len(self._images)
+            self.fps = self.fps or 30.0
+        else:
+            self._video = cv2.VideoCapture(str(self.path))
+            if not self._video.isOpened():
+                self._video = None
+                return False
+            self.frame_width = int(self._video.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.frame_height = int(self._video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.fps = self.fps or self._video.get(cv2.CAP_PROP_FPS) or 30.0
+        self.position = 0
+        self.finished = False
+        self._start = time.monotonic()
+        self._opened = True
+        return True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Next frame, paced as configured."""
+        if not self._opened:
+            return False, None
+        if self.pacing == PACING_REALTIME:
+            self._wait_for_frame()
+        ret, frame = self._decode()
+        if not ret and self.loop and self._rewind():
+            ret, frame = self._decode()
+        if not ret:
+            self.finished = self._at_end()
+        return ret, frame
+
+    def grab(self) -> bool:
+        """Skip a frame without decoding it (Camera's frame_skip)."""
+        if not self._opened:
+            return False
+        if self._skip() or (self.loop and self._rewind() and self._skip()):
+            return True
+        self.finished = self._at_end()
+        return False
+
+    def get(self, prop: int) -> float:
+        """The cv2.CAP_PROP_* values Camera reads."""
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_FOURCC and self._video is not None:
+            return self._video.get(cv2.CAP_PROP_FOURCC)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        """Seek with CAP_PROP_POS_FRAMES; capture modes cannot be changed."""
+        if prop != cv2.CAP_PROP_POS_FRAMES or not self._opened:
+            return False
+        self.position = max(0, int(value))
+        if self._video is not None:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, self.position)
+        # Restart the clock so realtime pacing continues from here
+        self._start = time.monotonic() - self.position / self.fps
+        return True
+
+    def release(self) -> None:
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+        self._opened = False
+
+    def _wait_for_frame(self) -> None:
+        """Sleep until the next frame is due, or skip the ones already missed."""
+        due = (time.monotonic() - self._start) * self.fps
+        if due < self.position:
+            time.sleep((self.position - due) / self.fps)
+            return
+        while int(due) > self.position and self._skip():
+            self.skipped += 1
+
+    def _decode(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._video is not None:
+            ret, frame = self._video.read()
+            if not ret:
+                return False, None
+        else:
+            if self.position >= len(self._images):
+                return False, None
+            frame = cv2.imread(str(self._images[self.position]))
+            if frame is None:
+                return False, None
+        self.position += 1
+        return True, frame
+
+    def _skip(self) -> bool:
+        if self._video is not None:
+            if not self._video.grab():
+                return False
+        elif self.position >= len(self._images):
+            return False
+        self.position += 1
+        return True
+
+    def _at_end(self) -> bool:
+        """Whether a failed read was the end of the replay, not an error."""
+        if self._video is None:
+            return self.position >= len(self._images)
+        # Some containers report no frame count; then any failure is the end
+        return not self.frame_count or self.position >= self.frame_count - 1
+
+    def _rewind(self) -> bool:
+        """Start over for looped playback."""
+        return self.set(cv2.CAP_PROP_POS_FRAMES, 0)
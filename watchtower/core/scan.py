@@ -0,0 +1,281 @@
+"""Offline scan of master recordings for motion events."""
+
+import datetime
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..utils import threads
+
+# Manifest event written for every motion event a scan finds
+SCAN_EVENT = "scan_motion"
+
+class Chunk(NamedTuple):
+    """
+    Frames [start, end) of a recording. Frames from warm_start on are run
+    through the detector first so the background model is settled at start.
+    """
+    file: str
+    start: int
+    end: int
+    warm_start: int
+
+class ScanEvent(NamedTuple):
+    """Motion from the first to the last triggered frame, inclusive."""
+    file: str
+    start_frame: int
+    end_frame: int
+    triggered_frames: int
+    faces: bool
+
+def find_recordings(paths: Iterable[str]) -> List[str]:
+    """Master recordings in paths; folders are searched recursively."""
+    found = []
+    for path in map(Path, paths):
+        path = path.expanduser()
+        if path.is_dir():
+            found.extend(str(p) for p in sorted(path.rglob("master_*.avi")))
+        elif path.exists():
+            found.append(str(path))
+        else:
+            print(f"Error scanning {path}: no such file or folder")
+    return found
+
+def video_info(path: str) -> Tuple[int, float]:
+    """Frame count and frame rate of a video file."""
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), cap.get(cv2.CAP_PROP_FPS) or 30.0
+    finally:
+        cap.release()
+
+def plan_chunks(path: str, frame_count: int, chunk_frames: int,
+                overlap_frames: int) -> List[Chunk]:
+    """Split a recording into chunks that overlap by overlap_frames of warm-up."""
+    chunk_frames = max(chunk_frames, 1)
+    return [Chunk(path, start, min(start + chunk_frames, frame_count),
+                  max(start - overlap_frames, 0))
+            for start in range(0, frame_count, chunk_frames)]
+
+def scan_chunk(chunk: Chunk, settings: Dict[str, Any]) -> List[ScanEvent]:
+    """
+    Decode one chunk on its own and run the detector over it. Triggers at
+    most gap_frames apart belong to the same event.
+    """
+    import cv2
+    from .detection import Detector
+
+    detector = Detector(settings["min_motion_area"], settings["confirm_frames"])
+    detector.set_zones(settings["roi_polygons"], settings["exclusion_polygons"])
+    gap_frames = settings["gap_frames"]
+    detection_width = settings["detection_width"]
+
+    cap = cv2.VideoCapture(chunk.file)
+    if not cap.isOpened():
+        print(f"Error opening {chunk.file}")
+        return []
+    if chunk.warm_start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, chunk.warm_start)
+
+    events: List[ScanEvent] = []
+    current: Optional[List[Any]] = None  # [start, end, triggered, faces]
+    det_size = None
+    try:
+        for index in range(chunk.warm_start, chunk.end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if det_size is None:
+                det_size = _detection_size(frame.shape, detection_width)
+            small = (cv2.resize(frame, det_size, interpolation=cv2.INTER_AREA)
+                     if det_size else frame)
+            result = detector.detect(small, frame.shape)
+            if index < chunk.start:
+                continue  # Warm-up overlap: the previous chunk reports these
+
+            if current is not None and index - current[1] > gap_frames:
+                events.append(ScanEvent(chunk.file, *current))
+                current = None
+            if result.triggered:
+                if current is None:
+                    current = [index, index, 0, False]
+                current[1] = index
+                current[2] += 1
+                current[3] = current[3] or result.faces_detected
+    finally:
+        cap.release()
+    if current is not None:
+        events.append(ScanEvent(chunk.file, *current))
+    return events
+
+def merge_events(events: Sequence[ScanEvent], gap_frames: int) -> List[ScanEvent]:
+    """Join events of one file split across chunk boundaries."""
+    merged: List[ScanEvent] = []
+    for event in sorted(events, key=lambda e: e.start_frame):
+        if merged and event.start_frame - merged[-1].end_frame <= gap_frames:
+            last = merged[-1]
+            merged[-1] = last._replace(
+                end_frame=max(last.end_frame, event.end_frame),
+                triggered_frames=last.triggered_frames + event.triggered_frames,
+                faces=last.faces or event.faces)
+        else:
+            merged.append(event)
+    return merged
+
+def frame_times(path: str, frame_count: int, fps: float) -> Tuple[Optional[float], List[float]]:
+    """
+    Start time of a master recording from its name, and each frame's
+    offset in seconds: from the timestamps sidecar of a variable rate
+    master, otherwise from the frame rate.
+    """
+    start = None
+    try:
+        start = datetime.datetime.strptime(Path(path).stem, "master_%Y%m%d_%H%M%S").timestamp()
+    except ValueError:
+        pass
+
+    sidecar = Path(path).with_suffix(".timestamps.txt")
+    if sidecar.exists():
+        try:
+            with open(sidecar, encoding="utf-8") as f:
+                offsets = [float(line) / 1000.0 for line in f
+                           if line.strip() and not line.startswith("#")]
+            if offsets:
+                return start, offsets
+        except (OSError, ValueError) as e:
+            print(f"Error reading {sidecar}: {e}")
+    return start, [i / fps for i in range(frame_count)]
+
+def event_record(event: ScanEvent, start: Optional[float],
+                 offsets: List[float]) -> Dict[str, Any]:
+    """JSON-ready description of an event."""
+    def when(frame: int) -> Tuple[float, Optional[str]]:
+        offset = offsets[min(frame, len(offsets) - 1)] if offsets else 0.0
+        stamp = None
+        if start is not None:
+            stamp = datetime.datetime.fromtimestamp(start + offset).isoformat(
+                timespec="milliseconds")
+        return round(offset, 3), stamp
+
+    start_offset, start_time = when(event.start_frame)
+    end_offset, end_time = when(event.end_frame)
+    return {
+        "event": SCAN_EVENT,
+        "file": event.file,
+        "start": start_time,
+        "end": end_time,
+        "start_offset": start_offset,
+        "end_offset": end_offset,
+        "start_frame": event.start_frame,
+        "end_frame": event.end_frame,
+        "triggered_frames": event.triggered_frames,
+        "faces": event.faces,
+    }
+
+def _init_worker() -> None:
+    """Scan processes run OpenCV single-threaded; the pool is the parallelism."""
+    threads.apply_policy(threads.ThreadPolicy(1, 1, [], []))
+
+def _detection_size(shape: Tuple[int, ...], width: int) -> Optional[Tuple[int, int]]:
+    if not width or width >= shape[1]:
+        return None
+    height = max(2, int(round(shape[0] * width / shape[1] / 2)) * 2)
+    return (width, height)
+
+def scan(files: Sequence[str], config, jobs: int = 0, chunk_seconds: float = 300.0,
+         overlap_seconds: float = 10.0) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Scan recordings with the configured detector settings in a pool of
+    ``jobs`` processes (default: one per CPU). Long files are split into
+    chunks so a single recording also keeps every process busy; each chunk
+    starts overlap_seconds early, and at least the background model's
+    history (BACKGROUND_HISTORY frames) early, to warm up a fresh model.
+    The warmed-up model is close to, but not bit-identical with, the one
+    a single pass would have, so event edges near a chunk boundary can
+    shift by a few frames between job counts; use one job for results
+    that must be reproducible. Returns the events of each file.
+    """
+    from .detection import BACKGROUND_HISTORY
+
+    jobs = jobs or len(threads.available_cpus())
+    settings = {
+        "min_motion_area": config.min_motion_area,
+        "confirm_frames": config.confirm_frames,
+        "roi_polygons": config.roi_polygons,
+        "exclusion_polygons": config.exclusion_polygons,
+        "detection_width": config.detection_width,
+    }
+
+    plans: Dict[str, Tuple[int, float]] = {}
+    chunks: List[Chunk] = []
+    for path in files:
+        frame_count, fps = video_info(path)
+        if frame_count <= 0:
+            print(f"Error scanning {path}: no frames")
+            continue
+        plans[path] = (frame_count, fps)
+        # A shorter warm-up leaves the chunk's model visibly unsettled
+        overlap = max(int(overlap_seconds * fps), BACKGROUND_HISTORY)
+        # Enough chunks to spread a lone long file over every process, but
+        # not so short that the warm-up overlap dominates
+        size = min(int(chunk_seconds * fps), math.ceil(frame_count / jobs))
+        chunks.extend(plan_chunks(path, frame_count, max(size, 3 * overlap), overlap))
+
+    found: Dict[str, List[ScanEvent]] = {path: [] for path in plans}
+    gap = {path: int(config.post_buffer_seconds * fps) for path, (_, fps) in plans.items()}
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = {pool.submit(scan_chunk, chunk, dict(settings, gap_frames=gap[chunk.file])): chunk
+                   for chunk in chunks}
+        for done, future in enumerate(as_completed(futures), 1):
+            chunk = futures[future]
+            try:
+                found[chunk.file].extend(future.result())
+            except Exception as e:
+                print(f"Error scanning {chunk.file} frames {chunk.start}-{chunk.end}: {e}")
+            print(f"Scanned {done}/{len(chunks)} chunks", end="\r", file=sys.stderr)
+    if chunks:
+        print(file=sys.stderr)
+
+    results = {}
+    for path, events in found.items():
+        start, offsets = frame_times(path, *plans[path])
+        results[path] = [event_record(event, start, offsets)
+                         for event in merge_events(events, gap[path])]
+    return results
+
+def write_jsonl(results: Dict[str, List[Dict[str, Any]]], output: str) -> int:
+    """Write all events to a JSONL file ("-" for stdout). Returns the count."""
+    records = [record for events in results.values() for record in events]
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    if output == "-":
+        sys.stdout.write(lines)
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(lines)
+    return len(records)
+
+def write_manifests(results: Dict[str, List[Dict[str, Any]]]) -> int:
+    """
+    Append each file's events to the manifest.jsonl next to it, the index
+    the recorder keeps of clips. Returns the count.
+    """
+    now = datetime.datetime.now().isoformat(timespec="milliseconds")
+    count = 0
+    for path, events in results.items():
+        if not events:
+            continue
+        manifest = os.path.join(os.path.dirname(os.path.abspath(path)), "manifest.jsonl")
+        try:
+            with open(manifest, "a", encoding="utf-8") as f:
+                for record in events:
+                    f.write(json.dumps(dict({"time": now}, **record)) + "\n")
+            count += len(events)
+        except OSError as e:
+            print(f"Error writing manifest: {e}")
+    return count
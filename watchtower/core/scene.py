@@ -0,0 +1,103 @@
+"""Scene monitor: global lighting changes and camera tampering."""
+
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .frames import as_gray
+
+# Events reported by SceneMonitor.check() and in DetectionResult.scene_event
+SCENE_LIGHTING = "scene_lighting"
+SCENE_TAMPERED = "scene_tampered"
+SCENE_RESTORED = "scene_restored"
+
+class SceneMonitor:
+    """
+    Watches a thumbnail of every detection frame for whole-scene changes.
+
+    A jump in mean brightness (lights switched, a cloud) is a lighting
+    change. A nearly uniform image (lens covered) or a loss of detail
+    against the learned reference (lens refocused, sprayed) that lasts
+    ``tamper_frames`` frames is tampering; it is restored once contrast
+    and detail come back. The references follow slow changes such as
+    dusk. A thumbnail keeps the check at a few microseconds per frame.
+    """
+
+    def __init__(self, thumb_size: Tuple[int, int] = (96, 54),
+                 luma_change: float = 25.0, covered_std: float = 6.0,
+                 blur_ratio: float = 0.25, tamper_frames: int = 10,
+                 adapt_rate: float = 0.05):
+        self.thumb_size = thumb_size
+        self.luma_change = luma_change
+        self.covered_std = covered_std
+        self.blur_ratio = blur_ratio
+        self.tamper_frames = tamper_frames
+        self.adapt_rate = adapt_rate
+
+        self.ref_mean: Optional[float] = None
+        self.ref_sharpness: Optional[float] = None
+        self.tampered = False
+        self.suspect_frames = 0
+        self.last: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        """Forget the references, e.g. after the camera was away."""
+        self.ref_mean = None
+        self.ref_sharpness = None
+        self.tampered = False
+        self.suspect_frames = 0
+
+    def check(self, frame: np.ndarray) -> Optional[str]:
+        """
+        Compare a detection frame with the references.
+        Returns SCENE_LIGHTING, SCENE_TAMPERED or SCENE_RESTORED on a change.
+        """
+        thumb = cv2.resize(frame, self.thumb_size, interpolation=cv2.INTER_AREA)
+        thumb = as_gray(thumb)
+        mean, std = cv2.meanStdDev(thumb)
+        mean, std = float(mean[0, 0]), float(std[0, 0])
+        sharpness = float(cv2.Laplacian(thumb, cv2.CV_32F).var())
+        self.last = {"mean": mean, "std": std, "sharpness": sharpness}
+
+        if self.ref_mean is None:
+            self._set_reference(mean, sharpness)
+            return None
+
+        if self.tampered:
+            # Hysteresis: contrast and detail must clearly come back
+            if (std >= 2 * self.covered_std and
+                    sharpness >= 2 * self.blur_ratio * self.ref_sharpness):
+                self.tampered = False
+                self.suspect_frames = 0
+                self._set_reference(mean, sharpness)
+                return SCENE_RESTORED
+            return None
+
+        covered = std < self.covered_std
+        blurred = sharpness < self.blur_ratio * self.ref_sharpness
+        if covered or blurred:
+            self.suspect_frames += 1
+            if self.suspect_frames >= self.tamper_frames:
+                self.tampered = True
+                return SCENE_TAMPERED
+            return None
+        self.suspect_frames = 0
+
+        if abs(mean - self.ref_mean) > self.luma_change:
+            self._set_reference(mean, sharpness)
+            return SCENE_LIGHTING
+
+        rate = self.adapt_rate
+        self.ref_mean += rate * (mean - self.ref_mean)
+        self.ref_sharpness += rate * (sharpness - self.ref_sharpness)
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latest measurements and references, for debugging."""
+        return dict(self.last, tampered=self.tampered,
+                    ref_mean=self.ref_mean, ref_sharpness=self.ref_sharpness)
+
+    def _set_reference(self, mean: float, sharpness: float) -> None:
+        self.ref_mean = mean
+        self.ref_sharpness = max(sharpness, 1e-3)
@@ -0,0 +1,302 @@
+"""Multi-camera supervisor: one worker process per camera pipeline."""
+
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .framebus import FrameBus, LATEST_ONLY
+from ..utils import threads
+from ..utils.config import Config
+from ..utils.metrics import MetricsExporter, exporter_from_config
+
+# Events sent by workers on top of the pipeline's own events
+WORKER_STARTED = "worker_started"
+WORKER_STOPPED = "worker_stopped"
+WORKER_FAILED = "worker_failed"
+WORKER_STATS = "worker_stats"
+WORKER_RESTARTING = "worker_restarting"
+
+Message = Tuple[str, str, Dict[str, Any]]
+
+# Previews published for the GUI's grid view
+PREVIEW_WIDTH = 640
+PREVIEW_FPS = 15.0
+PREVIEW_CONSUMER = "gui"
+
+def camera_sections(config: Config) -> List[Dict[str, Any]]:
+    """
+    The configured cameras, each a dict of settings overriding the top
+    level ones. Without a "cameras" list the top-level camera is the only one.
+    """
+    sections = config.cameras or [{"camera_index": config.camera_index}]
+    named = []
+    for slot, section in enumerate(sections):
+        section = dict(section)
+        section.setdefault("name", f"camera{section.get('camera_index', slot)}")
+        named.append(section)
+    return named
+
+def worker_config(config_file: str, section: Dict[str, Any]) -> Config:
+    """Build one worker's settings: the config file plus its section."""
+    config = Config(config_file)
+    base_folder = config.output_folder
+    overrides = {key: value for key, value in section.items() if key != "name"}
+    config.update(overrides)
+    # Keep each camera's recordings and manifest apart
+    if "output_folder" not in overrides:
+        config.output_folder = os.path.join(base_folder, section["name"])
+    return config
+
+def preview_bus_name(name: str, pid: int) -> str:
+    """
+    Shared memory name of a worker's preview bus. The pid keeps a restarted
+    worker from colliding with a block its predecessor left behind.
+    """
+    safe = "".join(c if c.isalnum() else "_" for c in name)
+    return f"wt_preview_{safe}_{pid}"
+
+def preview_size(width: int, height: int) -> Tuple[int, int]:
+    """Size previews are published at: at most PREVIEW_WIDTH wide."""
+    if width <= PREVIEW_WIDTH:
+        return width, height
+    return PREVIEW_WIDTH, max(1, round(height * PREVIEW_WIDTH / width))
+
+def run_worker(config_file: str, section: Dict[str, Any], slot: int,
+               cameras: int, messages, stop_event,
+               stats_interval: float = 5.0, preview: bool = False) -> None:
+    """Worker process entry point: run one pipeline until told to stop."""
+    name = section["name"]
+    config = worker_config(config_file, section)
+
+    # BLAS threads must be limited before NumPy is first imported
+    policy = threads.policy_from_config(config, slot, cameras)
+    threads.apply_blas_env(policy)
+
+    from .pipeline import Pipeline
+    threads.apply_policy(policy)
+
+    pipeline = Pipeline(config, name=name, thread_policy=policy)
+    if preview:
+        # Set before open() so the quality governor restores this rate
+        pipeline.preview_limiter.max_fps = PREVIEW_FPS
+    if not pipeline.open():
+        messages.put((name, WORKER_FAILED, {"reason": "camera did not open"}))
+        raise SystemExit(1)
+
+    bus = None
+    info: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "camera": pipeline.camera.get_properties()
+    }
+    if preview:
+        import cv2
+        size = preview_size(pipeline.camera.frame_width,
+                            pipeline.camera.frame_height)
+        bus = FrameBus.create(preview_bus_name(name, os.getpid()),
+                              (size[1], size[0], 3), slots=3,
+                              consumers={PREVIEW_CONSUMER: LATEST_ONLY})
+
+        def publish_preview(frame):
+            # Downscale here so the GUI only copies a small frame per tick
+            if frame.shape[1] != size[0]:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            bus.publish(frame, timeout=0)
+
+        pipeline.display = publish_preview
+        info["preview_bus"] = bus.name
+    messages.put((name, WORKER_STARTED, info))
+
+    next_stats = time.monotonic() + stats_interval
+    try:
+        while not stop_event.is_set():
+            output = pipeline.process()
+            for event, info in pipeline.pop_events():
+                messages.put((name, event, info))
+            if output is None:
+                if pipeline.ended:
+                    break  # Replay finished; exit cleanly, not restarted
+                time.sleep(0.1 if pipeline.reconnecting else 0.005)
+            if time.monotonic() >= next_stats:
+                messages.put((name, WORKER_STATS, pipeline.get_stats()))
+                next_stats += stats_interval
+    finally:
+        pipeline.close()
+        if bus is not None:
+            bus.close()
+        messages.put((name, WORKER_STOPPED, {}))
+
+class _Worker:
+    """Supervisor-side state of one camera worker."""
+
+    def __init__(self, section: Dict[str, Any], slot: int):
+        self.section = section
+        self.slot = slot
+        self.name: str = section["name"]
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.next_start = 0.0
+        self.backoff = 0.0
+        self.stats: Dict[str, Any] = {}
+        self.preview_bus: Optional[str] = None
+        self.finished = False
+
+class Supervisor:
+    """
+    Runs N camera pipelines, each in its own process.
+
+    Each camera has its own config section (see camera_sections), its own
+    recordings folder and its own thread policy slot, so throughput scales
+    with cores instead of sharing one GIL. Workers report events and
+    periodic stats over a single multiprocessing queue; a worker that dies
+    is restarted with exponential backoff, which resets once it has run
+    for ``stable_seconds``.
+
+    With ``preview`` set, each worker also publishes downscaled preview
+    frames on a FrameBus named in its WORKER_STARTED info, for the GUI's
+    grid view.
+    """
+
+    def __init__(self, config: Config, stats_interval: float = 5.0,
+                 backoff_initial: float = 1.0, backoff_max: float = 60.0,
+                 stable_seconds: float = 60.0, preview: bool = False):
+        self.config = config
+        self.preview = preview
+        self.stats_interval = stats_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+
+        # Spawned workers start clean instead of inheriting threads and locks
+        self._ctx = multiprocessing.get_context("spawn")
+        self.messages = self._ctx.Queue()
+        self.stop_event = self._ctx.Event()
+        sections = camera_sections(config)
+        self.workers = [_Worker(section, slot)
+                        for slot, section in enumerate(sections)]
+        self.metrics: Optional[MetricsExporter] = None
+
+    def start(self) -> None:
+        """Start every worker, and the metrics exporter if configured."""
+        self.stop_event.clear()
+        if self.metrics is None:
+            self.metrics = exporter_from_config(self.config)
+        for worker in self.workers:
+            self._start_worker(worker)
+
+    def poll(self, timeout: float = 0.5) -> List[Message]:
+        """
+        Collect worker messages and restart workers that died.
+        Returns (camera name, event, info) tuples.
+        """
+        messages = []
+        try:
+            messages.append(self.messages.get(timeout=timeout))
+            while True:
+                messages.append(self.messages.get_nowait())
+        except queue.Empty:
+            pass
+
+        by_name = {worker.name: worker for worker in self.workers}
+        for name, event, info in messages:
+            if event == WORKER_STATS and name in by_name:
+                by_name[name].stats = info
+                if self.metrics is not None:
+                    self.metrics.update(name, info)
+            elif event == WORKER_STARTED and name in by_name:
+                by_name[name].preview_bus = info.get("preview_bus")
+
+        if not self.stop_event.is_set():
+            messages.extend(self._check_workers())
+        return messages
+
+    def run(self) -> None:
+        """Start the workers and print their events until interrupted."""
+        self.start()
+        try:
+            while True:
+                for name, event, info in self.poll():
+                    if event != WORKER_STATS:
+                        print(f"[{name}] {event} {info}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask every worker to finish its recordings and exit."""
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            process = worker.process
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
+            worker.process = None
+        if self.metrics is not None:
+            self.metrics.stop()
+            self.metrics = None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latest stats from each worker, with its process state."""
+        return {
+            worker.name: dict(
+                worker.stats,
+                alive=bool(worker.process and worker.process.is_alive()),
+                restarts=worker.restarts
+            )
+            for worker in self.workers
+        }
+
+    def _start_worker(self, worker: _Worker) -> None:
+        """Spawn the process for one camera."""
+        worker.process = self._ctx.Process(
+            target=run_worker,
+            args=(str(self.config.config_file), worker.section, worker.slot,
+                  len(self.workers), self.messages, self.stop_event,
+                  self.stats_interval, self.preview),
+            name=f"watchtower-{worker.name}",
+            daemon=True
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+
+    def _check_workers(self) -> List[Message]:
+        """Restart dead workers once their backoff has passed."""
+        events = []
+        now = time.monotonic()
+        for worker in self.workers:
+            process = worker.process
+            if worker.finished or (process is not None and process.is_alive()):
+                continue
+            if process is not None and process.exitcode == 0:
+                # Exited on its own: a replay that ran out of frames
+                worker.finished = True
+                worker.process = None
+                continue
+            if process is not None:
+                # Died: schedule a restart, backing off if it keeps failing
+                if now - worker.started_at >= self.stable_seconds:
+                    worker.backoff = self.backoff_initial
+                else:
+                    worker.backoff = min(max(worker.backoff * 2, self.backoff_initial),
+                                         self.backoff_max)
+                worker.next_start = now + worker.backoff
+                worker.process = None
+                if worker.preview_bus:
+                    # A crashed worker could not remove its preview bus
+                    FrameBus.unlink(worker.preview_bus)
+                    worker.preview_bus = None
+                events.append((worker.name, WORKER_RESTARTING, {
+                    "exitcode": process.exitcode,
+                    "delay": worker.backoff
+                }))
+            elif now >= worker.next_start:
+                worker.restarts += 1
+                self._start_worker(worker)
+        return events
@@ -0,0 +1,187 @@
+"""Object tracking: persistent IDs for detected regions across frames."""
+
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+Region = Tuple[int, int, int, int]
+
+class Track(NamedTuple):
+    """One tracked object, in the coordinates its regions were given in."""
+    id: int
+    region: Region
+    hits: int
+    misses: int
+    confirmed: bool
+
+class Tracker:
+    """
+    Greedy IoU tracker with a centroid fallback.
+
+    Tracks live in fixed-size NumPy arrays (corners, velocity, counters)
+    rather than one object each, so matching a frame is a few vectorized
+    operations. A detection continues the track it overlaps most; motion
+    blobs change shape from frame to frame, so a detection whose centre
+    is close to a track's also continues it. A track is confirmed once it
+    has been matched ``confirm_hits`` times and is dropped after
+    ``max_misses`` updates without a match. Between detector runs,
+    predict() moves the tracks on by their estimated velocity.
+    """
+
+    def __init__(self, capacity: int = 32, iou_threshold: float = 0.3,
+                 confirm_hits: int = 3, max_misses: int = 5,
+                 centroid_ratio: float = 0.5):
+        self.capacity = capacity
+        self.iou_threshold = iou_threshold
+        self.confirm_hits = confirm_hits
+        self.max_misses = max_misses
+        self.centroid_ratio = centroid_ratio
+
+        self.boxes = np.zeros((capacity, 4), np.float32)  # x1, y1, x2, y2
+        self.measured = np.zeros((capacity, 4), np.float32)  # last detection
+        self.velocity = np.zeros((capacity, 2), np.float32)  # per frame
+        self.ids = np.zeros(capacity, np.int64)
+        self.hits = np.zeros(capacity, np.int32)
+        self.misses = np.zeros(capacity, np.int32)
+        self.stale = np.zeros(capacity, np.int32)  # frames since last detection
+        self.active = np.zeros(capacity, bool)
+        self.next_id = 1
+
+    def reset(self) -> None:
+        """Forget every track, e.g. after a camera gap."""
+        self.active[:] = False
+
+    @property
+    def has_confirmed(self) -> bool:
+        """Check if any confirmed track is alive."""
+        return bool((self.active & (self.hits >= self.confirm_hits)).any())
+
+    def update(self, regions: Sequence[Region]) -> List[Track]:
+        """Match one frame's detections to the tracks and return them all."""
+        detections = _corners(regions)
+        slots = np.flatnonzero(self.active)
+        track_index, det_index = self._match(slots, detections)
+
+        # Matched tracks take the new box; the shift since the last
+        # detection (not the predicted box) refines the velocity
+        if len(track_index):
+            old_centres = _centres(self.measured[track_index])
+            new_centres = _centres(detections[det_index])
+            frames = (self.stale[track_index] + 1)[:, None]
+            shift = (new_centres - old_centres) / frames
+            self.velocity[track_index] = (0.5 * self.velocity[track_index]
+                                          + 0.5 * shift)
+            self.boxes[track_index] = detections[det_index]
+            self.measured[track_index] = detections[det_index]
+            self.hits[track_index] += 1
+            self.misses[track_index] = 0
+            self.stale[track_index] = 0
+
+        # Unmatched tracks coast on their velocity until they expire
+        missed = np.setdiff1d(slots, track_index, assume_unique=True)
+        if len(missed):
+            self.boxes[missed] += np.tile(self.velocity[missed], 2)
+            self.misses[missed] += 1
+            self.stale[missed] += 1
+            self.active[missed[self.misses[missed] > self.max_misses]] = False
+
+        # Unmatched detections start new tracks in free slots
+        new = np.setdiff1d(np.arange(len(detections)), det_index,
+                           assume_unique=True)
+        free = np.flatnonzero(~self.active)
+        if len(new) > len(free):
+            # Full: give up the least established tracks, but not one
+            # that was matched this frame
+            unmatched = np.setdiff1d(np.flatnonzero(self.active), track_index,
+                                     assume_unique=True)
+            evict = unmatched[np.argsort(self.hits[unmatched], kind="stable")]
+            free = np.concatenate([free, evict[:len(new) - len(free)]])
+        free = free[:len(new)]
+        if len(free):
+            self.boxes[free] = detections[new[:len(free)]]
+            self.measured[free] = self.boxes[free]
+            self.velocity[free] = 0
+            self.ids[free] = np.arange(self.next_id, self.next_id + len(free))
+            self.next_id += len(free)
+            self.hits[free] = 1
+            self.misses[free] = 0
+            self.stale[free] = 0
+            self.active[free] = True
+
+        return self.tracks()
+
+    def predict(self) -> List[Track]:
+        """Carry the tracks forward one frame without a detection."""
+        slots = np.flatnonzero(self.active)
+        self.boxes[slots] += np.tile(self.velocity[slots], 2)
+        self.stale[slots] += 1
+        return self.tracks()
+
+    def tracks(self) -> List[Track]:
+        """The live tracks, oldest first."""
+        slots = np.flatnonzero(self.active)
+        slots = slots[np.argsort(self.ids[slots])]
+        boxes = np.rint(self.boxes[slots]).astype(int)
+        return [
+            Track(int(self.ids[i]),
+                  (int(x1), int(y1), int(x2 - x1), int(y2 - y1)),
+                  int(self.hits[i]), int(self.misses[i]),
+                  bool(self.hits[i] >= self.confirm_hits))
+            for i, (x1, y1, x2, y2) in zip(slots, boxes)
+        ]
+
+    def _match(self, slots: np.ndarray,
+               detections: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Greedily pair tracks and detections, best score first."""
+        empty = np.zeros(0, np.intp)
+        if not len(slots) or not len(detections):
+            return empty, empty
+        tracks = self.boxes[slots]
+
+        # IoU of every track with every detection
+        x1 = np.maximum(tracks[:, None, 0], detections[None, :, 0])
+        y1 = np.maximum(tracks[:, None, 1], detections[None, :, 1])
+        x2 = np.minimum(tracks[:, None, 2], detections[None, :, 2])
+        y2 = np.minimum(tracks[:, None, 3], detections[None, :, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        area_t = _areas(tracks)[:, None]
+        area_d = _areas(detections)[None, :]
+        iou = inter / np.maximum(area_t + area_d - inter, 1e-6)
+
+        # Centre distance relative to the track's size
+        size = np.maximum(tracks[:, 2] - tracks[:, 0],
+                          tracks[:, 3] - tracks[:, 1])[:, None]
+        distance = np.linalg.norm(
+            _centres(tracks)[:, None, :] - _centres(detections)[None, :, :],
+            axis=2) / np.maximum(size, 1.0)
+
+        # Overlap matches rank above centroid matches
+        score = np.where(iou >= self.iou_threshold, 1.0 + iou,
+                         np.where(distance < self.centroid_ratio,
+                                  1.0 - distance / self.centroid_ratio, 0.0))
+
+        track_index, det_index = [], []
+        used_tracks = np.zeros(len(slots), bool)
+        used_dets = np.zeros(len(detections), bool)
+        for flat in np.argsort(-score, axis=None, kind="stable"):
+            t, d = divmod(int(flat), len(detections))
+            if score[t, d] <= 0:
+                break
+            if used_tracks[t] or used_dets[d]:
+                continue
+            used_tracks[t] = used_dets[d] = True
+            track_index.append(slots[t])
+            det_index.append(d)
+        return np.array(track_index, np.intp), np.array(det_index, np.intp)
+
+def _corners(regions: Sequence[Region]) -> np.ndarray:
+    """(x, y, w, h) regions as an (n, 4) array of corners."""
+    boxes = np.array(regions, np.float32).reshape(-1, 4)
+    boxes[:, 2:] += boxes[:, :2]
+    return boxes
+
+def _centres(boxes: np.ndarray) -> np.ndarray:
+    return (boxes[:, :2] + boxes[:, 2:]) / 2
+
+def _areas(boxes: np.ndarray) -> np.ndarray:
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
@@ -0,0 +1,237 @@
+"""Offline tuning of min_motion_area and the MOG2 parameters on a clip."""
+
+import itertools
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Blobs smaller than this (full-frame pixels) are not cached; no sensible
+# min_motion_area is that low
+AREA_FLOOR = 50.0
+
+class Background(NamedTuple):
+    """MOG2 parameters of one background model variant."""
+    history: int = 500
+    var_threshold: float = 50.0
+    shadows: bool = True
+
+    @property
+    def label(self) -> str:
+        return (f"history={self.history} var={self.var_threshold:g} "
+                f"shadows={'on' if self.shadows else 'off'}")
+
+class AreaCache:
+    """
+    Foreground blob areas of every frame of a clip, for one background
+    variant: ``areas`` holds the area (full-frame pixels) of every blob of
+    at least AREA_FLOOR, ``frames`` the frame each one came from, both as
+    flat arrays. ``excluded`` marks frames the detector treats as a scene
+    change rather than motion.
+    """
+
+    def __init__(self, background: Background, fps: float, frame_count: int,
+                 frames: np.ndarray, areas: np.ndarray, excluded: np.ndarray):
+        self.background = background
+        self.fps = fps
+        self.frame_count = frame_count
+        self.frames = frames
+        self.areas = areas
+        self.excluded = excluded
+
+    def frame_max(self) -> np.ndarray:
+        """Largest blob area of each frame (0 without any)."""
+        largest = np.zeros(self.frame_count, np.float32)
+        np.maximum.at(largest, self.frames, self.areas)
+        largest[self.excluded] = 0
+        return largest
+
+def load_caches(path: str) -> List[AreaCache]:
+    """Caches written by save_caches()."""
+    with np.load(path) as data:
+        count = int(data["count"])
+        return [AreaCache(_background(data[f"{i}_background"]),
+                          float(data[f"{i}_fps"]), int(data[f"{i}_frame_count"]),
+                          data[f"{i}_frames"], data[f"{i}_areas"],
+                          data[f"{i}_excluded"])
+                for i in range(count)]
+
+def _background(values: np.ndarray) -> Background:
+    history, var_threshold, shadows = values.tolist()
+    return Background(int(history), var_threshold, bool(shadows))
+
+def save_caches(caches: Sequence[AreaCache], path: str) -> None:
+    """Keep collected caches so other thresholds need no decoding at all."""
+    arrays: Dict[str, Any] = {"count": len(caches)}
+    for i, cache in enumerate(caches):
+        arrays.update({
+            f"{i}_background": np.array(tuple(cache.background), np.float64),
+            f"{i}_fps": cache.fps,
+            f"{i}_frame_count": cache.frame_count,
+            f"{i}_frames": cache.frames,
+            f"{i}_areas": cache.areas,
+            f"{i}_excluded": cache.excluded,
+        })
+    np.savez_compressed(path, **arrays)
+
+def backgrounds(histories: Iterable[int], var_thresholds: Iterable[float],
+                shadows: Iterable[bool]) -> List[Background]:
+    """Every combination of the given MOG2 parameters."""
+    return [Background(*combo) for combo in
+            itertools.product(histories, var_thresholds, shadows)]
+
+def collect(source: str, variants: Sequence[Background], config,
+            max_frames: int = 0) -> List[AreaCache]:
+    """
+    Decode a clip once and run a Detector per background variant over
+    every frame, caching the blob areas. Detection zones, the detection
+    width and scene handling follow the configuration; the face cascade
+    is left out, as it does not depend on these parameters.
+    """
+    import cv2
+    from .camera import Camera
+    from .detection import Detector
+    from .replay import PACING_FAST
+
+    camera = Camera(source, detection_width=config.detection_width or None,
+                    pacing=PACING_FAST)
+    if not camera.open():
+        raise RuntimeError(f"cannot open {source}")
+
+    detectors = []
+    for variant in variants:
+        detector = Detector(AREA_FLOOR)
+        detector.backSub = cv2.createBackgroundSubtractorMOG2(
+            history=variant.history, varThreshold=variant.var_threshold,
+            detectShadows=variant.shadows)
+        detector.set_zones(config.roi_polygons, config.exclusion_polygons)
+        detector.face_cascade = None
+        detectors.append(detector)
+
+    frames: List[List[np.ndarray]] = [[] for _ in variants]
+    areas: List[List[np.ndarray]] = [[] for _ in variants]
+    excluded: List[List[bool]] = [[] for _ in variants]
+    count = 0
+    try:
+        while not max_frames or count < max_frames:
+            ret, frame, detection_frame = camera.read_streams()
+            if not ret:
+                break
+            scale = (frame.shape[0] * frame.shape[1] /
+                     (detection_frame.shape[0] * detection_frame.shape[1]))
+            for i, detector in enumerate(detectors):
+                result = detector.detect(detection_frame, frame.shape)
+                blobs = np.asarray(detector.contour_areas, np.float32) * scale
+                blobs = blobs[blobs >= AREA_FLOOR]
+                if len(blobs):
+                    areas[i].append(blobs)
+                    frames[i].append(np.full(len(blobs), count, np.uint32))
+                excluded[i].append(result.scene_event is not None)
+            count += 1
+    finally:
+        camera.release()
+
+    def flat(parts, dtype):
+        return np.concatenate(parts) if parts else np.zeros(0, dtype)
+
+    return [AreaCache(variant, camera.fps, count, flat(frames[i], np.uint32),
+                      flat(areas[i], np.float32), np.array(excluded[i], bool))
+            for i, variant in enumerate(variants)]
+
+def evaluate(cache: AreaCache, thresholds: Sequence[float], confirm_frames: int,
+             pre_buffer_seconds: float, post_buffer_seconds: float,
+             coalesce_seconds: float = 0, min_clip_seconds: float = 0
+             ) -> List[Dict[str, Any]]:
+    """
+    Triggers, clips and recorded minutes for every threshold at once.
+
+    Motion at a threshold is a frame whose largest blob exceeds it; a
+    trigger is motion on confirm_frames frames in a row (what the tracker
+    needs for one object). Motion and triggers are computed as one
+    (thresholds x frames) array; only the resulting bursts are walked
+    through the recorder's clip logic.
+    """
+    fps = cache.fps
+    pre = int(pre_buffer_seconds * fps)
+    post = int(post_buffer_seconds * fps)
+    coalesce = int(coalesce_seconds * fps)
+    min_clip = int(min_clip_seconds * fps)
+    thresholds = np.asarray(thresholds, np.float32)
+    rows = len(thresholds)
+
+    # (thresholds x frames) motion, then the length of each motion run
+    motion = cache.frame_max()[None, :] > thresholds[:, None]
+    steps = np.cumsum(motion, axis=1)
+    run = steps - np.maximum.accumulate(np.where(motion, 0, steps), axis=1)
+    triggered = run >= max(confirm_frames, 1)
+
+    # Bursts: runs of triggers close enough that the clip records
+    # straight through them, found for all thresholds together
+    row, index = np.nonzero(triggered)
+    breaks = np.ones(len(index), bool)
+    breaks[1:] = (row[1:] != row[:-1]) | (np.diff(index) > post + 1)
+    starts = np.flatnonzero(breaks)
+    ends = np.append(starts[1:], len(index)) - 1
+    burst_row, burst_start, burst_end = row[starts], index[starts], index[ends]
+
+    clips = np.zeros(rows, np.int64)
+    recorded = np.zeros(rows, np.int64)
+    bursts = np.bincount(burst_row, minlength=rows)
+    for i in range(rows):
+        clips[i], recorded[i] = _record(
+            burst_start[burst_row == i], burst_end[burst_row == i],
+            cache.frame_count, pre, post, coalesce, min_clip)
+
+    return [{
+        "min_motion_area": float(threshold),
+        "history": cache.background.history,
+        "var_threshold": cache.background.var_threshold,
+        "shadows": cache.background.shadows,
+        "triggers": int(bursts[i]),
+        "triggered_frames": int(triggered[i].sum()),
+        "clips": int(clips[i]),
+        "recorded_minutes": round(float(recorded[i]) / fps / 60.0, 2),
+    } for i, threshold in enumerate(thresholds)]
+
+def _record(starts: np.ndarray, ends: np.ndarray, frame_count: int, pre: int,
+            post: int, coalesce: int, min_clip: int) -> Tuple[int, int]:
+    """
+    Clips and frames written for one threshold's bursts, following
+    VideoRecorder: a clip writes its pre-buffer, records until post frames
+    after the last trigger (and for at least min_clip frames), then pauses
+    for coalesce frames; a burst in the pause resumes it with the frames
+    it missed that are still in the pre-buffer.
+    """
+    clips = written = 0
+    clip_start = pause = -1
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if clips and start < pause:
+            # Still recording, held open by the minimum clip length
+            first = pause
+        elif clips and coalesce > 0 and start <= pause + coalesce:
+            first = max(pause, start - pre)
+        else:
+            clips += 1
+            clip_start = start
+            first = max(start - pre, 0)
+        pause = max(end + post + 1, clip_start + min_clip)
+        written += max(min(pause, frame_count) - first, 0)
+    return clips, written
+
+def default_thresholds(current: float, steps: int = 12) -> List[float]:
+    """A geometric range from 500 to 50000 pixels plus the current setting."""
+    values = set(np.geomspace(500, 50000, steps).round(-1).tolist())
+    values.add(float(current))
+    return sorted(values)
+
+def format_table(rows: Sequence[Dict[str, Any]], minutes: Optional[float] = None) -> str:
+    """Results as an aligned text table."""
+    lines = []
+    if minutes is not None:
+        lines.append(f"Clip length: {minutes:.1f} minutes")
+    lines.append(f"{'background':<38} {'min area':>9} {'triggers':>9} "
+                 f"{'clips':>6} {'recorded min':>13}")
+    for r in rows:
+        label = Background(r["history"], r["var_threshold"], r["shadows"]).label
+        lines.append(f"{label:<38} {r['min_motion_area']:>9.0f} {r['triggers']:>9} "
+                     f"{r['clips']:>6} {r['recorded_minutes']:>13.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,245 @@
+"""Camera watchdog that reconnects a failed device without stopping the pipeline."""
+
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .camera import Camera
+from .frames import Frame
+
+# Event names reported by CameraWatchdog.pop_events()
+CAMERA_LOST = "camera_lost"
+CAMERA_RESTORED = "camera_restored"
+CAMERA_STALLED = "camera_stalled"
+CAMERA_FROZEN = "camera_frozen"
+CAMERA_UNFROZEN = "camera_unfrozen"
+CAMERA_ENDED = "camera_ended"  # A replayed file or image folder ran out
+
+def frame_fingerprint(frame: np.ndarray, step: int = 8) -> Optional[int]:
+    """
+    Cheap fingerprint of a frame from a subsampled thumbnail.
+    Returns None for flat frames (e.g. a black room), which look identical
+    without the camera being frozen.
+    """
+    thumb = frame[::step, ::step]
+    if thumb.min() == thumb.max():
+        return None
+    return zlib.crc32(np.ascontiguousarray(thumb))
+
+class CameraWatchdog:
+    """
+    Wraps a Camera and keeps it alive.
+
+    Failed reads are counted; after ``failure_threshold`` failures in a row,
+    or when no frame has arrived for ``stall_timeout`` seconds, the device is
+    released and reopened on a background thread with exponential backoff.
+    While it is away, read_streams() returns no frame instead of an error,
+    so the detector and recorder keep their state across the gap.
+
+    Frames are also fingerprinted: a frame identical to the previous one is
+    still returned, with ``duplicate`` set so the caller can skip analysing
+    it. A camera repeating itself for ``freeze_timeout`` seconds is
+    reported as frozen; from then on its repeats are dropped (no frame is
+    returned) until the picture changes, and one still frozen after
+    ``stall_timeout`` is reconnected.
+    """
+
+    def __init__(self, camera: Camera, stall_timeout: float = 5.0,
+                 failure_threshold: int = 5, backoff_initial: float = 0.5,
+                 backoff_max: float = 30.0, freeze_timeout: float = 2.0,
+                 stats_window: int = 300):
+        self.camera = camera
+        self.stall_timeout = stall_timeout
+        self.failure_threshold = failure_threshold
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.freeze_timeout = freeze_timeout
+
+        self.connected = True
+        self.ended = False
+        self.failures = 0
+        self.reconnects = 0
+        self.last_read_time = time.monotonic()
+        self.last_new_frame_time = self.last_read_time
+        self.lost_time: Optional[float] = None
+
+        # Frozen-frame detection
+        self.duplicate = False
+        self.frozen = False
+        self.frames = 0
+        self.duplicates = 0
+        self._last_fingerprint: Optional[int] = None
+        self._recent: Deque[bool] = deque(maxlen=stats_window)
+        self._recent_duplicates = 0
+
+        self._backoff = backoff_initial
+        self._next_attempt = 0.0
+        self._reopen_thread: Optional[threading.Thread] = None
+        self._reopen_ok = False
+        self._events: List[Tuple[str, Dict[str, Any]]] = []
+
+    def read_streams(self) -> Tuple[bool, Optional[Frame], Optional[np.ndarray]]:
+        """Read like Camera.read_streams, reconnecting behind the scenes."""
+        if self.ended:
+            return False, None, None
+        if not self.connected:
+            self._service_reconnect()
+            return False, None, None
+
+        self.duplicate = False
+        ret, frame, detection_frame = self.camera.read_streams()
+        now = time.monotonic()
+        if not ret:
+            if self.camera.finished:
+                # The end of a replay: nothing to reconnect, no gap
+                self.ended = True
+                self._events.append((CAMERA_ENDED, {"frames": self.frames}))
+                return False, None, None
+            self.failures += 1
+            if (self.failures >= self.failure_threshold or
+                    now - self.last_read_time > self.stall_timeout):
+                self._lose_camera(now)
+            return False, None, None
+            
+        stalled_for = now - self.last_read_time
+        if stalled_for > self.stall_timeout:
+            # The read blocked for a long time but the device recovered
+            self._events.append((CAMERA_STALLED, {"seconds": stalled_for}))
+        self.failures = 0
+        self.last_read_time = now
+        
+        if self._is_duplicate(detection_frame):
+            # Short runs of repeats are real footage of a still scene; once
+            # the run counts as a freeze, the repeats are a gap
+            self._handle_duplicate(now)
+            if self.frozen or not self.connected:
+                return False, None, None
+            return True, frame, detection_frame
+
+        if self.frozen:
+            self.frozen = False
+            self._events.append((CAMERA_UNFROZEN, {
+                "seconds": now - self.last_new_frame_time
+            }))
+        self.last_new_frame_time = now
+        return True, frame, detection_frame
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Capture health counters; duplicate_rate covers recent frames."""
+        return {
+            "frames": self.frames,
+            "duplicates": self.duplicates,
+            "duplicate_rate": (self._recent_duplicates / len(self._recent)
+                               if self._recent else 0.0),
+            "frozen": self.frozen,
+            "connected": self.connected,
+            "ended": self.ended,
+            "reconnects": self.reconnects
+        }
+
+    def _is_duplicate(self, detection_frame: np.ndarray) -> bool:
+        """Fingerprint the frame and compare it with the previous one."""
+        fingerprint = frame_fingerprint(detection_frame)
+        duplicate = fingerprint is not None and fingerprint == self._last_fingerprint
+        self._last_fingerprint = fingerprint
+        
+        # Running duplicate count over the stats window
+        if len(self._recent) == self._recent.maxlen and self._recent[0]:
+            self._recent_duplicates -= 1
+        self._recent.append(duplicate)
+        self._recent_duplicates += duplicate
+        self.frames += 1
+        self.duplicates += duplicate
+        self.duplicate = duplicate
+        return duplicate
+
+    def _handle_duplicate(self, now: float) -> None:
+        """Raise the frozen event, then reconnect if the freeze persists."""
+        frozen_for = now - self.last_new_frame_time
+        if not self.frozen and frozen_for > self.freeze_timeout:
+            self.frozen = True
+            self._events.append((CAMERA_FROZEN, {"seconds": frozen_for}))
+        if frozen_for > self.stall_timeout:
+            self._lose_camera(now)
+
+    def pop_events(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return and clear the (name, info) events since the last call."""
+        events, self._events = self._events, []
+        return events
+
+    @property
+    def reconnecting(self) -> bool:
+        """Check if the camera is currently being reconnected."""
+        return not self.connected
+
+    def stop(self) -> None:
+        """Stop reconnecting and release the camera."""
+        thread = self._reopen_thread
+        if thread is not None:
+            thread.join(timeout=self.stall_timeout)
+        self.camera.release()
+
+    def _lose_camera(self, now: float) -> None:
+        """Mark the camera as lost and schedule the first reopen."""
+        self.connected = False
+        self.frozen = False
+        self._last_fingerprint = None
+        self.lost_time = now
+        self._backoff = self.backoff_initial
+        self._next_attempt = now
+        self._events.append((CAMERA_LOST, {
+            "failures": self.failures,
+            "seconds_since_frame": now - self.last_new_frame_time
+        }))
+
+    def _service_reconnect(self) -> None:
+        """Start a reopen attempt when due, or collect a finished one."""
+        thread = self._reopen_thread
+        if thread is not None:
+            if thread.is_alive():
+                return
+            self._reopen_thread = None
+            if self._reopen_ok:
+                self._restore_camera()
+                return
+            # Failed attempt: wait longer before the next one
+            self._next_attempt = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, self.backoff_max)
+            return
+
+        if time.monotonic() >= self._next_attempt:
+            self._reopen_ok = False
+            self._reopen_thread = threading.Thread(
+                target=self._reopen, name="watchtower-reconnect", daemon=True)
+            self._reopen_thread.start()
+
+    def _reopen(self) -> None:
+        """Release and reopen the device (runs on the reconnect thread)."""
+        camera = self.camera
+        width, height = camera.frame_width, camera.frame_height
+        camera.release()
+
+        # Ask for the mode we had so recordings keep their frame size
+        if width and height and not camera.requested_width:
+            camera.requested_width, camera.requested_height = width, height
+        try:
+            self._reopen_ok = camera.open()
+        except Exception:
+            self._reopen_ok = False
+
+    def _restore_camera(self) -> None:
+        """Resume reading after a successful reopen."""
+        now = time.monotonic()
+        self._events.append((CAMERA_RESTORED, {
+            "gap_seconds": now - (self.lost_time or now)
+        }))
+        self.connected = True
+        self.failures = 0
+        self.reconnects += 1
+        self.last_read_time = now
+        self.last_new_frame_time = now
+        self.lost_time = None
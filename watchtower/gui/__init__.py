@@ -1,7 +1,21 @@
 """GUI package for Webcam Monitor."""
 
-from .main_window import MainWindow
-from .wizard import SetupWizard
-from .settings import SettingsDialog
+import importlib
 
-__all__ = ['MainWindow', 'SetupWizard', 'SettingsDialog'] 
\ No newline at end of file
+# Dialogs are only imported when first opened to keep startup fast
+_LAZY_ATTRS = {
+    'MainWindow': '.main_window',
+    'SetupWizard': '.wizard',
+    'SettingsDialog': '.settings',
+}
+
+__all__ = ['MainWindow', 'SetupWizard', 'SettingsDialog']
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -2,20 +2,16 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import webbrowser
 import platform
-import subprocess
 from pathlib import Path
 import datetime
 import csv
+import time
+from typing import TYPE_CHECKING, Optional, List, Dict
 
-from ..core.camera import Camera
-from ..core.detection import Detector
-from ..core.recording import VideoRecorder
+from ..core import models
 from ..utils.config import Config
-from ..utils.video import frame_to_tkimage, resize_frame
-from .wizard import SetupWizard
-from .settings import SettingsDialog
+from ..utils import threads
 from ..utils.app_info import (
     APP_NAME, APP_VERSION, APP_DESCRIPTION,
     COMPANY_NAME, COPYRIGHT_TEXT,
@@ -25,20 +21,39 @@ from ..utils.app_info import (
     DESCRIPTION_WRAP_LENGTH
 )
 
+# The capture and detection stack (cv2, NumPy, Pillow) and the dialogs are
+# imported lazily so the window can paint before they finish loading.
+if TYPE_CHECKING:
+    from ..core.framebus import Subscriber
+    from ..core.pipeline import Pipeline
+    from ..core.supervisor import Supervisor
+    from ..utils.video import DisplayRateLimiter, GridCompositor
+
 class MainWindow:
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, config_file: str = "~/.watchtower_config.json"):
         self.root = root
         self.root.title("Watchtower")
         
         # Initialize components
-        self.config = Config()
-        self.camera: Optional[Camera] = None
-        self.detector: Optional[Detector] = None
-        self.recorder: Optional[VideoRecorder] = None
+        self.config = Config(config_file)
+        
+        # BLAS threads must be limited before NumPy is first imported
+        threads.apply_blas_env(threads.policy_from_config(self.config))
+        self.pipeline: Optional[Pipeline] = None
+        self.last_frame = None  # Latest preview, for the zone editor
+        
+        # Grid view: one worker process per configured camera
+        self.supervisor: Optional[Supervisor] = None
+        self.grid: Optional[GridCompositor] = None
+        self.grid_limiter: Optional[DisplayRateLimiter] = None
+        self.grid_tiles: Dict[str, int] = {}
+        self.grid_readers: Dict[str, Subscriber] = {}
         
         # State variables
         self.running = False
         self.update_job: Optional[str] = None
+        self.metrics = None
+        self.next_metrics = 0.0
         
         # Create GUI
         self._create_menu()
@@ -47,6 +62,9 @@ class MainWindow:
         # Bind keyboard shortcuts
         self._bind_shortcuts()
         
+        # Load OpenCV and the face model while the window paints
+        self.preload_thread = models.preload_async()
+        
         # Check first run
         if not self.config.config_file.exists():
             self._run_first_time_wizard()
@@ -81,6 +99,11 @@ class MainWindow:
                                 command=self._toggle_fullscreen)
         view_menu.add_checkbutton(label="Background Mode",
                                 command=self._toggle_background)
+        view_menu.add_separator()
+        self.profiling_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Profile Frame Loop",
+                                variable=self.profiling_var,
+                                command=self._toggle_profiling)
         
         # Camera menu
         camera_menu = tk.Menu(menubar, tearoff=0)
@@ -146,8 +169,8 @@ class MainWindow:
         
         self.detection_list.bind("<Double-Button-1>", self._open_selected_clip)
         
-        # Detection storage
-        self.detections: List[Dict[str, str]] = []
+        # Detection storage; each clip lists the triggers merged into it
+        self.detections: List[Dict] = []
 
     def _bind_shortcuts(self):
         """Bind keyboard shortcuts."""
@@ -169,36 +192,44 @@ class MainWindow:
         if self.running:
             return
             
-        # Initialize camera
-        self.camera = Camera(self.config.camera_index)
-        if not self.camera.open():
+        # Several cameras run in worker processes, shown as a grid
+        if len(self.config.cameras) > 1:
+            self._start_grid()
+            return
+            
+        from ..core.pipeline import Pipeline
+            
+        # OpenCV threads and CPU affinity for this pipeline
+        thread_policy = threads.policy_from_config(self.config)
+        threads.apply_policy(thread_policy)
+            
+        # Camera, detector and recorder
+        self.pipeline = Pipeline(self.config, display=self._show_frame,
+                                 thread_policy=thread_policy)
+        if not self.pipeline.open():
+            self.pipeline = None
             messagebox.showerror(
                 "Error",
                 "Could not open webcam. Please check if it's connected and not in use."
             )
             return
-            
-        # Initialize detector
-        self.detector = Detector(self.config.min_motion_area)
-        
-        # Initialize recorder
-        self.recorder = VideoRecorder(
-            self.config.output_folder,
-            self.camera.frame_width,
-            self.camera.frame_height,
-            self.camera.fps,
-            self.config.pre_buffer_seconds,
-            self.config.post_buffer_seconds
-        )
+        camera = self.pipeline.camera
+        if self.profiling_var.get():
+            self.pipeline.start_profiling()
+        else:
+            self.profiling_var.set(self.pipeline.profiler is not None)
         
-        # Start master recording if enabled
-        if self.config.always_record:
-            self.recorder.start_master_recording()
+        # Optional Prometheus endpoint / textfile
+        from ..utils.metrics import exporter_from_config
+        self.metrics = exporter_from_config(self.config)
         
         self.running = True
         self.start_btn.config(state="disabled")
         self.stop_btn.config(state="normal")
-        self.status_var.set("Running")
+        self.status_var.set(
+            f"Running – {camera.frame_width}x{camera.frame_height} "
+            f"{camera.fourcc or 'default format'} @ {camera.fps:.0f} fps"
+        )
         
         # Start frame processing
         self._process_frame()
@@ -214,15 +245,18 @@ class MainWindow:
             self.update_job = None
             
         # Release resources
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-            
-        if self.recorder:
-            self.recorder.release()
-            self.recorder = None
-            
-        self.detector = None
+        if self.pipeline:
+            self.pipeline.close()
+            self.pipeline = None
+        if self.metrics:
+            self.metrics.stop()
+            self.metrics = None
+        if self.supervisor:
+            for name in list(self.grid_readers):
+                self._close_grid_reader(name)
+            self.supervisor.stop()
+            self.supervisor = None
+            self.grid = None
         
         # Update UI
         self.video_label.configure(image="")
@@ -232,45 +266,124 @@ class MainWindow:
 
     def _process_frame(self):
         """Process a single frame."""
-        if not self.running or not self.camera or not self.detector or not self.recorder:
+        if not self.running or not self.pipeline:
             return
             
-        # Read frame
-        ret, frame = self.camera.read_frame()
-        if not ret:
-            self.status_var.set("Failed to grab frame")
-            self.stop()
+        output = self.pipeline.process()
+        self._handle_pipeline_events()
+        if self.metrics and time.monotonic() >= self.next_metrics:
+            # The exporter renders on its own threads; this only hands over
+            self.metrics.update(self.pipeline.name, self.pipeline.get_stats())
+            self.next_metrics = time.monotonic() + 1.0
+        if output is None:
+            if self.pipeline.ended:
+                self.stop()
+                self.status_var.set("Replay finished")
+                return
+            # Keep the detector and recorder alive while the camera recovers
+            self.update_job = self.root.after(
+                100 if self.pipeline.reconnecting else 10, self._process_frame)
             return
-            
-        # Process frame
-        processed_frame, motion_detected, faces_detected = self.detector.process_frame(
-            frame,
-            self.config.debug_mode
-        )
         
-        # Handle recording
-        was_recording = self.recorder.is_recording
-        self.recorder.add_frame(
-            processed_frame,
-            motion_detected or faces_detected,
-            timestamp=True
-        )
+        # Schedule next frame
+        self.update_job = self.root.after(1, self._process_frame)
+
+    def _start_grid(self):
+        """Start one worker per camera and show their previews as a grid."""
+        from ..core.supervisor import Supervisor, PREVIEW_FPS, camera_sections
+        from ..utils.video import DisplayRateLimiter, GridCompositor
+        
+        # Workers read their settings from the config file
+        self.config.save()
+        sections = camera_sections(self.config)
+        self.grid_tiles = {section["name"]: index
+                           for index, section in enumerate(sections)}
+        self.grid = GridCompositor(len(sections))
+        self.grid_limiter = DisplayRateLimiter(PREVIEW_FPS)
+        self.supervisor = Supervisor(self.config, preview=True)
+        self.supervisor.start()
         
-        # Log new detections
-        if not was_recording and self.recorder.is_recording:
-            # A new recording has started
-            timestamp_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            filename = self.recorder.current_recording_file
-            if filename:  # Make sure we have a valid filename
-                self.detections.append({
-                    "timestamp": timestamp_str,
-                    "filename": filename
-                })
-                self.detection_list.insert(tk.END, f"{timestamp_str} – {Path(filename).name}")
-                # Auto-scroll to the latest detection
-                self.detection_list.see(tk.END)
-        
-        # Convert for display
+        self.running = True
+        self.start_btn.config(state="disabled")
+        self.stop_btn.config(state="normal")
+        self.status_var.set(f"Running – {len(sections)} cameras")
+        self._update_grid()
+
+    def _update_grid(self):
+        """Copy new worker previews into their tiles and draw the grid."""
+        if not self.running or not self.supervisor:
+            return
+            
+        for name, event, info in self.supervisor.poll(timeout=0):
+            self._handle_worker_event(name, event, info)
+            
+        # Only cameras with a new frame are redrawn into the composite
+        for name, reader in list(self.grid_readers.items()):
+            slot = reader.get(timeout=0)
+            if slot is not None:
+                with slot:
+                    self.grid.update_tile(self.grid_tiles[name], slot.frame)
+            elif reader.bus.closed:
+                self._close_grid_reader(name)
+                
+        # One Tk image per display tick, however many cameras updated
+        if self.grid.changed and self.grid_limiter.ready():
+            self.grid.changed = False
+            self._show_frame(self.grid.composite)
+            
+        self.update_job = self.root.after(10, self._update_grid)
+
+    def _handle_worker_event(self, name: str, event: str, info: Dict):
+        """Attach to worker previews and report worker events."""
+        from ..core.framebus import FrameBus
+        from ..core.pipeline import CLIP_STARTED, CLIP_EXTENDED
+        from ..core.supervisor import (
+            WORKER_STARTED, WORKER_FAILED, WORKER_RESTARTING, PREVIEW_CONSUMER
+        )
+        from ..core.scene import SCENE_TAMPERED, SCENE_RESTORED
+        from ..core.watchdog import CAMERA_LOST, CAMERA_RESTORED
+        
+        if event == WORKER_STARTED and info.get("preview_bus"):
+            self._close_grid_reader(name)
+            try:
+                bus = FrameBus.attach(info["preview_bus"])
+            except FileNotFoundError:
+                return  # The worker already exited
+            self.grid_readers[name] = bus.subscribe(PREVIEW_CONSUMER)
+        elif event == CLIP_STARTED:
+            self._log_detection(info["time"], info["file"])
+        elif event == CLIP_EXTENDED:
+            self._log_trigger(info["time"], info["file"])
+        elif event == CAMERA_LOST:
+            self.status_var.set(f"{name}: camera lost – reconnecting…")
+        elif event == CAMERA_RESTORED:
+            self.status_var.set(
+                f"{name}: camera reconnected after {info['gap_seconds']:.1f}s")
+        elif event == SCENE_TAMPERED:
+            self.status_var.set(f"{name}: camera view blocked or out of focus!")
+        elif event == SCENE_RESTORED:
+            self.status_var.set(f"{name}: camera view restored")
+        elif event == WORKER_FAILED:
+            self.status_var.set(f"{name}: {info['reason']}")
+        elif event == WORKER_RESTARTING:
+            self._close_grid_reader(name)
+            self.status_var.set(
+                f"{name}: stopped, restarting in {info['delay']:.0f}s")
+
+    def _close_grid_reader(self, name: str):
+        """Detach from a worker's preview and blank its tile."""
+        reader = self.grid_readers.pop(name, None)
+        if reader is None:
+            return
+        reader.close()
+        reader.bus.close()
+        self.grid.clear_tile(self.grid_tiles[name])
+
+    def _show_frame(self, processed_frame):
+        """Draw a BGR frame in the preview."""
+        from ..utils.video import frame_to_tkimage, resize_frame
+        if self.pipeline:
+            self.last_frame = processed_frame
         if self.config.fullscreen:
             # Scale to window size
             window_width = self.root.winfo_width()
@@ -284,12 +397,76 @@ class MainWindow:
         display_image = frame_to_tkimage(processed_frame)
         self.video_label.imgtk = display_image
         self.video_label.configure(image=display_image)
+
+    def _handle_pipeline_events(self):
+        """Show pipeline events in the status bar and the detection list."""
+        from ..core.pipeline import CLIP_STARTED, CLIP_EXTENDED, QUALITY_CHANGED
+        from ..core.adaptive import ACTIVITY_IDLE, ACTIVITY_ACTIVE
+        from ..core.scene import SCENE_LIGHTING, SCENE_TAMPERED, SCENE_RESTORED
+        from ..core.watchdog import (
+            CAMERA_LOST, CAMERA_RESTORED, CAMERA_FROZEN, CAMERA_UNFROZEN
+        )
         
-        # Schedule next frame
-        self.update_job = self.root.after(1, self._process_frame)
+        camera = self.pipeline.camera
+        for event, info in self.pipeline.pop_events():
+            if event == CLIP_STARTED:
+                self._log_detection(info["time"], info["file"])
+            elif event == CLIP_EXTENDED:
+                self._log_trigger(info["time"], info["file"])
+            elif event == CAMERA_LOST:
+                self.status_var.set("Camera lost – reconnecting…")
+            elif event == CAMERA_RESTORED:
+                self.status_var.set(
+                    f"Camera reconnected after {info['gap_seconds']:.1f}s")
+            elif event == CAMERA_FROZEN:
+                self.status_var.set("Camera frozen – the picture is not changing")
+            elif event == CAMERA_UNFROZEN:
+                self.status_var.set(f"Camera recovered after {info['seconds']:.1f}s")
+            elif event == SCENE_LIGHTING:
+                self.status_var.set("Lighting changed – relearning the background")
+            elif event == SCENE_TAMPERED:
+                self.status_var.set("Camera view blocked or out of focus!")
+            elif event == SCENE_RESTORED:
+                self.status_var.set("Camera view restored")
+            elif event == ACTIVITY_IDLE:
+                width, height = info["detection_size"]
+                self.status_var.set(
+                    f"Idle – {info['fps']:.0f} fps, detecting at {width}x{height}")
+            elif event == QUALITY_CHANGED:
+                self.status_var.set(info["message"])
+            elif event == ACTIVITY_ACTIVE:
+                self.status_var.set(
+                    f"Running – {camera.frame_width}x{camera.frame_height} "
+                    f"@ {camera.fps:.0f} fps")
+
+    def _log_detection(self, timestamp_str: str, filename: Optional[str]):
+        """Add a new recording to the detection list."""
+        if filename:  # Make sure we have a valid filename
+            self.detections.append({
+                "timestamp": timestamp_str,
+                "filename": filename,
+                "triggers": [timestamp_str]
+            })
+            self.detection_list.insert(tk.END, f"{timestamp_str} – {Path(filename).name}")
+            # Auto-scroll to the latest detection
+            self.detection_list.see(tk.END)
+
+    def _log_trigger(self, timestamp_str: str, filename: Optional[str]):
+        """Record a new trigger merged into an already listed clip."""
+        for idx in range(len(self.detections) - 1, -1, -1):
+            det = self.detections[idx]
+            if det["filename"] != filename:
+                continue
+            det["triggers"].append(timestamp_str)
+            self.detection_list.delete(idx)
+            self.detection_list.insert(
+                idx, f"{det['timestamp']} – {Path(filename).name} "
+                     f"({len(det['triggers'])} triggers)")
+            return
 
     def _run_first_time_wizard(self):
         """Run the first-time setup wizard."""
+        from .wizard import SetupWizard
         wizard = SetupWizard(self.root)
         self.root.wait_window(wizard.window)
         
@@ -308,7 +485,8 @@ class MainWindow:
 
     def _show_settings(self):
         """Show the settings dialog."""
-        dialog = SettingsDialog(self.root, self.config)
+        from .settings import SettingsDialog
+        dialog = SettingsDialog(self.root, self.config, self.last_frame)
         self.root.wait_window(dialog.window)
 
     def _show_shortcuts(self):
@@ -407,6 +585,7 @@ class MainWindow:
                      padding=5).pack()
             
             # Open in browser
+            import webbrowser
             webbrowser.open(DEV_LINK)
             
             # Destroy tooltip after 2 seconds
@@ -443,9 +622,10 @@ class MainWindow:
             import csv
             with open(filepath, "w", newline="", encoding="utf-8") as f:
                 writer = csv.writer(f)
-                writer.writerow(["Timestamp", "Filename"])
+                writer.writerow(["Timestamp", "Filename", "Triggers"])
                 for det in self.detections:
-                    writer.writerow([det["timestamp"], det["filename"]])
+                    writer.writerow([det["timestamp"], det["filename"],
+                                     "; ".join(det["triggers"])])
             messagebox.showinfo("Export Log", f"Log exported to {filepath}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export log:\n{e}")
@@ -487,6 +667,21 @@ class MainWindow:
             f"Debug mode {'enabled' if self.config.debug_mode else 'disabled'}"
         )
 
+    def _toggle_profiling(self):
+        """Start or stop sampling the frame loop."""
+        if not self.pipeline:
+            # Takes effect when the camera starts
+            state = "on" if self.profiling_var.get() else "off"
+            self.status_var.set(f"Profiling {state}")
+            return
+        if self.profiling_var.get():
+            self.pipeline.start_profiling()
+            self.status_var.set("Profiling the frame loop")
+        else:
+            reports = self.pipeline.stop_profiling()
+            if reports:
+                self.status_var.set(f"Profile written to {Path(reports[0]).parent}")
+
     def _toggle_fullscreen(self):
         """Toggle fullscreen mode."""
         self.config.fullscreen = not self.config.fullscreen
@@ -5,13 +5,19 @@ from tkinter import ttk, filedialog
 from pathlib import Path
 
 from ..utils.config import Config
-from ..core.camera import Camera
+from ..core.discovery import CameraDiscovery
+
+NO_CAMERAS = "No cameras found"
+SEARCHING = "Searching for cameras..."
+DEFAULT_MODE = "Default"
+RESOLUTIONS = [DEFAULT_MODE, "640x480", "1280x720", "1920x1080"]
+FORMATS = [DEFAULT_MODE, "MJPG", "YUYV"]
 
 class SettingsDialog:
-    def __init__(self, parent: tk.Tk, config: Config):
+    def __init__(self, parent: tk.Tk, config: Config, snapshot=None):
         self.window = tk.Toplevel(parent)
         self.window.title("Settings")
-        self.window.geometry("400x500")
+        self.window.geometry("400x840")
         self.window.resizable(False, False)
         self.window.transient(parent)
         self.window.grab_set()  # Make window modal
@@ -25,6 +31,13 @@ class SettingsDialog:
         self.window.geometry(f'+{x}+{y}')
         
         self.config = config
+        self.discovery = CameraDiscovery()
+        self.probe_result = None
+        
+        # Zones are edited in their own dialog and saved with the rest
+        self.snapshot = snapshot
+        self.roi_polygons = list(config.roi_polygons)
+        self.exclusion_polygons = list(config.exclusion_polygons)
         self._create_widgets()
         
     def _create_widgets(self):
@@ -37,7 +50,23 @@ class SettingsDialog:
         self.camera_combo = ttk.Combobox(camera_frame, width=30, state="readonly")
         self.camera_combo.grid(row=0, column=1, padx=5)
         ttk.Button(camera_frame, text="Refresh",
-                  command=self._refresh_cameras).grid(row=0, column=2)
+                  command=lambda: self._refresh_cameras(force=True)).grid(row=0, column=2)
+        
+        ttk.Label(camera_frame, text="Resolution:").grid(row=1, column=0, sticky="w")
+        self.resolution = tk.StringVar(value=self._format_resolution())
+        self.resolution_combo = ttk.Combobox(camera_frame, textvariable=self.resolution,
+                                           values=RESOLUTIONS, width=12)
+        self.resolution_combo.grid(row=1, column=1, padx=5, sticky="w")
+        
+        ttk.Label(camera_frame, text="Format:").grid(row=2, column=0, sticky="w")
+        self.fourcc = tk.StringVar(value=self.config.capture_fourcc or DEFAULT_MODE)
+        ttk.Combobox(camera_frame, textvariable=self.fourcc, values=FORMATS,
+                    width=12).grid(row=2, column=1, padx=5, sticky="w")
+        
+        ttk.Label(camera_frame, text="Frame rate (0 = default):").grid(row=3, column=0, sticky="w")
+        self.capture_fps = tk.StringVar(value=str(self.config.capture_fps))
+        ttk.Entry(camera_frame, textvariable=self.capture_fps,
+                 width=6).grid(row=3, column=1, padx=5, sticky="w")
         
         # Detection settings
         detection_frame = ttk.LabelFrame(self.window, text="Detection Settings", padding=10)
@@ -48,6 +77,27 @@ class SettingsDialog:
         ttk.Entry(detection_frame, textvariable=self.motion_area,
                  width=10).grid(row=0, column=1, padx=5)
         
+        ttk.Label(detection_frame, text="Detection width (0 = full):").grid(row=1, column=0, sticky="w")
+        self.detection_width = tk.StringVar(value=str(self.config.detection_width))
+        ttk.Entry(detection_frame, textvariable=self.detection_width,
+                 width=10).grid(row=1, column=1, padx=5)
+        
+        ttk.Label(detection_frame, text="Idle mode after (s, 0 = off):").grid(row=2, column=0, sticky="w")
+        self.idle_seconds = tk.StringVar(value=str(self.config.idle_seconds))
+        ttk.Entry(detection_frame, textvariable=self.idle_seconds,
+                 width=10).grid(row=2, column=1, padx=5)
+        
+        ttk.Label(detection_frame, text="Confirm objects over (frames):").grid(row=3, column=0, sticky="w")
+        self.confirm_frames = tk.StringVar(value=str(self.config.confirm_frames))
+        ttk.Entry(detection_frame, textvariable=self.confirm_frames,
+                 width=10).grid(row=3, column=1, padx=5)
+        
+        ttk.Button(detection_frame, text="Detection Zones...",
+                  command=self._edit_zones).grid(row=4, column=0, sticky="w", pady=(5, 0))
+        self.zones_summary = tk.StringVar(value=self._zones_summary())
+        ttk.Label(detection_frame, textvariable=self.zones_summary).grid(
+            row=4, column=1, padx=5, pady=(5, 0), sticky="w")
+        
         # Recording settings
         recording_frame = ttk.LabelFrame(self.window, text="Recording Settings", padding=10)
         recording_frame.pack(fill="x", padx=10, pady=5)
@@ -62,6 +112,21 @@ class SettingsDialog:
         ttk.Entry(recording_frame, textvariable=self.post_buffer,
                 width=5).grid(row=1, column=1, padx=5)
         
+        ttk.Label(recording_frame, text="Idle master rate (fps, 0 = full):").grid(row=2, column=0, sticky="w")
+        self.master_idle_fps = tk.StringVar(value=str(self.config.master_idle_fps))
+        ttk.Entry(recording_frame, textvariable=self.master_idle_fps,
+                width=5).grid(row=2, column=1, padx=5)
+        
+        ttk.Label(recording_frame, text="Merge clips within (s, 0 = off):").grid(row=3, column=0, sticky="w")
+        self.coalesce_seconds = tk.StringVar(value=str(self.config.coalesce_seconds))
+        ttk.Entry(recording_frame, textvariable=self.coalesce_seconds,
+                width=5).grid(row=3, column=1, padx=5)
+        
+        ttk.Label(recording_frame, text="Minimum clip length (s):").grid(row=4, column=0, sticky="w")
+        self.min_clip_seconds = tk.StringVar(value=str(self.config.min_clip_seconds))
+        ttk.Entry(recording_frame, textvariable=self.min_clip_seconds,
+                width=5).grid(row=4, column=1, padx=5)
+        
         # Storage settings
         storage_frame = ttk.LabelFrame(self.window, text="Storage Settings", padding=10)
         storage_frame.pack(fill="x", padx=10, pady=5)
@@ -81,6 +146,14 @@ class SettingsDialog:
         ttk.Checkbutton(options_frame, text="Always record (master clip)",
                       variable=self.always_record).pack(anchor="w")
         
+        self.capture_yuv = tk.BooleanVar(value=self.config.capture_yuv)
+        ttk.Checkbutton(options_frame, text="YUV capture (needs an uncompressed format)",
+                      variable=self.capture_yuv).pack(anchor="w")
+        
+        self.quality_governor = tk.BooleanVar(value=self.config.quality_governor)
+        ttk.Checkbutton(options_frame, text="Lower detection quality when overloaded",
+                      variable=self.quality_governor).pack(anchor="w")
+        
         self.debug_mode = tk.BooleanVar(value=self.config.debug_mode)
         ttk.Checkbutton(options_frame, text="Debug mode",
                       variable=self.debug_mode).pack(anchor="w")
@@ -97,13 +170,37 @@ class SettingsDialog:
         # Initialize camera list
         self._refresh_cameras()
         
-    def _refresh_cameras(self):
-        """Refresh the list of available cameras."""
-        cameras = []
-        available_cameras = Camera.list_cameras()
+    def _refresh_cameras(self, force: bool = False):
+        """Refresh the list of available cameras without blocking the dialog."""
+        devices = None if force else self.discovery.cached()
+        if devices is not None:
+            self._show_cameras(sorted(devices))
+            return
+            
+        # Probe in the background and poll for the result from the Tk thread
+        self.camera_combo['values'] = [SEARCHING]
+        self.camera_combo.current(0)
+        self.probe_result = None
+        self.discovery.probe_async(self._on_probe_done)
+        self.window.after(100, self._poll_probe)
         
+    def _on_probe_done(self, devices):
+        """Store probe results (called from the discovery thread)."""
+        self.probe_result = sorted(devices)
+        
+    def _poll_probe(self):
+        """Show probe results once the background probe has finished."""
+        if not self.window.winfo_exists():
+            return
+        if self.probe_result is None:
+            self.window.after(100, self._poll_probe)
+            return
+        self._show_cameras(self.probe_result)
+        
+    def _show_cameras(self, available_cameras):
+        """Fill the camera list and select the configured camera."""
         if not available_cameras:
-            cameras = ["No cameras found"]
+            cameras = [NO_CAMERAS]
         else:
             cameras = [f"Camera {i}" for i in available_cameras]
         
@@ -111,8 +208,51 @@ class SettingsDialog:
         
         # Select current camera
         current_camera = self.config.camera_index
-        if current_camera < len(cameras) and cameras[0] != "No cameras found":
-            self.camera_combo.current(current_camera)
+        if current_camera in available_cameras:
+            self.camera_combo.current(available_cameras.index(current_camera))
+        else:
+            self.camera_combo.current(0)
+            
+        # Offer the modes the selected camera is known to support
+        info = self.discovery.get(self.config.camera_index)
+        if info and info.get("resolutions"):
+            self.resolution_combo['values'] = [DEFAULT_MODE] + [
+                f"{w}x{h}" for w, h in info["resolutions"]
+            ]
+            
+    def _format_resolution(self) -> str:
+        """Format the configured capture resolution for display."""
+        if self.config.capture_width and self.config.capture_height:
+            return f"{self.config.capture_width}x{self.config.capture_height}"
+        return DEFAULT_MODE
+        
+    def _parse_resolution(self):
+        """Parse the resolution field into (width, height), 0 for default."""
+        value = self.resolution.get().strip()
+        if value in ("", DEFAULT_MODE):
+            return 0, 0
+        width, height = (int(v) for v in value.lower().split("x"))
+        if width <= 0 or height <= 0:
+            raise ValueError("Resolution must be positive")
+        return width, height
+            
+    def _zones_summary(self) -> str:
+        """Describe the configured zones in a few words."""
+        if not self.roi_polygons and not self.exclusion_polygons:
+            return "Whole frame"
+        return (f"{len(self.roi_polygons)} watched, "
+                f"{len(self.exclusion_polygons)} ignored")
+        
+    def _edit_zones(self):
+        """Open the zone editor on the latest camera frame."""
+        from .zones import ZoneEditor
+        editor = ZoneEditor(self.window, self.roi_polygons,
+                            self.exclusion_polygons, self.snapshot)
+        self.window.wait_window(editor.window)
+        self.window.grab_set()  # The editor took the modal grab
+        if editor.result is not None:
+            self.roi_polygons, self.exclusion_polygons = editor.result
+            self.zones_summary.set(self._zones_summary())
             
     def _browse_folder(self):
         """Browse for output folder."""
@@ -136,6 +276,24 @@ class SettingsDialog:
             post_buffer = int(self.post_buffer.get())
             if pre_buffer < 0 or post_buffer < 0:
                 raise ValueError("Buffer values must be non-negative")
+            if float(self.master_idle_fps.get()) < 0:
+                raise ValueError("Idle master rate must be non-negative")
+            if float(self.coalesce_seconds.get()) < 0 or float(self.min_clip_seconds.get()) < 0:
+                raise ValueError("Clip merge window and length must be non-negative")
+                
+            # Validate capture mode
+            try:
+                self._parse_resolution()
+            except ValueError:
+                raise ValueError("Resolution must look like 1280x720")
+            if float(self.capture_fps.get()) < 0:
+                raise ValueError("Frame rate must be non-negative")
+            if int(self.detection_width.get()) < 0:
+                raise ValueError("Detection width must be non-negative")
+            if float(self.idle_seconds.get()) < 0:
+                raise ValueError("Idle time must be non-negative")
+            if int(self.confirm_frames.get()) < 1:
+                raise ValueError("Confirmation frames must be at least 1")
                 
             # Validate output folder
             output_path = Path(self.output_folder.get())
@@ -160,14 +318,30 @@ class SettingsDialog:
             return
             
         # Update config
-        if self.camera_combo.get() != "No cameras found":
+        if self.camera_combo.get() not in (NO_CAMERAS, SEARCHING):
             self.config.camera_index = int(self.camera_combo.get().split()[-1])
             
+        width, height = self._parse_resolution()
+        self.config.capture_width = width
+        self.config.capture_height = height
+        fourcc = self.fourcc.get().strip().upper()
+        self.config.capture_fourcc = "" if fourcc in ("", DEFAULT_MODE.upper()) else fourcc
+        self.config.capture_fps = float(self.capture_fps.get())
+        self.config.detection_width = int(self.detection_width.get())
+        self.config.idle_seconds = float(self.idle_seconds.get())
+        self.config.confirm_frames = int(self.confirm_frames.get())
+        self.config.roi_polygons = self.roi_polygons
+        self.config.exclusion_polygons = self.exclusion_polygons
         self.config.min_motion_area = int(self.motion_area.get())
         self.config.pre_buffer_seconds = int(self.pre_buffer.get())
         self.config.post_buffer_seconds = int(self.post_buffer.get())
+        self.config.master_idle_fps = float(self.master_idle_fps.get())
+        self.config.coalesce_seconds = float(self.coalesce_seconds.get())
+        self.config.min_clip_seconds = float(self.min_clip_seconds.get())
         self.config.output_folder = self.output_folder.get()
         self.config.always_record = self.always_record.get()
+        self.config.capture_yuv = self.capture_yuv.get()
+        self.config.quality_governor = self.quality_governor.get()
         self.config.debug_mode = self.debug_mode.get()
         
         # Save to file
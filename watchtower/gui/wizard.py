@@ -7,8 +7,12 @@ import cv2
 from typing import Optional, Dict, Any
 
 from ..core.camera import Camera
+from ..core.discovery import CameraDiscovery
 from ..utils.video import frame_to_tkimage
 
+NO_CAMERAS = "No cameras found"
+SEARCHING = "Searching for cameras..."
+
 class SetupWizard:
     def __init__(self, parent: tk.Tk):
         self.window = tk.Toplevel(parent)
@@ -35,6 +39,10 @@ class SetupWizard:
         self.preview_running = False
         self.preview_cap: Optional[Camera] = None
         
+        # Camera discovery state
+        self.discovery = CameraDiscovery()
+        self.probe_result = None
+        
         # Result storage
         self.result: Optional[Dict[str, Any]] = None
         
@@ -96,7 +104,8 @@ Click Next to begin."""
         ttk.Label(camera_select_frame, text="Select Camera:").pack(side="left")
         self.camera_combo = ttk.Combobox(camera_select_frame, width=20, state="readonly")
         self.camera_combo.pack(side="left", padx=5)
-        ttk.Button(camera_select_frame, text="Refresh", command=self._refresh_cameras).pack(side="left", padx=5)
+        ttk.Button(camera_select_frame, text="Refresh",
+                  command=lambda: self._refresh_cameras(force=True)).pack(side="left", padx=5)
         ttk.Button(camera_select_frame, text="Test", command=self._test_camera).pack(side="left", padx=5)
         
         self.frames.append(frame)
@@ -201,13 +210,42 @@ Click Next to begin."""
         if self.current_step > 0:
             self.show_step(self.current_step - 1)
             
-    def _refresh_cameras(self):
-        """Refresh the list of available cameras."""
-        cameras = []
-        available_cameras = Camera.list_cameras()
+    def _refresh_cameras(self, force: bool = False):
+        """Refresh the list of available cameras without blocking the wizard."""
+        devices = None if force else self.discovery.cached()
+        if devices is not None:
+            self._show_cameras(sorted(devices))
+            return
+            
+        # A device held open by the preview cannot be probed
+        if self.preview_cap is not None:
+            self.preview_cap.release()
+            self.preview_cap = None
+            
+        # Probe in the background and poll for the result from the Tk thread
+        self.camera_combo['values'] = [SEARCHING]
+        self.camera_combo.current(0)
+        self.probe_result = None
+        self.discovery.probe_async(self._on_probe_done)
+        self.window.after(100, self._poll_probe)
+        
+    def _on_probe_done(self, devices):
+        """Store probe results (called from the discovery thread)."""
+        self.probe_result = sorted(devices)
+        
+    def _poll_probe(self):
+        """Show probe results once the background probe has finished."""
+        if not self.window.winfo_exists():
+            return
+        if self.probe_result is None:
+            self.window.after(100, self._poll_probe)
+            return
+        self._show_cameras(self.probe_result)
         
+    def _show_cameras(self, available_cameras):
+        """Fill the camera list and select the first camera."""
         if not available_cameras:
-            cameras = ["No cameras found"]
+            cameras = [NO_CAMERAS]
             messagebox.showwarning(
                 "No Cameras",
                 "No working cameras were detected.\nPlease connect a camera and click Refresh."
@@ -216,8 +254,8 @@ Click Next to begin."""
             cameras = [f"Camera {i}" for i in available_cameras]
         
         self.camera_combo['values'] = cameras
-        if cameras[0] != "No cameras found":
-            self.camera_combo.current(0)
+        self.camera_combo.current(0)
+        if cameras[0] != NO_CAMERAS:
             self.selected_camera.set(available_cameras[0])
             
     def _start_camera_preview(self):
@@ -238,8 +276,11 @@ Click Next to begin."""
         if not self.preview_running:
             return
             
-        if self.camera_combo.get().startswith("No cameras"):
-            self._stop_camera_preview()
+        if self.camera_combo.get() in (NO_CAMERAS, SEARCHING, ""):
+            # Keep polling so the preview starts once a camera is found
+            if self.preview_cap is not None:
+                self.preview_cap.release()
+                self.preview_cap = None
             self.preview_label.configure(image="")
             self.window.after(1000, self._update_preview)
             return
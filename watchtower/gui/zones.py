@@ -0,0 +1,155 @@
+"""Detection zone editor module."""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import List, Optional, Tuple
+
+CANVAS_WIDTH = 480
+CANVAS_HEIGHT = 270
+ROI_COLOR = "#2ecc40"
+EXCLUSION_COLOR = "#ff4136"
+ROI = "roi"
+EXCLUSION = "exclusion"
+
+Polygon = List[List[float]]
+
+class ZoneEditor:
+    """
+    Draw detection (ROI) and ignored (exclusion) polygons over a camera
+    snapshot. Click to add points; double-click or "Close shape" finishes a
+    polygon. Coordinates are stored as fractions of the frame size, so the
+    zones hold for any capture or detection resolution.
+    """
+
+    def __init__(self, parent: tk.Misc, roi_polygons: List[Polygon],
+                 exclusion_polygons: List[Polygon], snapshot=None):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Detection Zones")
+        self.window.resizable(False, False)
+        self.window.transient(parent)
+        self.window.grab_set()  # Make window modal
+
+        self.polygons = {
+            ROI: [list(map(list, p)) for p in roi_polygons],
+            EXCLUSION: [list(map(list, p)) for p in exclusion_polygons]
+        }
+        self.points: List[List[float]] = []
+        self.result: Optional[Tuple[List[Polygon], List[Polygon]]] = None
+        self.image = self._snapshot_image(snapshot)
+
+        self._create_widgets()
+        self._redraw()
+
+    def _snapshot_image(self, snapshot):
+        """Scale a BGR snapshot to the canvas as a Tk image."""
+        if snapshot is None:
+            return None
+        from ..utils.video import frame_to_tkimage
+        import cv2
+        small = cv2.resize(snapshot, (CANVAS_WIDTH, CANVAS_HEIGHT),
+                           interpolation=cv2.INTER_AREA)
+        return frame_to_tkimage(small)
+
+    def _create_widgets(self):
+        """Create the editor widgets."""
+        self.mode = tk.StringVar(value=ROI)
+        mode_frame = ttk.Frame(self.window)
+        mode_frame.pack(fill="x", padx=10, pady=(10, 5))
+        ttk.Radiobutton(mode_frame, text="Detection area", value=ROI,
+                       variable=self.mode).pack(side="left")
+        ttk.Radiobutton(mode_frame, text="Ignored area", value=EXCLUSION,
+                       variable=self.mode).pack(side="left", padx=10)
+
+        self.canvas = tk.Canvas(self.window, width=CANVAS_WIDTH,
+                                height=CANVAS_HEIGHT, background="#333333",
+                                highlightthickness=0, cursor="crosshair")
+        self.canvas.pack(padx=10)
+        self.canvas.bind("<Button-1>", self._add_point)
+        self.canvas.bind("<Double-Button-1>", lambda e: self._close_shape())
+
+        ttk.Label(self.window,
+                 text="Click to add points, double-click to close the shape. "
+                      "Without a detection area the whole frame is watched."
+                 ).pack(padx=10, pady=5, anchor="w")
+
+        edit_frame = ttk.Frame(self.window)
+        edit_frame.pack(fill="x", padx=10)
+        ttk.Button(edit_frame, text="Close shape",
+                  command=self._close_shape).pack(side="left")
+        ttk.Button(edit_frame, text="Undo point",
+                  command=self._undo_point).pack(side="left", padx=5)
+        ttk.Button(edit_frame, text="Remove last shape",
+                  command=self._remove_shape).pack(side="left")
+        ttk.Button(edit_frame, text="Clear all",
+                  command=self._clear).pack(side="left", padx=5)
+
+        btn_frame = ttk.Frame(self.window)
+        btn_frame.pack(fill="x", padx=10, pady=10)
+        ttk.Button(btn_frame, text="OK",
+                  command=self._accept).pack(side="right", padx=5)
+        ttk.Button(btn_frame, text="Cancel",
+                  command=self.window.destroy).pack(side="right")
+
+    def _add_point(self, event):
+        """Add a point to the shape being drawn."""
+        x = min(max(event.x / CANVAS_WIDTH, 0.0), 1.0)
+        y = min(max(event.y / CANVAS_HEIGHT, 0.0), 1.0)
+        # A double-click also delivers a single click at the same spot
+        if self.points and self.points[-1] == [round(x, 4), round(y, 4)]:
+            return
+        self.points.append([round(x, 4), round(y, 4)])
+        self._redraw()
+
+    def _close_shape(self):
+        """Finish the current shape as a polygon of the selected kind."""
+        if len(self.points) >= 3:
+            self.polygons[self.mode.get()].append(self.points)
+        self.points = []
+        self._redraw()
+
+    def _undo_point(self):
+        """Remove the last point of the shape being drawn."""
+        if self.points:
+            self.points.pop()
+            self._redraw()
+
+    def _remove_shape(self):
+        """Remove the last finished shape of the selected kind."""
+        shapes = self.polygons[self.mode.get()]
+        if shapes:
+            shapes.pop()
+            self._redraw()
+
+    def _clear(self):
+        """Remove every shape."""
+        self.polygons = {ROI: [], EXCLUSION: []}
+        self.points = []
+        self._redraw()
+
+    def _redraw(self):
+        """Draw the snapshot, the finished shapes and the current one."""
+        self.canvas.delete("all")
+        if self.image is not None:
+            self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+        for kind, color in ((ROI, ROI_COLOR), (EXCLUSION, EXCLUSION_COLOR)):
+            for polygon in self.polygons[kind]:
+                self.canvas.create_polygon(self._to_canvas(polygon),
+                                           outline=color, width=2,
+                                           fill=color, stipple="gray25")
+        if self.points:
+            color = ROI_COLOR if self.mode.get() == ROI else EXCLUSION_COLOR
+            coords = self._to_canvas(self.points)
+            if len(self.points) > 1:
+                self.canvas.create_line(coords, fill=color, width=2, dash=(4, 2))
+            for x, y in zip(coords[::2], coords[1::2]):
+                self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color)
+
+    def _to_canvas(self, points: Polygon) -> List[float]:
+        """Flatten fractional points to canvas coordinates."""
+        return [v for x, y in points for v in (x * CANVAS_WIDTH, y * CANVAS_HEIGHT)]
+
+    def _accept(self):
+        """Keep the shapes and close."""
+        self._close_shape()
+        self.result = (self.polygons[ROI], self.polygons[EXCLUSION])
+        self.window.destroy()
@@ -1,13 +1,142 @@
 """Main entry point for the Webcam Monitor application."""
 
-import tkinter as tk
+import argparse
+import os
 import sys
 from pathlib import Path
+from typing import List, Optional
 
-from .gui.main_window import MainWindow
-
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point."""
+    parser = argparse.ArgumentParser(prog="watchtower", description=__doc__)
+    parser.add_argument("--config", default="~/.watchtower_config.json",
+                        help="configuration file (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true",
+                        help="sample the frame loop and write profiles to the output folder")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("supervise",
+                        help="run every configured camera headless, one process each")
+    scan_parser = commands.add_parser(
+        "scan", help="find motion events in existing master recordings")
+    scan_parser.add_argument("paths", nargs="*",
+                             help="recordings or folders (default: the output folder)")
+    scan_parser.add_argument("--jobs", type=int, default=0,
+                             help="worker processes (default: one per CPU)")
+    scan_parser.add_argument("--chunk-seconds", type=float, default=300.0,
+                             help="longest piece of a file one process scans")
+    scan_parser.add_argument("--overlap-seconds", type=float, default=10.0,
+                             help="background warm-up before each chunk "
+                                  "(at least the model's 500-frame history)")
+    scan_parser.add_argument("--output",
+                             help="write events to this JSONL file (\"-\" for stdout) "
+                                  "instead of the recordings' manifest")
+    tune_parser = commands.add_parser(
+        "tune", help="compare min_motion_area and MOG2 settings on a recorded clip")
+    tune_parser.add_argument("source", nargs="?",
+                             help="video file or image folder (optional with an existing --cache)")
+    tune_parser.add_argument("--thresholds",
+                             help="comma-separated min_motion_area values (default: 500-50000)")
+    tune_parser.add_argument("--history", default="500",
+                             help="comma-separated MOG2 history lengths (default: %(default)s)")
+    tune_parser.add_argument("--var-threshold", default="50",
+                             help="comma-separated MOG2 variance thresholds (default: %(default)s)")
+    tune_parser.add_argument("--shadows", default="on",
+                             help="shadow detection: on, off or on,off (default: %(default)s)")
+    tune_parser.add_argument("--max-frames", type=int, default=0,
+                             help="stop decoding after this many frames")
+    tune_parser.add_argument("--cache",
+                             help="save the decoded blob areas here, or reuse them if it exists")
+    tune_parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    
+    if args.profile:
+        # Through the environment so camera worker processes inherit it
+        from .utils.profiler import PROFILE_ENV
+        os.environ[PROFILE_ENV] = "1"
+        
+    if args.command == "supervise":
+        return supervise(args.config)
+    if args.command == "scan":
+        return scan(args.config, args.paths, args.jobs, args.chunk_seconds,
+                    args.overlap_seconds, args.output)
+    if args.command == "tune":
+        return tune(args.config, args)
+    run_gui(args.config)
+
+def supervise(config_file: str) -> int:
+    """Run the multi-camera supervisor until interrupted."""
+    from .core.supervisor import Supervisor
+    from .utils.config import Config
+    
+    Supervisor(Config(config_file)).run()
+    return 0
+
+def scan(config_file: str, paths: List[str], jobs: int = 0,
+         chunk_seconds: float = 300.0, overlap_seconds: float = 10.0,
+         output: Optional[str] = None) -> int:
+    """Scan master recordings with the configured detector settings."""
+    from .core import scan as scanner
+    from .utils.config import Config
+    
+    config = Config(config_file)
+    files = scanner.find_recordings(paths or [config.output_folder])
+    if not files:
+        print("No master recordings found")
+        return 1
+    results = scanner.scan(files, config, jobs, chunk_seconds, overlap_seconds)
+    if output:
+        count = scanner.write_jsonl(results, output)
+    else:
+        count = scanner.write_manifests(results)
+    print(f"Found {count} events in {len(files)} recordings", file=sys.stderr)
+    return 0
+
+def tune(config_file: str, args: argparse.Namespace) -> int:
+    """Sweep detection settings over a clip, decoding it only once."""
+    import json
+    from .core import tuning
+    from .utils.config import Config
+    
+    config = Config(config_file)
+    if args.cache and Path(args.cache).exists():
+        caches = tuning.load_caches(args.cache)
+    elif args.source:
+        variants = tuning.backgrounds(
+            [int(v) for v in args.history.split(",")],
+            [float(v) for v in args.var_threshold.split(",")],
+            [v.strip().lower() == "on" for v in args.shadows.split(",")])
+        try:
+            caches = tuning.collect(args.source, variants, config, args.max_frames)
+        except RuntimeError as e:
+            print(f"Error tuning: {e}")
+            return 1
+        if args.cache:
+            tuning.save_caches(caches, args.cache)
+    else:
+        print("Error tuning: give a clip or an existing --cache")
+        return 1
+    
+    thresholds = ([float(v) for v in args.thresholds.split(",")] if args.thresholds
+                  else tuning.default_thresholds(config.min_motion_area))
+    rows = []
+    for cache in caches:
+        rows.extend(tuning.evaluate(
+            cache, thresholds, config.confirm_frames, config.pre_buffer_seconds,
+            config.post_buffer_seconds, config.coalesce_seconds,
+            config.min_clip_seconds))
+    minutes = caches[0].frame_count / caches[0].fps / 60.0 if caches else 0.0
+    print(tuning.format_table(rows, minutes))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"clip_minutes": round(minutes, 2), "results": rows}, f, indent=2)
+    return 0
+
+def run_gui(config_file: str = "~/.watchtower_config.json"):
+    """Run the desktop application."""
+    # Tk is only needed here; the headless commands must run without it
+    import tkinter as tk
+    from .gui.main_window import MainWindow
+    
     try:
         # Create root window
         root = tk.Tk()
@@ -18,7 +147,7 @@ def main():
             root.iconbitmap(str(icon_path))
             
         # Create main application window
-        app = MainWindow(root)
+        app = MainWindow(root, config_file)
         
         # Start main loop
         root.mainloop()
@@ -39,4 +168,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
@@ -1,13 +1,20 @@
 """Utility package for Webcam Monitor."""
 
+import importlib
+
 from .config import Config
-from .video import (
-    resize_frame,
-    frame_to_tkimage,
-    add_timestamp,
-    add_text_overlay,
-    draw_detection_box
-)
+
+# Video helpers pull in OpenCV and Pillow, so they are imported on first use
+_LAZY_ATTRS = {
+    'resize_frame': '.video',
+    'frame_to_tkimage': '.video',
+    'add_timestamp': '.video',
+    'add_text_overlay': '.video',
+    'draw_detection_box': '.video',
+    'DisplayRateLimiter': '.video',
+    'GridCompositor': '.video',
+    'PerfMonitor': '.perf',
+}
 
 __all__ = [
     'Config',
@@ -15,5 +22,17 @@ __all__ = [
     'frame_to_tkimage',
     'add_timestamp',
     'add_text_overlay',
-    'draw_detection_box'
-] 
\ No newline at end of file
+    'draw_detection_box',
+    'DisplayRateLimiter',
+    'GridCompositor',
+    'PerfMonitor'
+]
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
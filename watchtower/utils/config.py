@@ -2,7 +2,7 @@
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class Config:
     def __init__(self, config_file: str = "~/.watchtower_config.json"):
@@ -19,11 +19,39 @@ class Config:
         default_path = os.path.join(os.environ.get('USERPROFILE', str(Path.home())), 'WatchTower', 'Recordings')
         return {
             "camera_index": 0,
+            "cameras": [],  # Sections for `watchtower supervise`, e.g. [{"name": "door", "camera_index": 1}]
+            "camera_source": "",  # Video file or image folder to play instead of the camera
+            "replay_pacing": "realtime",  # realtime or fast (every frame, no waiting)
+            "replay_loop": False,  # Start the replay over at its end
+            "capture_width": 0,  # 0 keeps the driver default
+            "capture_height": 0,
+            "capture_fps": 0,
+            "capture_fourcc": "",  # e.g. MJPG for high resolutions over USB2; "" keeps the driver default
+            "detection_width": 640,  # 0 detects on full-resolution frames
+            "capture_yuv": False,  # Detect on the luma plane of raw YUV frames
             "output_folder": default_path,  # Will resolve to C:\Users\<CurrentUser>\WatchTower\Recordings
             "min_motion_area": 5000,
+            "confirm_frames": 3,  # Frames an object must be tracked before it starts a clip
+            "background_save_seconds": 60,  # Save the background model for warm restarts (0 = off)
+            "roi_polygons": [],  # Detect only inside these, e.g. [[[0.1, 0.2], [0.9, 0.2], [0.9, 1.0]]]
+            "exclusion_polygons": [],  # Never detect inside these (same fractional coordinates)
+            "idle_seconds": 0,  # Drop to the idle mode after this long without motion (0 = never)
+            "idle_frame_skip": 3,  # Idle mode decodes every (skip + 1)th frame
+            "idle_detection_width": 320,
             "pre_buffer_seconds": 10,
             "post_buffer_seconds": 10,
+            "coalesce_seconds": 20,  # Extend the open clip for triggers this soon after it (0 = off)
+            "min_clip_seconds": 5,
+            "master_idle_fps": 0,  # Master frame rate with no motion (0 = full rate)
             "always_record": True,
+            "quality_governor": True,  # Lower detection quality when the CPU cannot keep up
+            "thread_preset": "auto",  # auto, single_camera or multi_camera
+            "cv_threads": 0,  # Overrides for the preset (0 or [] keeps it)
+            "blas_threads": 0,
+            "pipeline_cpus": [],
+            "encoder_cpus": [],
+            "metrics_port": 0,  # Serve Prometheus metrics on 127.0.0.1:<port> (0 = off)
+            "metrics_textfile": "",  # Rewrite this .prom file for node_exporter ("" = off)
             "debug_mode": False,
             "fullscreen": False,
             "background_mode": False
@@ -75,6 +103,106 @@ class Config:
         """Set camera index."""
         self.set("camera_index", value)
 
+    @property
+    def camera_source(self) -> str:
+        """Get the file or image folder replayed instead of the camera."""
+        return self.get("camera_source", "")
+
+    @camera_source.setter
+    def camera_source(self, value: str) -> None:
+        """Set the replay source ("" uses the camera)."""
+        self.set("camera_source", value)
+
+    @property
+    def replay_pacing(self) -> str:
+        """Get the replay pacing: realtime or fast."""
+        return self.get("replay_pacing", "realtime")
+
+    @replay_pacing.setter
+    def replay_pacing(self, value: str) -> None:
+        """Set the replay pacing."""
+        self.set("replay_pacing", value)
+
+    @property
+    def replay_loop(self) -> bool:
+        """Get whether the replay starts over at its end."""
+        return self.get("replay_loop", False)
+
+    @replay_loop.setter
+    def replay_loop(self, value: bool) -> None:
+        """Set whether the replay starts over at its end."""
+        self.set("replay_loop", value)
+
+    @property
+    def cameras(self) -> List[Dict[str, Any]]:
+        """Get per-camera config sections for the supervisor."""
+        return self.get("cameras", [])
+
+    @cameras.setter
+    def cameras(self, value: List[Dict[str, Any]]) -> None:
+        """Set per-camera config sections."""
+        self.set("cameras", value)
+
+    @property
+    def capture_width(self) -> int:
+        """Get requested capture width (0 for driver default)."""
+        return self.get("capture_width", 0)
+
+    @capture_width.setter
+    def capture_width(self, value: int) -> None:
+        """Set requested capture width."""
+        self.set("capture_width", value)
+
+    @property
+    def capture_height(self) -> int:
+        """Get requested capture height (0 for driver default)."""
+        return self.get("capture_height", 0)
+
+    @capture_height.setter
+    def capture_height(self, value: int) -> None:
+        """Set requested capture height."""
+        self.set("capture_height", value)
+
+    @property
+    def capture_fps(self) -> float:
+        """Get requested capture frame rate (0 for driver default)."""
+        return self.get("capture_fps", 0)
+
+    @capture_fps.setter
+    def capture_fps(self, value: float) -> None:
+        """Set requested capture frame rate."""
+        self.set("capture_fps", value)
+
+    @property
+    def capture_fourcc(self) -> str:
+        """Get requested capture pixel format ('' for driver default)."""
+        return self.get("capture_fourcc", "")
+
+    @capture_fourcc.setter
+    def capture_fourcc(self, value: str) -> None:
+        """Set requested capture pixel format."""
+        self.set("capture_fourcc", value)
+
+    @property
+    def detection_width(self) -> int:
+        """Get width of the low-resolution detection stream (0 for full)."""
+        return self.get("detection_width", 640)
+
+    @detection_width.setter
+    def detection_width(self, value: int) -> None:
+        """Set width of the low-resolution detection stream."""
+        self.set("detection_width", value)
+
+    @property
+    def capture_yuv(self) -> bool:
+        """Get YUV capture setting."""
+        return self.get("capture_yuv", False)
+
+    @capture_yuv.setter
+    def capture_yuv(self, value: bool) -> None:
+        """Set YUV capture setting."""
+        self.set("capture_yuv", value)
+
     @property
     def output_folder(self) -> str:
         """Get output folder."""
@@ -97,6 +225,76 @@ class Config:
         """Set minimum motion area."""
         self.set("min_motion_area", value)
 
+    @property
+    def confirm_frames(self) -> int:
+        """Get frames an object must be tracked before it triggers recording."""
+        return self.get("confirm_frames", 3)
+
+    @confirm_frames.setter
+    def confirm_frames(self, value: int) -> None:
+        """Set frames an object must be tracked before it triggers recording."""
+        self.set("confirm_frames", value)
+
+    @property
+    def background_save_seconds(self) -> float:
+        """Get seconds between background model saves (0 to disable)."""
+        return self.get("background_save_seconds", 60)
+
+    @background_save_seconds.setter
+    def background_save_seconds(self, value: float) -> None:
+        """Set seconds between background model saves."""
+        self.set("background_save_seconds", value)
+
+    @property
+    def roi_polygons(self) -> List[List[List[float]]]:
+        """Get the detection area polygons, in fractions of the frame size."""
+        return self.get("roi_polygons", [])
+
+    @roi_polygons.setter
+    def roi_polygons(self, value: List[List[List[float]]]) -> None:
+        """Set the detection area polygons."""
+        self.set("roi_polygons", value)
+
+    @property
+    def exclusion_polygons(self) -> List[List[List[float]]]:
+        """Get the ignored area polygons, in fractions of the frame size."""
+        return self.get("exclusion_polygons", [])
+
+    @exclusion_polygons.setter
+    def exclusion_polygons(self, value: List[List[List[float]]]) -> None:
+        """Set the ignored area polygons."""
+        self.set("exclusion_polygons", value)
+
+    @property
+    def idle_seconds(self) -> float:
+        """Get seconds without motion before the idle mode (0 to disable)."""
+        return self.get("idle_seconds", 0)
+
+    @idle_seconds.setter
+    def idle_seconds(self, value: float) -> None:
+        """Set seconds without motion before the idle mode."""
+        self.set("idle_seconds", value)
+
+    @property
+    def idle_frame_skip(self) -> int:
+        """Get frames skipped between reads in the idle mode."""
+        return self.get("idle_frame_skip", 3)
+
+    @idle_frame_skip.setter
+    def idle_frame_skip(self, value: int) -> None:
+        """Set frames skipped between reads in the idle mode."""
+        self.set("idle_frame_skip", value)
+
+    @property
+    def idle_detection_width(self) -> int:
+        """Get detection width in the idle mode."""
+        return self.get("idle_detection_width", 320)
+
+    @idle_detection_width.setter
+    def idle_detection_width(self, value: int) -> None:
+        """Set detection width in the idle mode."""
+        self.set("idle_detection_width", value)
+
     @property
     def pre_buffer_seconds(self) -> int:
         """Get pre-buffer duration in seconds."""
@@ -107,6 +305,26 @@ class Config:
         """Set pre-buffer duration in seconds."""
         self.set("pre_buffer_seconds", value)
 
+    @property
+    def coalesce_seconds(self) -> float:
+        """Get seconds after a clip within which new triggers extend it."""
+        return self.get("coalesce_seconds", 20)
+
+    @coalesce_seconds.setter
+    def coalesce_seconds(self, value: float) -> None:
+        """Set seconds after a clip within which new triggers extend it."""
+        self.set("coalesce_seconds", value)
+
+    @property
+    def min_clip_seconds(self) -> float:
+        """Get minimum clip length in seconds."""
+        return self.get("min_clip_seconds", 5)
+
+    @min_clip_seconds.setter
+    def min_clip_seconds(self, value: float) -> None:
+        """Set minimum clip length in seconds."""
+        self.set("min_clip_seconds", value)
+
     @property
     def post_buffer_seconds(self) -> int:
         """Get post-buffer duration in seconds."""
@@ -117,6 +335,16 @@ class Config:
         """Set post-buffer duration in seconds."""
         self.set("post_buffer_seconds", value)
 
+    @property
+    def master_idle_fps(self) -> float:
+        """Get master recording frame rate while idle (0 for full rate)."""
+        return self.get("master_idle_fps", 0)
+
+    @master_idle_fps.setter
+    def master_idle_fps(self, value: float) -> None:
+        """Set master recording frame rate while idle."""
+        self.set("master_idle_fps", value)
+
     @property
     def always_record(self) -> bool:
         """Get always record setting."""
@@ -127,6 +355,86 @@ class Config:
         """Set always record setting."""
         self.set("always_record", value)
 
+    @property
+    def quality_governor(self) -> bool:
+        """Get quality governor setting."""
+        return self.get("quality_governor", True)
+
+    @quality_governor.setter
+    def quality_governor(self, value: bool) -> None:
+        """Set quality governor setting."""
+        self.set("quality_governor", value)
+
+    @property
+    def thread_preset(self) -> str:
+        """Get threading preset."""
+        return self.get("thread_preset", "auto")
+
+    @thread_preset.setter
+    def thread_preset(self, value: str) -> None:
+        """Set threading preset."""
+        self.set("thread_preset", value)
+
+    @property
+    def cv_threads(self) -> int:
+        """Get OpenCV thread count (0 for the preset's)."""
+        return self.get("cv_threads", 0)
+
+    @cv_threads.setter
+    def cv_threads(self, value: int) -> None:
+        """Set OpenCV thread count."""
+        self.set("cv_threads", value)
+
+    @property
+    def blas_threads(self) -> int:
+        """Get NumPy BLAS thread count (0 for the preset's)."""
+        return self.get("blas_threads", 0)
+
+    @blas_threads.setter
+    def blas_threads(self, value: int) -> None:
+        """Set NumPy BLAS thread count."""
+        self.set("blas_threads", value)
+
+    @property
+    def pipeline_cpus(self) -> List[int]:
+        """Get CPUs the capture pipeline is pinned to (empty for the preset's)."""
+        return self.get("pipeline_cpus", [])
+
+    @pipeline_cpus.setter
+    def pipeline_cpus(self, value: List[int]) -> None:
+        """Set CPUs the capture pipeline is pinned to."""
+        self.set("pipeline_cpus", value)
+
+    @property
+    def encoder_cpus(self) -> List[int]:
+        """Get CPUs video encoders are pinned to (empty for the preset's)."""
+        return self.get("encoder_cpus", [])
+
+    @encoder_cpus.setter
+    def encoder_cpus(self, value: List[int]) -> None:
+        """Set CPUs video encoders are pinned to."""
+        self.set("encoder_cpus", value)
+
+    @property
+    def metrics_port(self) -> int:
+        """Get the local port for the metrics endpoint (0 to disable)."""
+        return self.get("metrics_port", 0)
+
+    @metrics_port.setter
+    def metrics_port(self, value: int) -> None:
+        """Set the local port for the metrics endpoint."""
+        self.set("metrics_port", value)
+
+    @property
+    def metrics_textfile(self) -> str:
+        """Get the metrics textfile path (empty to disable)."""
+        return self.get("metrics_textfile", "")
+
+    @metrics_textfile.setter
+    def metrics_textfile(self, value: str) -> None:
+        """Set the metrics textfile path."""
+        self.set("metrics_textfile", value)
+
     @property
     def debug_mode(self) -> bool:
         """Get debug mode setting."""
@@ -0,0 +1,221 @@
+"""Prometheus metrics exporter: a local HTTP endpoint and a textfile."""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# name, type, help, function of (stats, rates) returning the value or None
+_METRICS = [
+    ("watchtower_capture_fps", "gauge",
+     "Frames read from the camera per second.",
+     lambda s, r: r.get("captured")),
+    ("watchtower_processing_fps", "gauge",
+     "Frames run through detection and recording per second.",
+     lambda s, r: r.get("processed")),
+    ("watchtower_frames_captured_total", "counter",
+     "Frames read from the camera.",
+     lambda s, r: s.get("capture", {}).get("frames")),
+    ("watchtower_frames_processed_total", "counter",
+     "Frames run through detection and recording.",
+     lambda s, r: s.get("frames")),
+    ("watchtower_frames_dropped_total", "counter",
+     "Frames the camera delivered that were never read (estimated).",
+     lambda s, r: s.get("dropped_frames")),
+    ("watchtower_frames_duplicate_total", "counter",
+     "Repeated frames recorded without running detection.",
+     lambda s, r: s.get("capture", {}).get("duplicates")),
+    ("watchtower_prebuffer_frames", "gauge",
+     "Frames held in the recorder's pre-buffer (encoding is synchronous).",
+     lambda s, r: s.get("prebuffer_frames")),
+    ("watchtower_bytes_written_total", "counter",
+     "Bytes written to clips and master recordings.",
+     lambda s, r: s.get("bytes_written")),
+    ("watchtower_bytes_written_per_second", "gauge",
+     "Recording write rate in bytes per second.",
+     lambda s, r: r.get("bytes")),
+    ("watchtower_clips_total", "counter",
+     "Clips started.",
+     lambda s, r: s.get("clips")),
+    ("watchtower_recording", "gauge",
+     "1 while a clip is being written.",
+     lambda s, r: int(s["recording"]) if "recording" in s else None),
+    ("watchtower_camera_connected", "gauge",
+     "1 while the camera delivers frames.",
+     lambda s, r: (int(s["capture"]["connected"])
+                   if "connected" in s.get("capture", {}) else None)),
+]
+
+# Counters the per-second rates are derived from
+_RATES = {
+    "captured": lambda s: s.get("capture", {}).get("frames"),
+    "processed": lambda s: s.get("frames"),
+    "bytes": lambda s: s.get("bytes_written"),
+}
+
+class MetricsExporter:
+    """
+    Publishes per-camera pipeline stats in the Prometheus text format.
+
+    The frame loop only hands over its latest stats dict with update(),
+    which takes a lock for a dict assignment; rendering happens on the
+    HTTP server thread (``port``, bound to ``host``) and on a thread that
+    rewrites ``textfile`` every ``interval`` seconds for node_exporter's
+    textfile collector. Either output may be left off.
+    """
+
+    def __init__(self, port: int = 0, textfile: str = "",
+                 interval: float = 15.0, host: str = "127.0.0.1"):
+        self.port = port
+        self.textfile = textfile
+        self.interval = interval
+        self.host = host
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._rates: Dict[str, Dict[str, float]] = {}
+        self._previous: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> bool:
+        """Start the server and textfile threads. Returns False on failure."""
+        self._stop.clear()
+        if self.port:
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port),
+                                                   self._handler())
+            except OSError as e:
+                print(f"Error starting metrics server on port {self.port}: {e}")
+                return False
+            self._server.daemon_threads = True
+            self._spawn(self._server.serve_forever, "watchtower-metrics-http")
+        if self.textfile:
+            self._spawn(self._write_loop, "watchtower-metrics-textfile")
+        return True
+
+    def stop(self) -> None:
+        """Stop the threads, writing the textfile one last time."""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+    def update(self, camera: str, stats: Dict[str, Any]) -> None:
+        """Hand over a camera's latest stats; never blocks for long."""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._previous.get(camera)
+            self._previous[camera] = (now, stats)
+            self._stats[camera] = stats
+            if previous is not None and now > previous[0]:
+                elapsed = now - previous[0]
+                rates = {}
+                for name, counter in _RATES.items():
+                    new, old = counter(stats), counter(previous[1])
+                    if new is not None and old is not None and new >= old:
+                        rates[name] = (new - old) / elapsed
+                self._rates[camera] = rates
+
+    def remove(self, camera: str) -> None:
+        """Stop exporting a camera."""
+        with self._lock:
+            self._stats.pop(camera, None)
+            self._rates.pop(camera, None)
+            self._previous.pop(camera, None)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            cameras = sorted(self._stats.items())
+            rates = dict(self._rates)
+
+        lines = []
+        for name, kind, help_text, value_of in _METRICS:
+            samples = []
+            for camera, stats in cameras:
+                value = value_of(stats, rates.get(camera, {}))
+                if value is not None:
+                    samples.append(f'{name}{{camera="{_escape(camera)}"}} {_number(value)}')
+            if samples:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+
+        # Stage latencies as a summary with p50/p99 quantiles
+        samples = []
+        for camera, stats in cameras:
+            for stage, timing in sorted(stats.get("stages", {}).items()):
+                labels = f'camera="{_escape(camera)}",stage="{_escape(stage)}"'
+                for quantile, key in (("0.5", "p50_ms"), ("0.99", "p99_ms")):
+                    samples.append(f'watchtower_stage_seconds{{{labels},quantile="{quantile}"}} '
+                                   f'{_number(timing[key] / 1000.0)}')
+        if samples:
+            lines.append("# HELP watchtower_stage_seconds Frame loop stage latency.")
+            lines.append("# TYPE watchtower_stage_seconds summary")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def _spawn(self, target, name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write_loop(self) -> None:
+        """Rewrite the textfile until stopped."""
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+        self.write_textfile()
+
+    def write_textfile(self) -> bool:
+        """Replace the textfile atomically so a scrape never sees half of it."""
+        tmp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp_path, self.textfile)
+            return True
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
+            return False
+
+    def _handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # No access log on stderr
+
+        return Handler
+
+def exporter_from_config(config) -> Optional[MetricsExporter]:
+    """Build and start the configured exporter, or None if it is off."""
+    if not config.metrics_port and not config.metrics_textfile:
+        return None
+    exporter = MetricsExporter(config.metrics_port, config.metrics_textfile)
+    if not exporter.start():
+        return None
+    return exporter
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value: float) -> str:
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
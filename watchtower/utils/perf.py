@@ -0,0 +1,101 @@
+"""Per-stage latency instrumentation and the debug HUD."""
+
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+class PerfMonitor:
+    """
+    Rolling latency statistics per pipeline stage.
+
+    Each stage keeps its last ``window`` durations in a fixed-size int64
+    ring, so recording a sample never allocates and percentiles are one
+    NumPy call when someone looks. Timing is done in laps::
+
+        t = perf.start()
+        read()
+        t = perf.lap("capture", t)
+        detect()
+        t = perf.lap("detect", t)
+
+    While ``enabled`` is False, start() and lap() return at once without
+    reading the clock, so the instrumentation can stay in the frame loop.
+    """
+
+    def __init__(self, window: int = 256, enabled: bool = False):
+        self.window = window
+        self.enabled = enabled
+        self._samples: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+
+    def start(self) -> int:
+        """Timestamp to measure the next stage from."""
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def lap(self, stage: str, start: int) -> int:
+        """Record the time since start for stage; returns the new start."""
+        if not self.enabled:
+            return 0
+        now = time.perf_counter_ns()
+        self.record(stage, now - start)
+        return now
+
+    def record(self, stage: str, duration_ns: int) -> None:
+        """Add one duration sample for stage."""
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = np.zeros(self.window, np.int64)
+            self._counts[stage] = 0
+        count = self._counts[stage]
+        samples[count % self.window] = duration_ns
+        self._counts[stage] = count + 1
+
+    def reset(self) -> None:
+        """Drop all samples."""
+        self._samples.clear()
+        self._counts.clear()
+
+    @property
+    def stages(self) -> List[str]:
+        """Stages in the order they were first timed."""
+        return list(self._samples)
+
+    def percentiles(self, q: Sequence[float] = (50, 99)
+                    ) -> Dict[str, Tuple[float, ...]]:
+        """Percentiles of each stage's recent durations, in milliseconds."""
+        result = {}
+        for stage, samples in self._samples.items():
+            filled = samples[:min(self._counts[stage], self.window)]
+            if len(filled):
+                result[stage] = tuple(float(v) / 1e6 for v in np.percentile(filled, q))
+        return result
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """p50/p99 per stage and sample counts, for status and metrics."""
+        return {
+            stage: {"p50_ms": p50, "p99_ms": p99,
+                    "samples": self._counts[stage]}
+            for stage, (p50, p99) in self.percentiles((50, 99)).items()
+        }
+
+def draw_hud(frame: np.ndarray, lines: Sequence[str]) -> np.ndarray:
+    """Draw text lines on a dark panel in the top-right corner of frame."""
+    if not lines:
+        return frame
+    font, scale, thickness = cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1
+    line_height = 17
+    width = max(cv2.getTextSize(line, font, scale, thickness)[0][0]
+                for line in lines) + 16
+    height = line_height * len(lines) + 10
+    x0 = max(frame.shape[1] - width - 10, 0)
+    y0 = 10
+
+    # Darken the panel area in place rather than blending a full overlay
+    panel = frame[y0:y0 + height, x0:x0 + width]
+    panel //= 3
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (x0 + 8, y0 + 5 + line_height * (i + 1) - 4),
+                    font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+    return frame
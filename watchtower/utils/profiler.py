@@ -0,0 +1,191 @@
+"""Sampling profiler for the frame loop, safe to leave on in production."""
+
+import collections
+import datetime
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Counter, Dict, Iterable, List, Optional
+
+# Set to 1 to profile every pipeline from the start (workers inherit it)
+PROFILE_ENV = "WATCHTOWER_PROFILE"
+
+def enabled_from_env() -> bool:
+    """Check if profiling was requested through the environment."""
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the given threads at a low fixed rate.
+
+    A daemon thread reads the target threads' current frames every
+    ``interval`` seconds (sys._current_frames, no tracing hooks), so the
+    profiled code runs at full speed between samples. Stacks are counted
+    in the collapsed format flamegraph.pl and speedscope read, one
+    ``thread;outer;...;inner count`` line per distinct stack.
+
+    Allocations are traced in short windows: tracemalloc runs for
+    ``alloc_window`` seconds out of every ``alloc_every``, then a snapshot
+    of the largest allocation sites (the frame buffers, usually) is added
+    to the report. Reports are rewritten every ``write_every`` seconds and
+    on stop().
+    """
+
+    def __init__(self, output_dir: str, name: str = "camera",
+                 thread_ids: Optional[Iterable[int]] = None,
+                 interval: float = 1 / 49, write_every: float = 30.0,
+                 alloc_window: float = 5.0, alloc_every: float = 60.0,
+                 alloc_frames: int = 4):
+        self.output_dir = Path(output_dir)
+        self.name = name
+        self.thread_ids = list(thread_ids or [threading.get_ident()])
+        self.interval = interval
+        self.write_every = write_every
+        self.alloc_window = alloc_window
+        self.alloc_every = alloc_every
+        self.alloc_frames = alloc_frames
+
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = self.output_dir / f"profile_{name}_{stamp}"
+        self.stacks_file = str(base) + ".collapsed"
+        self.alloc_file = str(base) + "_alloc.txt"
+
+        self.stacks: Counter[str] = collections.Counter()
+        self.samples = 0
+        self.sample_seconds = 0.0
+        self.started_at = 0.0
+        self.snapshots: List[str] = []
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._owns_tracemalloc = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> "SamplingProfiler":
+        """Start sampling in the background."""
+        if self._thread is not None:
+            return self
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"watchtower-profiler-{self.name}")
+        self._thread.start()
+        print(f"Profiling {self.name} to {self.stacks_file}")
+        return self
+
+    def stop(self) -> List[str]:
+        """Stop sampling and write the reports; returns their paths."""
+        if self._thread is None:
+            return []
+        self._stop.set()
+        self._thread.join(timeout=5.0)
+        self._thread = None
+        self._stop_tracemalloc()
+        self.write_reports()
+        return [self.stacks_file, self.alloc_file]
+
+    @property
+    def overhead(self) -> float:
+        """Fraction of wall time the sampler spent taking samples."""
+        elapsed = time.monotonic() - self.started_at
+        return self.sample_seconds / elapsed if elapsed > 0 else 0.0
+
+    def _run(self) -> None:
+        next_write = time.monotonic() + self.write_every
+        next_alloc = time.monotonic() + min(self.alloc_every, 10.0)
+        alloc_until = None
+        while not self._stop.wait(self.interval):
+            self._sample()
+            now = time.monotonic()
+
+            # Trace allocations only in short windows to bound the cost
+            if alloc_until is None and now >= next_alloc:
+                if self._start_tracemalloc():
+                    alloc_until = now + self.alloc_window
+                next_alloc = now + self.alloc_every
+            elif alloc_until is not None and now >= alloc_until:
+                self._take_snapshot()
+                self._stop_tracemalloc()
+                alloc_until = None
+
+            if now >= next_write:
+                self.write_reports()
+                next_write = now + self.write_every
+
+    def _sample(self) -> None:
+        """Add the current stack of every target thread."""
+        start = time.perf_counter()
+        frames = sys._current_frames()
+        for ident in self.thread_ids:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(f"thread-{ident}" if len(self.thread_ids) > 1 else self.name)
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+        self.sample_seconds += time.perf_counter() - start
+
+    def _label(self, code) -> str:
+        """file:function name for a code object, cached."""
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def _start_tracemalloc(self) -> bool:
+        if tracemalloc.is_tracing():
+            return False  # Someone else is tracing; leave it to them
+        tracemalloc.start(self.alloc_frames)
+        self._owns_tracemalloc = True
+        return True
+
+    def _stop_tracemalloc(self) -> None:
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def _take_snapshot(self, limit: int = 15) -> None:
+        """Summarize the largest live allocation sites."""
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        stats = snapshot.statistics("traceback")
+        total = sum(stat.size for stat in stats)
+        stamp = datetime.datetime.now().strftime("%H:%M:%S")
+        lines = [f"== {stamp}: {total / 1e6:.1f} MB traced in "
+                 f"{sum(stat.count for stat in stats)} blocks =="]
+        for stat in stats[:limit]:
+            lines.append(f"{stat.size / 1e6:9.2f} MB  {stat.count:6d} blocks  "
+                         f"avg {stat.size / max(stat.count, 1) / 1e3:9.1f} kB")
+            for frame in reversed(stat.traceback):
+                lines.append(f"      {frame.filename}:{frame.lineno}")
+        self.snapshots.append("\n".join(lines))
+
+    def write_reports(self) -> None:
+        """Write the collapsed stacks and the allocation report."""
+        try:
+            with open(self.stacks_file, "w", encoding="utf-8") as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            with open(self.alloc_file, "w", encoding="utf-8") as f:
+                f.write(f"Profile of {self.name}: {self.samples} samples "
+                        f"every {self.interval * 1000:.0f} ms, sampler overhead "
+                        f"{self.overhead:.2%} of wall time\n\n")
+                f.write("\n\n".join(self.snapshots) or "No allocation snapshot yet.")
+                f.write("\n")
+        except OSError as e:
+            print(f"Error writing profile: {e}")
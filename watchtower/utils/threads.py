@@ -0,0 +1,121 @@
+"""Thread and CPU affinity policy for capture pipelines and encoders."""
+
+import contextlib
+import os
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+# Environment variables read by the BLAS/OpenMP runtimes behind NumPy.
+# They only take effect if set before NumPy is first imported.
+BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+PRESETS = ("single_camera", "multi_camera")
+
+class ThreadPolicy(NamedTuple):
+    """
+    Threads and CPUs for one camera pipeline.
+    cv_threads of 0 leaves OpenCV's default; empty CPU lists leave the
+    affinity alone.
+    """
+    cv_threads: int
+    blas_threads: int
+    pipeline_cpus: List[int]
+    encoder_cpus: List[int]
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def preset_policy(preset: str, camera_slot: int = 0, cameras: int = 1,
+                  cpus: Optional[List[int]] = None) -> ThreadPolicy:
+    """
+    Build the policy a preset gives the pipeline in camera_slot.
+
+    single_camera: one pipeline owns the machine, so OpenCV keeps its own
+    thread pool and nothing is pinned.
+    multi_camera: parallelism comes from one process per camera, so each
+    pipeline runs OpenCV single-threaded. The CPUs are split into one
+    block per camera; the pipeline is pinned to the first CPU of its
+    block and its encoder to the rest (or shares the CPU on small hosts).
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown thread preset: {preset!r}")
+    if cpus is None:
+        cpus = available_cpus()
+    if preset == "single_camera":
+        return ThreadPolicy(0, 1, [], [])
+
+    per_camera = max(1, len(cpus) // max(1, cameras))
+    first = (camera_slot * per_camera) % len(cpus)
+    block = cpus[first:first + per_camera] or cpus[:1]
+    encoder = block[1:] or block
+    return ThreadPolicy(1, 1, block[:1], encoder)
+
+def policy_from_config(config, camera_slot: int = 0,
+                       cameras: int = 1) -> ThreadPolicy:
+    """Resolve the configured preset and apply any explicit overrides."""
+    preset = config.thread_preset
+    if preset == "auto":
+        preset = "multi_camera" if cameras > 1 else "single_camera"
+    policy = preset_policy(preset, camera_slot, cameras)
+    return ThreadPolicy(
+        config.cv_threads or policy.cv_threads,
+        config.blas_threads or policy.blas_threads,
+        list(config.pipeline_cpus) or policy.pipeline_cpus,
+        list(config.encoder_cpus) or policy.encoder_cpus,
+    )
+
+def apply_blas_env(policy: ThreadPolicy) -> None:
+    """
+    Limit NumPy's BLAS threads. Call before NumPy is imported; variables
+    the user already set are left alone.
+    """
+    if policy.blas_threads > 0:
+        for name in BLAS_ENV_VARS:
+            os.environ.setdefault(name, str(policy.blas_threads))
+
+def apply_policy(policy: ThreadPolicy) -> None:
+    """Apply the OpenCV thread count and pin the calling thread."""
+    import cv2
+
+    if policy.cv_threads > 0:
+        cv2.setNumThreads(policy.cv_threads)
+    set_affinity(policy.pipeline_cpus)
+
+def set_affinity(cpus: Sequence[int]) -> bool:
+    """
+    Pin the calling thread (and threads it starts later) to cpus.
+    Returns False where affinity is not supported, e.g. outside Linux.
+    """
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, cpus)
+        return True
+    except OSError as e:
+        print(f"Error setting CPU affinity: {e}")
+        return False
+
+@contextlib.contextmanager
+def pinned(cpus: Sequence[int]) -> Iterator[None]:
+    """
+    Run a block with the calling thread pinned to cpus, then restore it.
+    Threads started inside the block (e.g. an encoder's worker threads)
+    keep the affinity they were created with.
+    """
+    if not cpus or not hasattr(os, "sched_getaffinity"):
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    set_affinity(cpus)
+    try:
+        yield
+    finally:
+        set_affinity(sorted(previous))
@@ -1,9 +1,10 @@
 """Video utility module for frame processing and conversion."""
 
+import time
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 
 def resize_frame(frame: np.ndarray, width: Optional[int] = None,
                 height: Optional[int] = None) -> np.ndarray:
@@ -42,6 +43,78 @@ def frame_to_tkimage(frame: np.ndarray) -> ImageTk.PhotoImage:
     # Convert to PhotoImage
     return ImageTk.PhotoImage(image=image)
 
+class DisplayRateLimiter:
+    """
+    Limits how often the preview is redrawn.
+    Converting a frame to a Tk image costs about as much as detecting on it,
+    so the preview can run slower than capture without anyone noticing.
+    A max_fps of 0 draws every frame.
+    """
+
+    def __init__(self, max_fps: float = 0):
+        self.max_fps = max_fps
+        self.last_draw = float("-inf")
+
+    def ready(self, now: Optional[float] = None) -> bool:
+        """Check whether a frame should be drawn now, and count it if so."""
+        if now is None:
+            now = time.monotonic()
+        if self.max_fps > 0 and now - self.last_draw < 1.0 / self.max_fps:
+            return False
+        self.last_draw = now
+        return True
+
+class GridCompositor:
+    """
+    Composes several camera previews into one image for a single Tk update.
+
+    The composite is allocated once; each camera's frame is downscaled
+    straight into its tile, keeping its aspect ratio, and only cameras
+    with a new frame are redrawn. ``changed`` tells whether the composite
+    needs pushing to the screen.
+    """
+
+    def __init__(self, count: int, tile_size: Tuple[int, int] = (320, 180),
+                 columns: Optional[int] = None):
+        self.count = count
+        self.tile_width, self.tile_height = tile_size
+        self.columns = columns or max(1, int(np.ceil(np.sqrt(count))))
+        self.rows = max(1, int(np.ceil(count / self.columns)))
+        self.composite = np.zeros((self.rows * self.tile_height,
+                                   self.columns * self.tile_width, 3), np.uint8)
+        self.changed = True
+        self._tile_shapes: List[Optional[Tuple[int, int]]] = [None] * count
+
+    def tile(self, index: int) -> np.ndarray:
+        """View of one camera's tile in the composite."""
+        row, column = divmod(index, self.columns)
+        y, x = row * self.tile_height, column * self.tile_width
+        return self.composite[y:y + self.tile_height, x:x + self.tile_width]
+
+    def update_tile(self, index: int, frame: np.ndarray) -> None:
+        """Downscale a BGR frame into its tile, letterboxed to fit."""
+        tile = self.tile(index)
+        h, w = frame.shape[:2]
+        scale = min(self.tile_width / w, self.tile_height / h)
+        width = max(1, int(w * scale))
+        height = max(1, int(h * scale))
+        if self._tile_shapes[index] != (height, width):
+            # First frame or a new camera mode: clear the letterbox bars
+            tile[:] = 0
+            self._tile_shapes[index] = (height, width)
+        top = (self.tile_height - height) // 2
+        left = (self.tile_width - width) // 2
+        cv2.resize(frame, (width, height),
+                   dst=tile[top:top + height, left:left + width],
+                   interpolation=cv2.INTER_AREA)
+        self.changed = True
+
+    def clear_tile(self, index: int) -> None:
+        """Blank a tile, e.g. while its camera is away."""
+        self.tile(index)[:] = 0
+        self._tile_shapes[index] = None
+        self.changed = True
+
 def add_timestamp(frame: np.ndarray, timestamp: str,
                  position: Tuple[int, int] = None,
                  color: Tuple[int, int, int] = (0, 255, 255),